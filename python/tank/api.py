@@ -13,14 +13,17 @@ Classes for the main Sgtk API.
 """
 
 import os
-import glob
 
 from . import folder
 from . import context
 from .util import shotgun, yaml_cache
 from .errors import TankError
-from .path_cache import PathCache
+from .path_cache import PathCache, PathCacheConnectionPool, PathCacheReplicaConnectionPool, PathCacheSnapshot
+from .path_cache import get_stats as _get_path_cache_stats, reset_stats as _reset_path_cache_stats
 from .template import read_templates
+from .template_index import TemplateIndex
+from .template_walker import TemplateWalker
+from .templatekey import SequenceKey
 from . import constants
 from .util import log_user_activity_metric
 from . import pipelineconfig
@@ -59,6 +62,23 @@ class Sgtk(object):
         except TankError, e:
             raise TankError("Could not read templates configuration: %s" % e)
 
+        # index used to quickly find templates matching a path
+        self.__template_index = TemplateIndex(self.templates)
+
+        # statistics for the last search of files matching a template
+        self.__last_scan_stats = {}
+
+        # connections to the path cache database, shared by all the path cache instances
+        self.__path_cache_pool = PathCacheConnectionPool(self)
+        self.__path_cache_replica_pool = PathCacheReplicaConnectionPool(self)
+        self.__path_cache_snapshot = PathCacheSnapshot(self)
+
+        # data of the contexts built from entities
+        self.__context_cache = context.ContextCache(self)
+
+        # folder configuration used to create folders
+        self.__folder_configuration_cache = folder.FolderConfigurationCache(self)
+
         # execute a tank_init hook for developers to use.
         self.execute_core_hook(constants.TANK_INIT_HOOK_NAME)
 
@@ -80,6 +100,48 @@ class Sgtk(object):
         """
         return self.__pipeline_config
 
+    @property
+    def path_cache_pool(self):
+        """
+        Internal Use Only - Pool of connections to the path cache database,
+        used by :class:`~tank.path_cache.PathCache`.
+        """
+        return self.__path_cache_pool
+
+    @property
+    def path_cache_replica_pool(self):
+        """
+        Internal Use Only - Pool of connections to the local copy of the path cache
+        database, used by :class:`~tank.path_cache.PathCache` when the
+        ``use_path_cache_replica`` setting is enabled.
+        """
+        return self.__path_cache_replica_pool
+
+    @property
+    def path_cache_snapshot(self):
+        """
+        Internal Use Only - In-memory copy of the path cache, used by
+        :class:`~tank.path_cache.PathCache` when the ``use_path_cache_snapshot``
+        setting is enabled.
+        """
+        return self.__path_cache_snapshot
+
+    @property
+    def context_cache(self):
+        """
+        Internal Use Only - Cache of the contexts built from Shotgun entities,
+        see :class:`~tank.context.ContextCache`.
+        """
+        return self.__context_cache
+
+    @property
+    def folder_configuration_cache(self):
+        """
+        Internal Use Only - In-memory copy of the folder configuration,
+        see :class:`~tank.folder.FolderConfigurationCache`.
+        """
+        return self.__folder_configuration_cache
+
     def execute_core_hook(self, hook_name, **kwargs):
         """
         Executes a core level hook, passing it any keyword arguments supplied.
@@ -263,10 +325,70 @@ class Sgtk(object):
         :raises: :class:`TankError`
         """
         try:
-            self.templates = read_templates(self.__pipeline_config)
+            templates = read_templates(self.__pipeline_config)
         except TankError, e:
             raise TankError("Templates could not be reloaded: %s" % e)
 
+        # make sure previous templates still referenced elsewhere don't
+        # keep returning results computed before the reload.
+        for template in self.templates.values():
+            template.clear_fields_cache()
+        self.templates = templates
+
+        self.__template_index = TemplateIndex(self.templates)
+
+    @property
+    def last_scan_stats(self):
+        """
+        Statistics about the last search for files matching a template done
+        with :meth:`paths_from_template` or :meth:`abstract_paths_from_template`,
+        as a dictionary with the following keys:
+
+        - ``directories_listed``: Number of directories listed.
+        - ``entries_seen``: Number of directory entries returned by these listings.
+        - ``wall_time``: Time spent searching, in seconds.
+
+        The dictionary is empty if no search was done yet.
+        """
+        return dict(self.__last_scan_stats)
+
+    @property
+    def path_cache_stats(self):
+        """
+        Statistics about the time this process spent in the path cache,
+        for all the toolkit instances, as a dictionary keyed by operation::
+
+            >>> tk.path_cache_stats
+            {'connect': {'count': 2, 'rows': 0, 'time': 0.0121},
+             'query': {'count': 254, 'rows': 1032, 'time': 0.0934},
+             'incremental_sync': {'count': 1, 'rows': 12, 'time': 0.412}}
+
+        The ``count`` of each operation is the number of times it happened,
+        ``time`` the time it took in seconds, and ``rows`` the number of path cache
+        rows or Shotgun records it returned or wrote. The operations are:
+
+        - ``connect``: Connections opened to the path cache database.
+        - ``query``: SQL statements run against the path cache database.
+          Only the time spent executing the statements is counted, not the
+          time spent fetching their results.
+        - ``slow_query``: Queries slower than the ``path_cache_slow_query_threshold``
+          setting of the pipeline configuration, in seconds (default 1). These
+          queries are also logged.
+        - ``full_sync``: Full synchronizations of the path cache with Shotgun.
+        - ``incremental_sync``: Incremental synchronizations of the path cache with Shotgun.
+        - ``shotgun_upload``: Uploads of new folders to Shotgun.
+
+        Operations are only present once they happened. Counters can be reset
+        with :meth:`reset_path_cache_stats`.
+        """
+        return _get_path_cache_stats()
+
+    def reset_path_cache_stats(self):
+        """
+        Resets the counters returned by :attr:`path_cache_stats`.
+        """
+        _reset_path_cache_stats()
+
     def list_commands(self):
         """
         Lists the system commands registered with the system.
@@ -320,29 +442,62 @@ class Sgtk(object):
         :param path: Path to match against a template
         :returns: :class:`TemplatePath` or None if no match could be found.
         """
-        matched_templates = []
-        for key, template in self.templates.items():
-            if template.validate(path):
-                matched_templates.append(template)
+        (template, error) = self.templates_from_paths([path])[0]
+        if error:
+            raise TankError(error)
+        return template
 
-        if len(matched_templates) == 0:
-            return None
-        elif len(matched_templates) == 1:
-            return matched_templates[0]
-        else:
-            # ambiguity!
-            # We're erroring out anyway, take the time to create helpful debug info!
-            matched_fields = []
-            for template in matched_templates:
-                matched_fields.append(template.get_fields(path))
+    def templates_from_paths(self, paths):
+        """
+        Finds the template matching each of the given paths. This is equivalent
+        to calling :meth:`template_from_path` for each path, but is faster when
+        dealing with a lot of paths, for example all the files referenced by a scene::
+
+            >>> paths = ["/studio/my_proj/assets/Car/Anim/work", "/studio/my_proj/foo"]
+            >>> tk.templates_from_paths(paths)
+            [(<Sgtk Template maya_asset_project: assets/%(Asset)s/%(Step)s/work>, None), (None, None)]
 
-            msg = "%d templates are matching the path '%s'.\n" % (len(matched_templates), path)
-            msg += "The overlapping templates are:\n"
-            for fields, template in zip(matched_fields, matched_templates):
-                msg += "%s\n%s\n" % (template, fields)
-            raise TankError(msg)
+        Errors are reported for each path instead of being raised.
 
-    def paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False):
+        :param paths: List of paths to match against templates.
+        :returns: List with a ``(template, error)`` tuple for each path, in the
+                  same order as the input paths. ``template`` is the matching
+                  :class:`TemplatePath` or None if no single match was found,
+                  ``error`` is a message describing why the path is ambiguous or None.
+        """
+        # the templates dictionary is public and may have been modified
+        # since the index was built, in which case we need to rebuild it.
+        if not self.__template_index.is_current(self.templates):
+            self.__template_index = TemplateIndex(self.templates)
+
+        results = []
+        for path, candidates in zip(paths, self.__template_index.get_candidates_many(paths)):
+            matched_templates = []
+            for template in candidates:
+                if template.validate(path):
+                    matched_templates.append(template)
+
+            if len(matched_templates) == 0:
+                results.append((None, None))
+            elif len(matched_templates) == 1:
+                results.append((matched_templates[0], None))
+            else:
+                # ambiguity!
+                # take the time to create helpful debug info!
+                matched_fields = []
+                for template in matched_templates:
+                    matched_fields.append(template.get_fields(path))
+
+                msg = "%d templates are matching the path '%s'.\n" % (len(matched_templates), path)
+                msg += "The overlapping templates are:\n"
+                for fields, template in zip(matched_fields, matched_templates):
+                    msg += "%s\n%s\n" % (template, fields)
+                results.append((None, msg))
+
+        return results
+
+    def paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False,
+                            max_workers=None):
         """
         Finds paths that match a template using field values passed.
 
@@ -361,7 +516,7 @@ class Sgtk(object):
         If an optional key is to be skipped, all matching paths that contain a value for
         that key as well as those that don't will be included in the result.
 
-        .. note:: The result is not ordered in any particular way.
+        .. note:: The result is sorted alphabetically.
 
         Imagine you have a template ``maya_work: sequences/{Sequence}/{Shot}/work/{name}.v{version}.ma``::
 
@@ -388,9 +543,38 @@ class Sgtk(object):
         :type  skip_keys: List of key names
         :param skip_missing_optional_keys: Specify if optional keys should be skipped if they 
                                         aren't found in the fields collection
+        :param max_workers: Number of threads used to list directories concurrently. Defaults
+                            to the ``filesystem_scan_max_workers`` setting of the pipeline
+                            configuration, or 1. Using more threads can greatly speed up
+                            searches on high latency file systems.
+        :type  max_workers: Integer
         :returns: Matching file paths
         :rtype: List of strings.
         """
+        found_files = self._search_template_paths(template, fields, skip_keys,
+                                                  skip_missing_optional_keys, max_workers)
+
+        # sort the results so they don't depend on the order directories
+        # were listed in.
+        return sorted(set(path for (path, _) in found_files))
+
+    def _search_template_paths(self, template, fields, skip_keys=None, skip_missing_optional_keys=False,
+                               max_workers=None, frame_key=None):
+        """
+        Searches for the files matching each definition variation of a template.
+        See :meth:`paths_from_template` for details.
+
+        :param template: Template against whom to match.
+        :param fields: Fields and values to use.
+        :param skip_keys: Keys whose values should be ignored from the fields parameter.
+        :param skip_missing_optional_keys: Specify if optional keys should be skipped if they
+                                           aren't found in the fields collection
+        :param max_workers: Number of threads used to list directories concurrently.
+        :param frame_key: Optional :class:`SequenceKey` used to collapse image sequences.
+                          See :meth:`TemplateWalker.find_sequences`.
+        :returns: List of ``(path, frames)`` tuples, where frames is the list of frame numbers
+                  found for image sequences, or None.
+        """
         skip_keys = skip_keys or []
         if isinstance(skip_keys, basestring):
             skip_keys = [skip_keys]
@@ -404,48 +588,57 @@ class Sgtk(object):
             if key not in skip_keys:
                 skip_keys.append(key)
             local_fields[key] = "*"
-            
-        # iterate for each set of keys in the template:
-        found_files = set()
-        globs_searched = set()
-        for keys in template._keys:
-            # create fields and skip keys with those that 
-            # are relevant for this key set:
-            current_local_fields = local_fields.copy()
-            current_skip_keys = []
-            for key in skip_keys:
-                if key in keys:
-                    current_skip_keys.append(key)
-                    current_local_fields[key] = "*"
-            
-            # find remaining missing keys - these will all be optional keys:
-            missing_optional_keys = template._missing_keys(current_local_fields, keys, False)
-            if missing_optional_keys:
-                if skip_missing_optional_keys:
-                    # Add wildcard for each optional key missing from the input fields
-                    for missing_key in missing_optional_keys:
-                        current_local_fields[missing_key] = "*"
-                        current_skip_keys.append(missing_key)
-                else:
-                    # if there are missing fields then we won't be able to
-                    # form a valid path from them so skip this key set
-                    continue
-            
-            # Apply the fields to build the glob string to search with:
-            glob_str = template._apply_fields(current_local_fields, ignore_types=current_skip_keys)
-            if glob_str in globs_searched:
-                # it's possible that multiple key sets return the same search
-                # string depending on the fields and skip-keys passed in
-                continue
-            globs_searched.add(glob_str)
-            
-            # Find all files which are valid for this key set
-            found_files.update([found_file for found_file in glob.iglob(glob_str) if template.validate(found_file)])
-                    
-        return list(found_files) 
 
+        if max_workers is None:
+            max_workers = self.__pipeline_config.get_filesystem_scan_max_workers()
 
-    def abstract_paths_from_template(self, template, fields):
+        found_files = []
+        walker = TemplateWalker(template, max_workers)
+        try:
+            # iterate for each set of keys in the template, the walker
+            # shares directory listings between all of them:
+            for keys in template._keys:
+                # create fields and skip keys with those that 
+                # are relevant for this key set:
+                current_local_fields = local_fields.copy()
+                current_skip_keys = []
+                for key in skip_keys:
+                    if key in keys:
+                        current_skip_keys.append(key)
+                        current_local_fields[key] = "*"
+
+                # find remaining missing keys - these will all be optional keys:
+                missing_optional_keys = template._missing_keys(current_local_fields, keys, False)
+                if missing_optional_keys:
+                    if skip_missing_optional_keys:
+                        # Add wildcard for each optional key missing from the input fields
+                        for missing_key in missing_optional_keys:
+                            current_local_fields[missing_key] = "*"
+                            current_skip_keys.append(missing_key)
+                    else:
+                        # if there are missing fields then we won't be able to
+                        # form a valid path from them so skip this key set
+                        continue
+
+                # Find all files which are valid for this key set
+                if frame_key:
+                    found_files.extend(walker.find_sequences(current_local_fields, current_skip_keys, frame_key))
+                else:
+                    found_files.extend((path, None) for path in walker.find(current_local_fields, current_skip_keys))
+        finally:
+            walker.close()
+
+        self.__last_scan_stats = walker.stats
+        log.debug(
+            "Searched for %s files with %d thread(s): %d directories listed, "
+            "%d entries seen in %.3fs" % (
+                template, max(1, max_workers), self.__last_scan_stats["directories_listed"],
+                self.__last_scan_stats["entries_seen"], self.__last_scan_stats["wall_time"]
+            )
+        )
+        return found_files
+
+    def abstract_paths_from_template(self, template, fields, max_workers=None, include_frames=False):
         """
         Returns an abstract path based on a template.
 
@@ -497,9 +690,22 @@ class Sgtk(object):
         :type  template: :class:`TemplatePath`
         :param fields: Mapping of keys to values with which to assemble the abstract path.
         :type fields: dictionary
+        :param max_workers: Number of threads used to list directories concurrently.
+                            See :meth:`paths_from_template`.
+        :type  max_workers: Integer
+        :param include_frames: If True, also return the frames found on disk for
+                               each image sequence.
+        :type  include_frames: Bool
 
         :returns: A list of paths whose abstract keys use their abstract(default) value unless
-                  a value is specified for them in the fields parameter.
+                  a value is specified for them in the fields parameter. If ``include_frames``
+                  is True, a dictionary keyed by these paths is returned instead. Values are None
+                  for paths without frame numbers, and otherwise dictionaries with the following keys:
+
+                  - ``frames``: Sorted list of frame numbers found on disk.
+                  - ``ranges``: List of ``(first, last)`` tuples for each contiguous range of frames.
+                  - ``missing``: List of ``(first, last)`` tuples for each range of frames
+                    missing between the first and the last frame.
         """
         search_template = template
 
@@ -517,7 +723,8 @@ class Sgtk(object):
 
         abstract_key_names = [k.name for k in template.keys.values() if k.is_abstract]
 
-        skip_leaf_level = True
+        # frames can only be listed by searching the leaf level
+        skip_leaf_level = not include_frames
         for k in leaf_keys:
             if k not in abstract_key_names:
                 # a non-abstract key
@@ -529,15 +736,24 @@ class Sgtk(object):
         if skip_leaf_level:
             search_template = template.parent
 
-        # now carry out a regular search based on the template
-        found_files = self.paths_from_template(search_template, fields)
+        # now carry out a regular search based on the template. When the leaf level
+        # is searched, frames of image sequences are collapsed right away so that
+        # only one file per sequence needs to be parsed.
+        frame_key = None
+        if not skip_leaf_level:
+            frame_keys = [k for k in template.keys.values() if isinstance(k, SequenceKey) and k.is_abstract]
+            if len(frame_keys) == 1:
+                frame_key = frame_keys[0]
+
+        found_files = self._search_template_paths(search_template, fields, max_workers=max_workers,
+                                                  frame_key=frame_key)
 
         st_abstract_key_names = [k.name for k in search_template.keys.values() if k.is_abstract]
 
         # now collapse down the search matches for any abstract fields,
         # and add the leaf level if necessary
-        abstract_paths = set()
-        for found_file in found_files:
+        abstract_paths = {}
+        for (found_file, frames) in found_files:
 
             cur_fields = search_template.get_fields(found_file)
 
@@ -563,9 +779,20 @@ class Sgtk(object):
 
             # now we have all the fields we need to compose the full template
             abstract_path = template.apply_fields(cur_fields)
-            abstract_paths.add(abstract_path)
+            if frames is not None:
+                # several sequences can collapse to the same abstract path,
+                # e.g. the left and right eyes of a stereo render.
+                frames = set(frames).union(abstract_paths.get(abstract_path) or [])
+            elif abstract_path in abstract_paths:
+                continue
+            abstract_paths[abstract_path] = frames
 
-        return list(abstract_paths)
+        if include_frames:
+            return dict(
+                (path, _get_frame_ranges(frames) if frames is not None else None)
+                for (path, frames) in abstract_paths.iteritems()
+            )
+        return sorted(abstract_paths)
 
 
     def paths_from_entity(self, entity_type, entity_id):
@@ -629,6 +856,25 @@ class Sgtk(object):
         """
         return context.from_path(self, path, previous_context)
 
+    def contexts_from_paths(self, paths):
+        """
+        Factory method that constructs context objects for several paths on disk.
+        This is equivalent to calling :meth:`context_from_path` for each path, but
+        is much faster when dealing with a lot of paths, since folders shared
+        by several paths are only looked up once::
+
+            >>> paths = ["/studio/my_proj/shots/010/comp/work/a.nk", "/studio/my_proj/shots/010/comp/work/b.nk"]
+            >>> tk.contexts_from_paths(paths)
+            {'/studio/my_proj/shots/010/comp/work/a.nk': <Sgtk Context:  Project: ...>,
+             '/studio/my_proj/shots/010/comp/work/b.nk': <Sgtk Context:  Project: ...>}
+
+        Paths resolving to the same entities share the same :class:`Context` object.
+
+        :param paths: List of file system paths
+        :returns: Dictionary of :class:`Context` keyed by path
+        """
+        return context.from_paths(self, paths)
+
     def context_from_entity(self, entity_type, entity_id):
         """
         Factory method that constructs a context object from a Shotgun entity.
@@ -639,6 +885,23 @@ class Sgtk(object):
         """
         return context.from_entity(self, entity_type, entity_id)
 
+    def contexts_from_entities(self, entities):
+        """
+        Factory method that constructs context objects for several Shotgun entities.
+        This is equivalent to calling :meth:`context_from_entity` for each entity, but
+        is much faster when dealing with a lot of entities, since the entities
+        which need to be looked up in Shotgun are fetched with one query per entity type::
+
+            >>> tk.contexts_from_entities([("Task", 123), ("Task", 124), ("Shot", 456)])
+            {('Task', 123): <Sgtk Context:  Project: ...>,
+             ('Task', 124): <Sgtk Context:  Project: ...>,
+             ('Shot', 456): <Sgtk Context:  Project: ...>}
+
+        :param entities: List of (entity type, entity id) tuples
+        :returns: Dictionary of :class:`Context` keyed by (entity type, entity id)
+        """
+        return context.from_entities(self, entities)
+
     def context_from_entity_dictionary(self, entity_dictionary):
         """
         Derives a context from a shotgun entity dictionary. This will try to use any
@@ -753,6 +1016,27 @@ class Sgtk(object):
                                                       engine)
         return folders
 
+    def plan_filesystem_structure(self, entity_type, entity_id, engine=None):
+        """
+        Computes the folders :meth:`create_filesystem_structure` would create and
+        compares them with what is on disk and in the path cache, without making
+        any changes. Unlike :meth:`preview_filesystem_structure`, this reports
+        which folders already exist and which conflict with the path cache::
+
+            >>> plan = tk.plan_filesystem_structure("Shot", [1234, 1235])
+            >>> [item["path"] for (item, message) in plan.conflicts]
+            []
+            >>> folders = plan.execute()
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun id or list of ids
+        :param engine: Optional engine name to indicate that a second, engine specific
+                       folder creation pass should be executed for a particular engine.
+        :type engine: String.
+        :returns: :class:`~tank.folder.FolderCreationPlan` instance
+        """
+        return folder.plan_filesystem_structure(self, entity_type, entity_id, engine)
+
 
 ##########################################################################################
 # module methods
@@ -814,6 +1098,28 @@ def get_authenticated_user():
     global _authenticated_user
     return _authenticated_user
 
+
+def _get_frame_ranges(frames):
+    """
+    Describes a set of frame numbers as contiguous ranges.
+
+    :param frames: Iterable of frame numbers.
+    :returns: Dictionary with the sorted ``frames``, and the ``ranges`` and ``missing``
+              lists of ``(first, last)`` tuples, as described in
+              :meth:`Sgtk.abstract_paths_from_template`.
+    """
+    frames = sorted(set(frames))
+    ranges = []
+    missing = []
+    for frame in frames:
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], frame)
+        else:
+            if ranges:
+                missing.append((ranges[-1][1] + 1, frame - 1))
+            ranges.append((frame, frame))
+    return {"frames": frames, "ranges": ranges, "missing": missing}
+
 ##########################################################################################
 # Legacy handling
 
@@ -31,6 +31,73 @@ CACHE_LOCATION_HOOK_NAME = "cache_location"
 # Configuration file containing setup and path details
 PIPELINECONFIG_FILE = "pipeline_configuration.yml"
 
+# default number of paths for which each template keeps the fields it
+# extracted in memory. Can be overridden with the template_fields_cache_size
+# setting in the pipeline configuration file.
+DEFAULT_TEMPLATE_FIELDS_CACHE_SIZE = 1000
+
+# default number of threads used to list directories when searching for
+# files matching a template. Can be overridden with the filesystem_scan_max_workers
+# setting in the pipeline configuration file.
+DEFAULT_FILESYSTEM_SCAN_MAX_WORKERS = 1
+
+# file next to the pipeline configuration holding the templates configuration
+# read from templates.yml and its includes. Only used if the use_templates_cache
+# setting is enabled in the pipeline configuration file.
+TEMPLATES_CACHE_FILE = "templates_cache.json"
+
+# version of the templates cache file format, to be bumped whenever
+# the templates cache can't be read by older versions of core anymore.
+TEMPLATES_CACHE_FORMAT_VERSION = 2
+
+# file next to the pipeline configuration holding the folder schema scanned from
+# the schema configuration folder. Only used if the use_schema_cache setting is
+# enabled in the pipeline configuration file.
+SCHEMA_CACHE_FILE = "schema_cache.json"
+
+# version of the schema cache file format, to be bumped whenever
+# the schema cache can't be read by older versions of core anymore.
+SCHEMA_CACHE_FORMAT_VERSION = 2
+
+# file in the local cache folder of the pipeline configuration holding the node-local
+# copy of the path cache. Only used if the use_path_cache_replica setting is
+# enabled in the pipeline configuration file.
+PATH_CACHE_REPLICA_FILE = "path_cache_replica.db"
+
+# default number of seconds after which the local copy of the path cache is
+# synchronized with Shotgun again. Can be overridden with the path_cache_replica_max_age
+# setting in the pipeline configuration file.
+DEFAULT_PATH_CACHE_REPLICA_MAX_AGE = 300
+
+# default maximum number of path cache rows loaded in memory when the
+# use_path_cache_snapshot setting is enabled. Can be overridden with the
+# path_cache_snapshot_max_rows setting in the pipeline configuration file.
+DEFAULT_PATH_CACHE_SNAPSHOT_MAX_ROWS = 3000000
+
+# default number of FilesystemLocation entities created in Shotgun with each
+# batch request when folders are registered. Can be overridden with the
+# path_cache_upload_batch_size setting in the pipeline configuration file.
+DEFAULT_PATH_CACHE_UPLOAD_BATCH_SIZE = 500
+
+# default number of seconds for which the contexts built from Shotgun entities
+# are cached by each toolkit instance. Can be overridden with the context_cache_ttl
+# setting in the pipeline configuration file, 0 disabling the cache.
+DEFAULT_CONTEXT_CACHE_TTL = 60
+
+# default number of seconds above which path cache queries are logged. Can be
+# overridden with the path_cache_slow_query_threshold setting in the pipeline
+# configuration file.
+DEFAULT_PATH_CACHE_SLOW_QUERY_THRESHOLD = 1.0
+
+# default number of threads used by the default process_folder_creation hook
+# to create folders on disk. Can be overridden with the folder_creation_max_workers
+# setting in the pipeline configuration file, 1 disabling concurrent creation.
+DEFAULT_FOLDER_CREATION_MAX_WORKERS = 8
+
+# number of FilesystemLocation entities downloaded from Shotgun and
+# inserted in the path cache at a time during a full path cache sync.
+PATH_CACHE_SYNC_PAGE_SIZE = 5000
+
 # Shotgun: The entity that represents Pipeline Configurations in Shotgun
 PIPELINE_CONFIGURATION_ENTITY = "PipelineConfiguration"
 
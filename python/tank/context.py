@@ -16,6 +16,8 @@ Management of the current context, e.g. the current shotgun entity/step/task.
 import os
 import pickle
 import copy
+import threading
+import time
 
 from tank_vendor import yaml
 from . import authentication
@@ -984,6 +986,83 @@ class Context(object):
         return found_fields
 
 
+################################################################################################
+# cache of the contexts built from entities
+
+class ContextCache(object):
+    """
+    Cache of the data of the contexts built from Shotgun entities by a toolkit
+    instance, so that building a context for the same entity again doesn't
+    require any path cache or Shotgun lookup.
+
+    Entries expire after the number of seconds given by the ``context_cache_ttl``
+    setting of the pipeline configuration, 0 disabling the cache, and are
+    discarded when new folders are added to the path cache.
+    """
+
+    def __init__(self, tk):
+        """
+        Constructor.
+
+        :param tk: Toolkit API instance
+        """
+        self._tk = tk
+        self._lock = threading.Lock()
+        # (time added, context data) keyed by (entity type, entity id)
+        self._entries = {}
+        self._last_purge = time.time()
+
+    def get(self, entity_type, entity_id):
+        """
+        Returns the cached data of the context of an entity.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :returns: Dictionary with the :class:`Context` constructor arguments,
+                  except tk, or None if the entity isn't cached.
+        """
+        ttl = self._tk.pipeline_configuration.get_context_cache_ttl()
+        with self._lock:
+            entry = self._entries.get((entity_type, entity_id))
+            if entry is None:
+                return None
+            (time_added, data) = entry
+            if time.time() - time_added >= ttl:
+                del self._entries[(entity_type, entity_id)]
+                return None
+        # contexts hand out their entity dictionaries, so don't share them
+        return copy.deepcopy(data)
+
+    def set(self, entity_type, entity_id, data):
+        """
+        Caches the data of the context of an entity.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :param data: Dictionary with the :class:`Context` constructor arguments, except tk.
+        """
+        ttl = self._tk.pipeline_configuration.get_context_cache_ttl()
+        if not ttl:
+            return
+
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge >= ttl:
+                # drop the expired entries, so the cache doesn't grow forever
+                for (key, (time_added, _)) in self._entries.items():
+                    if now - time_added >= ttl:
+                        del self._entries[key]
+                self._last_purge = now
+            self._entries[(entity_type, entity_id)] = (now, copy.deepcopy(data))
+
+    def invalidate(self):
+        """
+        Discards all the cached contexts.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
 ################################################################################################
 # factory methods for constructing new Context objects, primarily called from the Tank object
 
@@ -1006,16 +1085,169 @@ def from_entity(tk, entity_type, entity_id):
     :param entity_id:    The shotgun entity id to produce a context for
     :returns: :class:`Context`
     """
-    
-    if entity_type is None:
-        raise TankError("Cannot create a context from an entity type 'None'!")
-    
-    if entity_id is None:
-        raise TankError("Cannot create a context from an entity id set to 'None'!")
-    
-    # prep our return data structure
+    return from_entities(tk, [(entity_type, entity_id)])[(entity_type, entity_id)]
+
+def from_entities(tk, entities):
+    """
+    Constructs context objects for several shotgun entities.
+
+    This is equivalent to calling :meth:`from_entity` for each entity, but
+    the path cache is only opened once, and the entities which need to be
+    looked up in Shotgun are fetched with one query per entity type.
+
+    The data of the contexts is kept in the context cache of the toolkit
+    instance, so that building a context for the same entity again doesn't
+    require any lookup, see :class:`ContextCache`.
+
+    :param tk:       Sgtk API handle
+    :param entities: List of (entity type, entity id) tuples
+    :returns: Dictionary of :class:`Context` keyed by (entity type, entity id)
+    """
+    keys = []
+    for (entity_type, entity_id) in entities:
+        if entity_type is None:
+            raise TankError("Cannot create a context from an entity type 'None'!")
+
+        if entity_id is None:
+            raise TankError("Cannot create a context from an entity id set to 'None'!")
+
+        if (entity_type, entity_id) not in keys:
+            keys.append((entity_type, entity_id))
+
+    context_data = {}
+    missing_keys = []
+    for (entity_type, entity_id) in keys:
+        data = tk.context_cache.get(entity_type, entity_id)
+        if data is None:
+            missing_keys.append((entity_type, entity_id))
+        else:
+            context_data[(entity_type, entity_id)] = data
+
+    if missing_keys:
+        missing_data = _context_data_from_entities(tk, missing_keys)
+        for (entity_type, entity_id) in missing_keys:
+            data = missing_data[(entity_type, entity_id)]
+            tk.context_cache.set(entity_type, entity_id, data)
+            context_data[(entity_type, entity_id)] = data
+
+    contexts = {}
+    for key in keys:
+        contexts[key] = Context(tk, **context_data[key])
+    return contexts
+
+def _context_data_from_entities(tk, entities):
+    """
+    Determines the data of the contexts of several shotgun entities.
+
+    Tasks and published files are looked up in Shotgun. Other entities are
+    looked up in the path cache first, and the ones missing from it are looked
+    up in Shotgun. Shotgun lookups are made with one query per entity type.
+
+    :param tk:       Sgtk API handle
+    :param entities: List of unique (entity type, entity id) tuples
+    :returns: Dictionary keyed by (entity type, entity id) of dictionaries
+              with the :class:`Context` constructor arguments, except tk.
+    """
+    context_data = {}
+
+    # published files get the context of the task or entity they are linked with,
+    # so find these first to look them up together with the other entities.
+    published_file_ids = {}
+    other_keys = []
+    for (entity_type, entity_id) in entities:
+        if entity_type in ["PublishedFile", "TankPublishedFile"]:
+            published_file_ids.setdefault(entity_type, []).append(entity_id)
+        else:
+            other_keys.append((entity_type, entity_id))
+
+    linked_keys = {}
+    for (entity_type, entity_ids) in published_file_ids.items():
+        sg_entities = tk.shotgun.find(entity_type,
+                                      [["id", "in", entity_ids]],
+                                      ["project", "entity", "task"])
+        sg_entities = dict((sg_entity["id"], sg_entity) for sg_entity in sg_entities)
+
+        for entity_id in entity_ids:
+            sg_entity = sg_entities.get(entity_id)
+
+            if sg_entity is None:
+                raise TankError("Entity %s with id %s not found in Shotgun!" % (entity_type, entity_id))
+
+            if sg_entity.get("task"):
+                # base the context on the task for the published file
+                linked_key = ("Task", sg_entity["task"]["id"])
+
+            elif sg_entity.get("entity"):
+                # base the context on the entity that the published is linked with
+                linked_key = (sg_entity["entity"]["type"], sg_entity["entity"]["id"])
+
+            elif sg_entity.get("project"):
+                # base the context on the project that the published is linked with
+                linked_key = ("Project", sg_entity["project"]["id"])
+
+            else:
+                context_data[(entity_type, entity_id)] = _new_context_data({})
+                continue
+
+            linked_keys[(entity_type, entity_id)] = linked_key
+            if linked_key not in other_keys:
+                other_keys.append(linked_key)
+
+    task_ids = [entity_id for (entity_type, entity_id) in other_keys if entity_type == "Task"]
+    if task_ids:
+        # For tasks get data from shotgun query
+        for (task_id, task_context) in _tasks_from_sg(tk, task_ids).items():
+            context_data[("Task", task_id)] = _new_context_data(task_context)
+
+    entity_keys = [key for key in other_keys if key[0] != "Task"]
+    # published files linked with other published files are looked up on their own
+    linked_published_file_keys = [
+        key for key in entity_keys if key[0] in ["PublishedFile", "TankPublishedFile"]
+    ]
+    if linked_published_file_keys:
+        context_data.update(_context_data_from_entities(tk, linked_published_file_keys))
+        entity_keys = [key for key in entity_keys if key not in linked_published_file_keys]
+
+    if entity_keys:
+        # Get data from path cache
+        uncached_entity_ids = {}
+        path_cache = PathCache(tk)
+        try:
+            for (entity_type, entity_id) in entity_keys:
+                entity_context = _context_data_from_cache(tk, path_cache, entity_type, entity_id)
+
+                # make sure this was actually found in the cache
+                # fall back on a shotgun lookup if not found
+                if entity_context["project"] is None:
+                    uncached_entity_ids.setdefault(entity_type, []).append(entity_id)
+                else:
+                    context_data[(entity_type, entity_id)] = _new_context_data(entity_context)
+        finally:
+            path_cache.close()
+
+        for (entity_type, entity_ids) in uncached_entity_ids.items():
+            for (entity_id, entity_context) in _entities_from_sg(tk, entity_type, entity_ids).items():
+                context_data[(entity_type, entity_id)] = _new_context_data(entity_context)
+
+        for (entity_type, entity_id) in entity_keys:
+            if entity_type == "Project":
+                # no need to set entity to point at project in this case
+                # that only produces double entries.
+                context_data[(entity_type, entity_id)]["entity"] = None
+
+    for (key, linked_key) in linked_keys.items():
+        context_data[key] = copy.deepcopy(context_data[linked_key])
+
+    return context_data
+
+def _new_context_data(entity_context):
+    """
+    Builds the data of a context from the entities found for it.
+
+    :param entity_context: Dictionary with some of the :class:`Context` constructor arguments
+    :returns: Dictionary with all the :class:`Context` constructor arguments, except tk.
+    """
     context = {
-        "tk": tk,
         "project": None,
         "entity": None,
         "step": None,
@@ -1023,50 +1255,8 @@ def from_entity(tk, entity_type, entity_id):
         "task": None,
         "additional_entities": []
     }
-
-    if entity_type == "Task":
-        # For tasks get data from shotgun query
-        task_context = _task_from_sg(tk, entity_id)
-        context.update(task_context)
-
-    elif entity_type in ["PublishedFile", "TankPublishedFile"]:
-        
-        sg_entity = tk.shotgun.find_one(entity_type, 
-                                        [["id", "is", entity_id]], 
-                                        ["project", "entity", "task"])
-        
-        if sg_entity is None:
-            raise TankError("Entity %s with id %s not found in Shotgun!" % (entity_type, entity_id))
-        
-        if sg_entity.get("task"):
-            # base the context on the task for the published file
-            return from_entity(tk, "Task", sg_entity["task"]["id"])
-        
-        elif sg_entity.get("entity"):
-            # base the context on the entity that the published is linked with
-            return from_entity(tk, sg_entity["entity"]["type"], sg_entity["entity"]["id"])
-        
-        elif sg_entity.get("project"):
-            # base the context on the project that the published is linked with
-            return from_entity(tk, "Project", sg_entity["project"]["id"])
-    
-    else:
-        # Get data from path cache
-        entity_context = _context_data_from_cache(tk, entity_type, entity_id)
-                    
-        # make sure this was actually found in the cache
-        # fall back on a shotgun lookup if not found
-        if entity_context["project"] is None:
-            entity_context = _entity_from_sg(tk, entity_type, entity_id)
-        
-        context.update(entity_context)
-
-        if entity_type == "Project":
-            # no need to set entity to point at project in this case
-            # that only produces double entries.
-            context["entity"] = None
-
-    return Context(**context)
+    context.update(entity_context)
+    return context
 
 def from_entity_dictionary(tk, entity_dictionary):
     """
@@ -1215,6 +1405,111 @@ def from_path(tk, path, previous_context=None):
     :returns: :class:`Context`
     """
 
+    # ask hook for extra entity types we should recognize and insert into the additional_entities list.
+    additional_types = tk.execute_core_hook("context_additional_entities").get("entity_types_in_path", [])
+
+    # first gather entities, for the path and all its parents in one go
+    path_cache = PathCache(tk)
+    try:
+        ancestors = path_cache.get_ancestor_entities(path)
+    finally:
+        path_cache.close()
+
+    context = _context_data_from_ancestors(tk, ancestors, additional_types)
+
+    # see if we can populate it based on the previous context
+    if previous_context and \
+       context.get("entity") == previous_context.entity and \
+       context.get("additional_entities") == previous_context.additional_entities:
+
+        # cool, everything is matching down to the step/task level.
+        # if context is missing a step and a task, we try to auto populate it.
+        # (note: weird edge that a context can have a task but no step)
+        if context.get("task") is None and context.get("step") is None:
+            context["step"] = previous_context.step
+
+        # now try to assign previous task but only if the step matches!
+        if context.get("task") is None and context.get("step") == previous_context.step:
+            context["task"] = previous_context.task
+
+    # ensure that we don't have a Project as the entity. Projects should only 
+    # appear on the projects level, despite being entities.
+    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
+        # remove double entry!
+        context["entity"] = None
+
+    return Context(**context)
+
+
+def from_paths(tk, paths):
+    """
+    Factory method that constructs context objects for several paths on disk.
+
+    This is equivalent to calling :meth:`from_path` for each path, but
+    the folders shared by several paths are only looked up once, and all
+    the folders are looked up in the path cache with a few queries.
+    Paths resolving to the same entities share the same :class:`Context` object.
+
+    :param paths: list of file system paths
+    :returns: dictionary of :class:`Context` keyed by path
+    """
+    # ask hook for extra entity types we should recognize and insert into the additional_entities list.
+    additional_types = tk.execute_core_hook("context_additional_entities").get("entity_types_in_path", [])
+
+    # gather entities for all the paths and their parents in one go
+    path_cache = PathCache(tk)
+    try:
+        ancestors = path_cache.get_ancestor_entities_many(paths)
+    finally:
+        path_cache.close()
+
+    contexts = {}
+    # contexts keyed by the entities they are made of
+    shared_contexts = {}
+    for path in paths:
+        if path in contexts:
+            continue
+
+        context = _context_data_from_ancestors(tk, ancestors.get(path, []), additional_types)
+
+        # ensure that we don't have a Project as the entity. Projects should only 
+        # appear on the projects level, despite being entities.
+        if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
+            # remove double entry!
+            context["entity"] = None
+
+        key = tuple(
+            _entity_key(context[field]) for field in ("project", "entity", "step", "user", "task")
+        ) + tuple(_entity_key(x) for x in context["additional_entities"])
+        if key not in shared_contexts:
+            shared_contexts[key] = Context(**context)
+        contexts[path] = shared_contexts[key]
+
+    return contexts
+
+
+def _entity_key(entity):
+    """
+    Returns a hashable value identifying an entity dictionary.
+
+    :param entity: Shotgun entity dictionary or None
+    :returns: tuple of the entity type, id and name, or None
+    """
+    if entity is None:
+        return None
+    return (entity["type"], entity["id"], entity.get("name"))
+
+
+def _context_data_from_ancestors(tk, ancestors, additional_types):
+    """
+    Builds the data of a context from the entities of a path and its parents.
+
+    :param tk: Toolkit API instance
+    :param ancestors: list of (path, entity, secondary entities) tuples, as returned by
+                      :meth:`~tank.path_cache.PathCache.get_ancestor_entities`
+    :param additional_types: entity types which should be added to the additional entities
+    :returns: dictionary of the :class:`Context` constructor arguments
+    """
     # prep our return data structure
     context = {
         "tk": tk,
@@ -1226,44 +1521,16 @@ def from_path(tk, path, previous_context=None):
         "additional_entities": []
     }
 
-    # ask hook for extra entity types we should recognize and insert into the additional_entities list.
-    additional_types = tk.execute_core_hook("context_additional_entities").get("entity_types_in_path", [])
-
-    # get a cache handle
-    path_cache = PathCache(tk)
-
-    # gather all roots as lower case
-    project_roots = [x.lower() for x in tk.pipeline_configuration.get_data_roots().values()]
-
-    # first gather entities
     entities = []
     secondary_entities = []
-    curr_path = path
-    while True:
-        curr_entity = path_cache.get_entity(curr_path)
+    for (curr_path, curr_entity, curr_secondary_entities) in ancestors:
         if curr_entity:
             # Don't worry about entity types we've already got in the context. In the future
             # we should look for entity ids that conflict in order to flag a degenerate schema.
             entities.append(curr_entity)
-        
-        # add secondary entities
-        secondary_entities.extend( path_cache.get_secondary_entities(curr_path) )
 
-        if curr_path.lower() in project_roots:
-            #TODO this could fail with windows path variations
-            # we have reached a root!
-            break
-
-        # and continue with parent path
-        parent_path = os.path.abspath(os.path.join(curr_path, ".."))
-
-        if curr_path == parent_path:
-            # We're at the disk root, probably a degenerate path
-            break
-        else:
-            curr_path = parent_path
-
-    path_cache.close()
+        # add secondary entities
+        secondary_entities.extend(curr_secondary_entities)
 
     # now populate the context
     # go from the root down, so that in the case there are a path with
@@ -1313,28 +1580,7 @@ def from_path(tk, path, previous_context=None):
             if context["entity"] is None:
                 context["entity"] = curr_entity
 
-    # see if we can populate it based on the previous context
-    if previous_context and \
-       context.get("entity") == previous_context.entity and \
-       context.get("additional_entities") == previous_context.additional_entities:
-
-        # cool, everything is matching down to the step/task level.
-        # if context is missing a step and a task, we try to auto populate it.
-        # (note: weird edge that a context can have a task but no step)
-        if context.get("task") is None and context.get("step") is None:
-            context["step"] = previous_context.step
-
-        # now try to assign previous task but only if the step matches!
-        if context.get("task") is None and context.get("step") == previous_context.step:
-            context["task"] = previous_context.task
-
-    # ensure that we don't have a Project as the entity. Projects should only 
-    # appear on the projects level, despite being entities.
-    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
-        # remove double entry!
-        context["entity"] = None
-
-    return Context(**context)
+    return context
 
 
 ################################################################################################
@@ -1469,8 +1715,20 @@ def _task_from_sg(tk, task_id, additional_fields = None):
     :param additional_fields:    List of additional fields to query for additional entities.  If this is
                                 'None' then the function will execute the hook to determine them. 
     """
-    context = {}
+    return _tasks_from_sg(tk, [task_id], additional_fields)[task_id]
 
+
+def _tasks_from_sg(tk, task_ids, additional_fields = None):
+    """
+    Constructs contexts from several shotgun tasks, with a single Shotgun query.
+    See :meth:`_task_from_sg`.
+
+    :param tk:                   An Sgtk API instance
+    :param task_ids:             The shotgun task ids to produce contexts for.
+    :param additional_fields:    List of additional fields to query for additional entities.  If this is
+                                'None' then the function will execute the hook to determine them. 
+    :returns:                    Dictionary of contexts keyed by task id
+    """
     # Look up task's step and entity. This information should be static in practice, so we could
     # likely cache it in the future.
 
@@ -1482,55 +1740,67 @@ def _task_from_sg(tk, task_id, additional_fields = None):
         # ask hook for extra Task entity fields we should query and insert into the additional_entities list.
         additional_fields = tk.execute_core_hook("context_additional_entities").get("entity_fields_on_task", [])
 
-    task = tk.shotgun.find_one("Task", [["id","is",task_id]], standard_fields + additional_fields)
-    if not task:
-        raise TankError("Unable to locate Task with id %s in Shotgun" % task_id)
+    tasks = tk.shotgun.find("Task", [["id", "in", task_ids]], standard_fields + additional_fields)
+    tasks = dict((task["id"], task) for task in tasks)
 
-    # add task so it can be processed with other shotgun entities
-    task["task"] = {"type": "Task", "id": task_id, "name": task["content"]}
+    contexts = {}
+    for task_id in task_ids:
+        task = tasks.get(task_id)
+        if not task:
+            raise TankError("Unable to locate Task with id %s in Shotgun" % task_id)
 
-    for key in context_keys + additional_fields:
-        data = task.get(key)
-        if data is None:
-            # gracefully skip stuff we don't have
-            # for example tasks may not have a step
-            continue
+        context = {}
 
-        # be explicit about what we pull in - make no assumptions about what is
-        # being returned from sg (the unit tests mocker doesn't return the same as the API)
-        value = {
-            "name": data.get("name"),
-            "id": data.get("id"),
-            "type": data.get("type")
-        }
+        # add task so it can be processed with other shotgun entities
+        task["task"] = {"type": "Task", "id": task_id, "name": task["content"]}
 
-        if key in context_keys:
-            context[key] = value
-        elif key in additional_fields:
-            additional_entities = context.get("additional_entities", [])
-            additional_entities.append(value)
-            context["additional_entities"] = additional_entities
+        for key in context_keys + additional_fields:
+            data = task.get(key)
+            if data is None:
+                # gracefully skip stuff we don't have
+                # for example tasks may not have a step
+                continue
 
-    return context
+            # be explicit about what we pull in - make no assumptions about what is
+            # being returned from sg (the unit tests mocker doesn't return the same as the API)
+            value = {
+                "name": data.get("name"),
+                "id": data.get("id"),
+                "type": data.get("type")
+            }
+
+            if key in context_keys:
+                context[key] = value
+            elif key in additional_fields:
+                additional_entities = context.get("additional_entities", [])
+                additional_entities.append(value)
+                context["additional_entities"] = additional_entities
+
+        contexts[task_id] = context
 
+    return contexts
 
-def _entity_from_sg(tk, entity_type, entity_id):
+
+def _entities_from_sg(tk, entity_type, entity_ids):
     """
-    Determines the entity details for the specified entity type and id by querying Shotgun.
+    Determines the entity details for the specified entity type and ids by querying Shotgun.
                         
-    If entity_type is 'Project' then this will return a single dictionary for the project.  For all
+    If entity_type is 'Project' then this will return a single dictionary for each project.  For all
     other entity types, this will return dictionaries for both the entity and the project the entity 
     exists under.
                         
     :param tk:          The sgtk api instance
-    :param entity_type: The entity type to build a context for
-    :param entity_id:   The entity id to build a context for
-    :returns:           Dictionary containing either a project entity-dictionary or both
-                        project and entity entity-dictionaries depending on the input entity type.
+    :param entity_type: The entity type to build contexts for
+    :param entity_ids:  The entity ids to build contexts for
+    :returns:           Dictionary keyed by entity id of dictionaries containing either a project
+                        entity-dictionary or both project and entity entity-dictionaries depending
+                        on the input entity type.
                         e.g. 
                         {
-                            "project":{"type":"Project", "id":123, "name":"My Project"},
-                            "entity":{"type":"Shot", "id":456, "name":"My Shot"}
+                            456: {
+                                "project":{"type":"Project", "id":123, "name":"My Project"},
+                                "entity":{"type":"Shot", "id":456, "name":"My Shot"}
+                            }
                         }
                             
     """
@@ -1538,28 +1808,35 @@ def _entity_from_sg(tk, entity_type, entity_id):
     name_field = _get_entity_type_sg_name_field(entity_type)
     
     # get the entity data from Shotgun
-    data = tk.shotgun.find_one(entity_type, [["id", "is", entity_id]], ["project", name_field])
+    sg_data = tk.shotgun.find(entity_type, [["id", "in", entity_ids]], ["project", name_field])
+    sg_data = dict((data["id"], data) for data in sg_data)
 
-    if not data:
-        raise TankError("Unable to locate %s with id %s in Shotgun" % (entity_type, entity_id))
+    contexts = {}
+    for entity_id in entity_ids:
+        data = sg_data.get(entity_id)
+        if not data:
+            raise TankError("Unable to locate %s with id %s in Shotgun" % (entity_type, entity_id))
 
-    # create context
-    context = {}
-    
-    if entity_type == "Project":
-        context["project"] = {"type":"Project", "id": entity_id, "name": data.get(name_field) }
-    
-    else:
-        context["entity"] = {"type": entity_type, "id": entity_id, "name": data.get(name_field) }
-        context["project"] = data.get("project")     
+        # create context
+        context = {}
 
-    return context
+        if entity_type == "Project":
+            context["project"] = {"type":"Project", "id": entity_id, "name": data.get(name_field) }
+
+        else:
+            context["entity"] = {"type": entity_type, "id": entity_id, "name": data.get(name_field) }
+            context["project"] = data.get("project")
 
+        contexts[entity_id] = context
 
-def _context_data_from_cache(tk, entity_type, entity_id):
+    return contexts
+
+
+def _context_data_from_cache(tk, path_cache, entity_type, entity_id):
     """Adds data to context based on path cache.
 
     :param tk: a Sgtk API instance
+    :param path_cache: a :class:`~tank.path_cache.PathCache` instance
     :param entity_type: a Shotgun entity type
     :param entity_id: a Shotgun entity id
     """
@@ -1575,7 +1852,6 @@ def _context_data_from_cache(tk, entity_type, entity_id):
 
     # Use the path cache to look up all paths linked to the entity and use that to extract
     # extra entities we should include in the context
-    path_cache = PathCache(tk)
 
     # Grab all project roots
     project_roots = tk.pipeline_configuration.get_data_roots().values()
@@ -1622,7 +1898,6 @@ def _context_data_from_cache(tk, entity_type, entity_id):
                     field_name = types_fields[cur_type]
                     context[field_name] = curr_entity
 
-    path_cache.close()
     return context
 
 
@@ -13,5 +13,8 @@ This module contains functionality relating to folder creation.
 
 """
 
-from .operations import process_filesystem_structure, synchronize_folders
-from .configuration import read_ignore_files
+from .operations import process_filesystem_structure, plan_filesystem_structure, synchronize_folders
+from .configuration import read_ignore_files, FolderConfigurationCache
+from .io_executor import FolderIOExecutor, FolderIOError
+from .plan import FolderCreationPlan
+from .service import FolderCreationService, FolderCreationRequest
@@ -15,11 +15,13 @@ Handles the creation of a configuration object structure based on the folder con
 
 import os
 import fnmatch
+import threading
 
 from .folder_types import Static, ListField, Entity, Project, UserWorkspace, ShotgunStep, ShotgunTask
 
 from ..errors import TankError, TankUnreadableFileError
 from . import constants
+from . import schema_cache
 from ..util import yaml_cache
 
 
@@ -49,9 +51,14 @@ class FolderConfiguration(object):
     Class that loads the schema from disk and constructs folder objects.
     """
 
-    def __init__(self, tk, schema_config_path):
+    def __init__(self, tk, schema_config_path, schema_data=None):
         """
         Constructor
+        
+        :param tk: Tk API instance
+        :param schema_config_path: Path to the schema configuration folder.
+        :param schema_data: Data from a previous scan of the same schema, as returned 
+                            by get_schema_data(). If None, the schema is scanned on disk.
         """
         self._tk = tk
         
@@ -61,8 +68,12 @@ class FolderConfiguration(object):
         # maintain a list of all Step nodes for special introspection
         self._step_fields = []
         
+        if schema_data is None:
+            schema_data = self._scan_schema(schema_config_path)
+        self._schema_data = schema_data
+        
         # read skip files config
-        self._ignore_files = read_ignore_files(schema_config_path)
+        self._ignore_files = schema_data["ignore_files"]
         
         # load schema
         self._load_schema(schema_config_path)
@@ -83,6 +94,45 @@ class FolderConfiguration(object):
         """
         return self._step_fields
 
+    def get_schema_data(self):
+        """
+        Returns everything read from disk to build the configuration, so that 
+        identical configurations can be built without accessing the schema 
+        files again. The data can be stored as JSON.
+        
+        :returns: Dictionary with keys ignore_files, folders and dependencies.
+        """
+        return self._schema_data
+
+    def is_up_to_date(self):
+        """
+        Checks if the schema files the configuration was built from have
+        changed since. This only needs to stat the files, not read them.
+        
+        :returns: True if the configuration is up to date.
+        """
+        return schema_cache.is_up_to_date(self._schema_data["dependencies"])
+
+    def prefetch_shotgun_data(self, entity_type, entity_ids, sg_data_cache):
+        """
+        Bulk loads the shotgun data needed to create folders for a list of entities.
+        
+        Walks up the tree from every node representing the entity type and retrieves
+        the data for each level with a single query, rather than with one query per
+        entity and level. The data is stored in the cache passed in rather than on
+        the folder objects, since these may be used by several folder creation 
+        requests at the same time.
+        
+        :param entity_type: Shotgun entity type
+        :param entity_ids: List of entity ids
+        :param sg_data_cache: Dictionary of shotgun data, keyed by folder object,
+                              see :meth:`FolderIOReceiver.get_shotgun_data_cache`.
+        """
+        for folder_obj in self.get_folder_objs_for_entity_type(entity_type):
+            folder_obj.prefetch_shotgun_data_upwards(self._tk.shotgun, 
+                                                     {entity_type: set(entity_ids)},
+                                                     sg_data_cache)
+
     ####################################################################################
     # utility methods
 
@@ -202,13 +252,78 @@ class FolderConfiguration(object):
     ##########################################################################################
     # internal stuff
 
+    def _scan_schema(self, schema_config_path):
+        """
+        Reads everything needed to build the configuration from disk.
+        
+        :param schema_config_path: Path to the schema configuration folder.
+        :returns: Dictionary with the following keys:
+                  - ignore_files: list of file name patterns to ignore
+                  - folders: dictionary keyed by folder path, with the metadata, 
+                    sub_directories, files and symlinks of each folder.
+                  - dependencies: dictionary keyed by path of the signatures of all the 
+                    files and folders read, see :func:`schema_cache.get_signature`.
+        """
+        dependencies = {}
+        folders = {}
+        
+        ignore_files_path = os.path.join(schema_config_path, "ignore_files")
+        dependencies[ignore_files_path] = schema_cache.get_signature(ignore_files_path)
+        self._ignore_files = read_ignore_files(schema_config_path)
+        
+        # the root only holds the project folders
+        dependencies[schema_config_path] = schema_cache.get_signature(schema_config_path)
+        project_folders = self._get_sub_directories(schema_config_path)
+        folders[schema_config_path] = {
+            "metadata": None,
+            "sub_directories": project_folders,
+            "files": [],
+            "symlinks": []
+        }
+        
+        for project_folder in project_folders:
+            self._scan_folder_r(project_folder, folders, dependencies)
+        
+        return {"ignore_files": self._ignore_files, "folders": folders, "dependencies": dependencies}
+
+    def _scan_folder_r(self, path, folders, dependencies):
+        """
+        Recursively reads a schema folder from disk.
+        
+        :param path: Path to the folder.
+        :param folders: Dictionary of folder data to add to, see _scan_schema().
+        :param dependencies: Dictionary of signatures to add to, see _scan_schema().
+        """
+        # adding or removing files changes the signature of the folder itself,
+        # so we only need to track the files actually read.
+        yml_path = "%s.yml" % path
+        dependencies[path] = schema_cache.get_signature(path)
+        dependencies[yml_path] = schema_cache.get_signature(yml_path)
+        
+        sub_directories = self._get_sub_directories(path)
+        symlinks = self._get_symlinks_in_folder(path)
+        for (name, _, _) in symlinks:
+            symlink_path = os.path.join(path, "%s.symlink.yml" % name)
+            dependencies[symlink_path] = schema_cache.get_signature(symlink_path)
+        
+        folders[path] = {
+            "metadata": self._read_metadata(path),
+            "sub_directories": sub_directories,
+            "files": self._get_files_in_folder(path),
+            # stored as lists, like they are read back from the schema cache
+            "symlinks": [list(x) for x in symlinks]
+        }
+        
+        for sub_directory in sub_directories:
+            self._scan_folder_r(sub_directory, folders, dependencies)
 
     def _load_schema(self, schema_config_path):
         """
-        Scan the config and build objects structure
+        Build objects structure from the scanned config
         """
+        folders = self._schema_data["folders"]
 
-        project_folders = self._get_sub_directories(schema_config_path)
+        project_folders = folders[schema_config_path]["sub_directories"]
 
         # make some space in our obj/entity type mapping
         self._entity_nodes_by_type["Project"] = []
@@ -216,7 +331,7 @@ class FolderConfiguration(object):
         for project_folder in project_folders:
 
             # read metadata to determine root path
-            metadata = self._read_metadata(project_folder)
+            metadata = folders[project_folder]["metadata"]
 
             if metadata is None:
                 if os.path.basename(project_folder) == "project":
@@ -245,9 +360,11 @@ class FolderConfiguration(object):
 
         Factory method for Folder objects.
         """
-        for full_path in self._get_sub_directories(parent_path):
+        folders = self._schema_data["folders"]
+        
+        for full_path in folders[parent_path]["sub_directories"]:
             # check for metadata (non-static folder)
-            metadata = self._read_metadata(full_path)
+            metadata = folders[full_path]["metadata"]
             if metadata:
                 node_type = metadata.get("type", "undefined")
 
@@ -289,22 +406,69 @@ class FolderConfiguration(object):
             self._process_config_r(cur_node, full_path)
 
         # process symlinks
-        for (path, target, metadata) in self._get_symlinks_in_folder(parent_path):
+        for (path, target, metadata) in folders[parent_path]["symlinks"]:
             parent_node.add_symlink(path, target, metadata)
         
 
         # now process all files and add them to the parent_node token
-        for f in self._get_files_in_folder(parent_path):
+        for f in folders[parent_path]["files"]:
             parent_node.add_file(f)
 
 
+class FolderConfigurationCache(object):
+    """
+    Keeps the folder configuration of a toolkit instance in memory, so that the 
+    folder object tree is only built once rather than each time folders are created.
+    
+    The configuration is rebuilt whenever any of the schema files change. If the
+    ``use_schema_cache`` setting of the pipeline configuration is enabled, the 
+    scanned schema is also stored on disk and shared with other processes.
+    
+    The configuration returned is shared between all the callers, including
+    concurrent folder creation requests from several threads. The folder objects
+    are therefore never modified once built: data which is specific to a request,
+    such as shotgun query results or the current user, is kept by the request's
+    :class:`FolderIOReceiver` or computed for each call.
+    """
 
+    def __init__(self, tk):
+        """
+        :param tk: Tk API instance
+        """
+        self._tk = tk
+        self._lock = threading.Lock()
+        self._config = None
 
+    def get(self):
+        """
+        Returns the folder configuration, building it if needed.
+        
+        :returns: :class:`FolderConfiguration` instance.
+        """
+        with self._lock:
+            if self._config and self._config.is_up_to_date():
+                return self._config
+            
+            pipeline_config = self._tk.pipeline_configuration
+            schema_config_path = pipeline_config.get_schema_config_location()
+            use_cache = pipeline_config.get_schema_cache_enabled()
+            
+            schema_data = None
+            if use_cache:
+                cache_file = pipeline_config.get_schema_cache_location()
+                schema_data = schema_cache.load_schema_data(cache_file, schema_config_path)
+            
+            config = FolderConfiguration(self._tk, schema_config_path, schema_data)
+            
+            if use_cache and schema_data is None:
+                schema_cache.save_schema_data(cache_file, config.get_schema_data(), schema_config_path)
+                
+            self._config = config
+            return config
 
-
-
-
-
-
-
-
+    def invalidate(self):
+        """
+        Discards the configuration held in memory.
+        """
+        with self._lock:
+            self._config = None
@@ -14,3 +14,10 @@ PRIMARY_STORAGE_NAME = "primary"
 
 # hooks that are used during folder creation.
 PROCESS_FOLDER_CREATION_HOOK_NAME = "process_folder_creation"
+
+# number of seconds the folder creation service waits for more requests
+# after receiving one, so that bursts are processed in a single batch.
+SERVICE_BATCH_INTERVAL = 1.0
+
+# maximum number of entities processed by the folder creation service in one batch.
+SERVICE_MAX_BATCH_SIZE = 500
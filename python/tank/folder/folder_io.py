@@ -42,8 +42,93 @@ class FolderIOReceiver(object):
         self._secondary_cache_entries = list() 
         self._entity_type = entity_type
         self._entity_ids = entity_ids
+        # shotgun data loaded while computing the requests, keyed by folder object
+        self._shotgun_data_cache = {}
+        # (entity id, index of its first item) for each entity computed so far
+        self._entity_item_offsets = []
         
     
+    ####################################################################################
+    # methods to inspect the folder creation requests
+    
+    def get_items(self):
+        """
+        Returns the I/O requests received so far. For a description of the
+        items, see the ``process_folder_creation`` core hook.
+        
+        :returns: List of item dictionaries
+        """
+        return self._items
+    
+    def get_path_cache_entries(self):
+        """
+        Returns the path cache mappings for the I/O requests received so far.
+        The primary mappings of the entity folders are listed first, in the 
+        order of the items.
+        
+        :returns: List of mapping dictionaries, see :meth:`PathCache.add_mappings`
+        """
+        db_entries = []
+        
+        for i in self._items:
+            if i.get("action") == "entity_folder":
+                db_entries.append( {"entity": i["entity"], 
+                                    "path": i["path"], 
+                                    "primary": True, 
+                                    "metadata": i["metadata"]} )
+                
+        for i in self._secondary_cache_entries:
+            db_entries.append( {"entity": i["entity"], 
+                                "path": i["path"], 
+                                "primary": False, 
+                                "metadata": i["metadata"]} )
+        
+        return db_entries
+    
+    def get_folders_by_entity(self):
+        """
+        Returns the folders computed for each entity folder creation was 
+        requested for, see :meth:`start_entity`. Remote folders created by 
+        the path cache synchronization aren't included.
+        
+        :returns: Dictionary of lists of paths, keyed by entity id
+        """
+        folders_by_entity = {}
+        offsets = self._entity_item_offsets + [(None, len(self._items))]
+        for ((entity_id, start), (_, end)) in zip(offsets[:-1], offsets[1:]):
+            folders_by_entity.setdefault(entity_id, []).extend(_get_folders(self._items[start:end]))
+        return folders_by_entity
+    
+    ####################################################################################
+    # methods called while computing the requests
+    
+    def get_shotgun_data_cache(self):
+        """
+        Returns a dictionary where folder objects can keep the shotgun data they
+        load while computing the requests, keyed by folder object. The folder 
+        configuration is shared by all the folder creation requests of a tk 
+        instance, so the folder objects should not hold such data themselves.
+        
+        :returns: Dictionary
+        """
+        return self._shotgun_data_cache
+    
+    def clear_shotgun_data_cache(self):
+        """
+        Releases the shotgun data loaded while computing the requests.
+        """
+        self._shotgun_data_cache = {}
+    
+    def start_entity(self, entity_id):
+        """
+        Called before computing the requests for one of the entities folder
+        creation was requested for, so that the requests received until the
+        next call can be attributed to it.
+        
+        :param entity_id: Id of the entity, as passed to the folder creation.
+        """
+        self._entity_item_offsets.append((entity_id, len(self._items)))
+    
     ####################################################################################
     # methods to call to actually execute the folder creation logic
         
@@ -131,22 +216,7 @@ class FolderIOReceiver(object):
                                           "entity": i["entity"] })
         
             # put together a list of entries we should pass to the database
-            db_entries = []
-            
-            for i in self._items:
-                if i.get("action") == "entity_folder":
-                    db_entries.append( {"entity": i["entity"], 
-                                        "path": i["path"], 
-                                        "primary": True, 
-                                        "metadata": i["metadata"]} )
-                    
-            for i in self._secondary_cache_entries:
-                db_entries.append( {"entity": i["entity"], 
-                                    "path": i["path"], 
-                                    "primary": False, 
-                                    "metadata": i["metadata"]} )
-            
-            
+            db_entries = self.get_path_cache_entries()
             
             # now that we are synced up with all remote sites,
             # validate the data before we push it into the databse. 
@@ -184,13 +254,7 @@ class FolderIOReceiver(object):
                 path_cache.add_mappings(db_entries, self._entity_type, self._entity_ids)
     
             # return all folders that were computed 
-            folders = []
-            for i in folder_creation_items:
-                action = i.get("action")
-                if action in ["entity_folder", "create_file", "folder", "remote_entity_folder"]:
-                    folders.append( i["path"] )
-                elif action == "copy":
-                    folders.append( i["target_path"] )        
+            folders = _get_folders(folder_creation_items)
 
         finally:
             path_cache.close()
@@ -265,6 +329,21 @@ class FolderIOReceiver(object):
         self._items.append({"path": path, 
                             "target": target, 
                             "metadata": config_metadata, 
-                            "action": "symlink"})              
+                            "action": "symlink"})
 
 
+def _get_folders(items):
+    """
+    Returns the paths of the files and folders created by folder creation items.
+    
+    :param items: List of item dictionaries, see the ``process_folder_creation`` core hook.
+    :returns: List of paths
+    """
+    folders = []
+    for i in items:
+        action = i.get("action")
+        if action in ["entity_folder", "create_file", "folder", "remote_entity_folder"]:
+            folders.append( i["path"] )
+        elif action == "copy":
+            folders.append( i["target_path"] )
+    return folders
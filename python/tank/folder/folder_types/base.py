@@ -66,7 +66,7 @@ class Folder(object):
         """
         return self._parent
         
-    def extract_shotgun_data_upwards(self, sg, shotgun_data):
+    def extract_shotgun_data_upwards(self, sg, shotgun_data, sg_data_cache=None):
         """
         Extract data from shotgun for a specific pathway upwards through the
         schema. 
@@ -77,11 +77,28 @@ class Folder(object):
         :param sg: Shotgun API instance
         :param shotgun_data: Shotgun data dictionary. For more information,
                              see the Entity implementation.
+        :param sg_data_cache: Optional dictionary of data loaded by
+                              prefetch_shotgun_data_upwards().
         """
         if self._parent is None:
             return shotgun_data
         else:
-            return self._parent.extract_shotgun_data_upwards(sg, shotgun_data)
+            return self._parent.extract_shotgun_data_upwards(sg, shotgun_data, sg_data_cache)
+            
+    def prefetch_shotgun_data_upwards(self, sg, entity_ids, sg_data_cache):
+        """
+        Bulk load shotgun data for a set of entities for a specific pathway
+        upwards through the schema, ahead of calls to extract_shotgun_data_upwards().
+        
+        This is subclassed by deriving classes which process Shotgun data.
+        For more information, see the Entity implementation.
+
+        :param sg: Shotgun API instance
+        :param entity_ids: Dictionary of sets of entity ids, keyed by sg data key.
+        :param sg_data_cache: Dictionary where the data is stored, keyed by folder object.
+        """
+        if self._parent:
+            self._parent.prefetch_shotgun_data_upwards(sg, entity_ids, sg_data_cache)
             
     def get_parents(self):
         """
@@ -16,9 +16,12 @@ from ...util import shotgun_entity
 
 from .errors import EntityLinkTypeMismatch
 from .base import Folder
-from .expression_tokens import FilterExpressionToken
+from .expression_tokens import FilterExpressionToken, CurrentStepExpressionToken, CurrentTaskExpressionToken
 from .util import translate_filter_tokens, resolve_shotgun_filters
 
+# marks entities which are not part of the prefetched data, since None
+# is used for entities which are excluded by the filters.
+_NOT_PREFETCHED = object()
 
 class Entity(Folder):
     """
@@ -130,13 +133,26 @@ class Entity(Folder):
         """
         return []
 
+    def _get_filters(self):
+        """
+        Returns the filters deciding which entities to create folders for.
+        
+        Called each time folders are created. Can be subclassed to add conditions
+        which depend on the current folder creation request. Note that folder
+        objects are shared between requests, so the filters of the object
+        should never be modified.
+        
+        :returns: Filter dictionary with interleaved tokens, see the constructor.
+        """
+        return self._filters
+
     def _create_folders_impl(self, io_receiver, parent_path, sg_data):
         """
         Creates folders.
         """
         items_created = []
         
-        for entity in self.__get_entities(sg_data):
+        for entity in self.__get_entities(sg_data, self._get_filters(), io_receiver.get_shotgun_data_cache()):
 
             # generate the field name            
             folder_name = self._entity_expression.generate_name(entity)
@@ -184,25 +200,52 @@ class Entity(Folder):
             entity_link = entity[lf]
             io_receiver.register_secondary_entity(path, entity_link, self._config_metadata)
 
-    def __get_entities(self, sg_data):
+    def __get_entities(self, sg_data, filters, sg_data_cache):
         """
         Returns shotgun data for folder creation
+        
+        :param sg_data: Shotgun data dictionary, see extract_shotgun_data_upwards()
+        :param filters: Filters as returned by _get_filters()
+        :param sg_data_cache: Shotgun data loaded for the current folder creation,
+                              keyed by folder object, see prefetch_shotgun_data_upwards()
         """
         # first check the constraints: if tokens contains a type/id pair our our type,
         # we should only process this single entity. If not, then use the query filter
         
         # first, resolve the filter queries for the current ids passed in via tokens
-        resolved_filters = resolve_shotgun_filters(self._filters, sg_data)
+        resolved_filters = resolve_shotgun_filters(filters, sg_data)
         
         # see if the sg_data dictionary has a "seed" entity type matching our entity type
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
         if my_sg_data_key in sg_data:
             # we have a constraint!
             entity_id = sg_data[my_sg_data_key]["id"]
+            
+            # if the entity was loaded as part of a prefetch, try to use that 
+            # data rather than going back to shotgun
+            rec = sg_data_cache.get(self, {}).get(entity_id, _NOT_PREFETCHED)
+            if rec is None:
+                # the entity is excluded by our filters
+                return []
+            elif rec is not _NOT_PREFETCHED and self.__matches_resolved_filters(rec, filters, resolved_filters):
+                return [copy.deepcopy(rec)]
+            
             # add the id constraint to the filters
             resolved_filters["conditions"].append({ "path": "id", "relation": "is", "values": [entity_id] })
             # get data - can be None depending on external filters
 
+        # convert to a list - sets wont work with the SG API
+        fields_list = list(self.__get_entity_fields())
+        
+        # now find all the items (e.g. shots) matching this query
+        entities = self._tk.shotgun.find(self._entity_type, resolved_filters, fields_list)
+        
+        return entities
+
+    def __get_entity_fields(self):
+        """
+        Returns the set of shotgun fields needed in order to create folders for this node.
+        """
         # figure out which fields to retrieve
         fields = self._entity_expression.get_shotgun_fields()
         
@@ -215,16 +258,172 @@ class Entity(Folder):
         # add any special stuff in
         for custom_field in self._get_additional_sg_fields():
             fields.add(custom_field)
+            
+        return fields
 
-        # convert to a list - sets wont work with the SG API
-        fields_list = list(fields)
+    def __matches_resolved_filters(self, rec, filters, resolved_filters):
+        """
+        Checks that a prefetched record satisfies the $token conditions in our filters.
         
-        # now find all the items (e.g. shots) matching this query
-        entities = self._tk.shotgun.find(self._entity_type, resolved_filters, fields_list)
+        Plain conditions are part of the prefetch query and are not checked again.
+        Returns False for any condition that cannot be evaluated locally, in which 
+        case the caller should fall back on a shotgun query.
         
-        return entities
+        :param rec: Prefetched shotgun record
+        :param filters: Filters with tokens, as returned by _get_filters()
+        :param resolved_filters: Filters as returned by resolve_shotgun_filters()
+        :returns: True if the record is known to match the filters
+        """
+        for (condition, resolved) in zip(filters["conditions"], resolved_filters["conditions"]):
+            
+            if condition["path"].startswith("$FROM$"):
+                return False
+            
+            vals = condition["values"]
+            if vals and isinstance(vals[0], (CurrentStepExpressionToken, CurrentTaskExpressionToken)):
+                return False
+            
+            if vals and isinstance(vals[0], FilterExpressionToken):
+                if condition["relation"] != "is" or condition["path"] not in rec:
+                    return False
+                
+                value = rec[condition["path"]]
+                resolved_value = resolved["values"][0]
+                
+                if isinstance(value, dict) and isinstance(resolved_value, dict):
+                    # entity link - compare type and id only
+                    if (value.get("type"), value.get("id")) != (resolved_value.get("type"), resolved_value.get("id")):
+                        return False
+                elif value != resolved_value:
+                    return False
+                
+        return True
+
+    def __get_upwards_query(self):
+        """
+        Computes the query used to extract the shotgun data for this node when 
+        recursing upwards. See extract_shotgun_data_upwards() for details.
+        
+        :returns: tuple with (link_map, fields_to_retrieve, filters) where link_map
+                  is a dictionary of field names and the FilterExpressionToken 
+                  they resolve, fields_to_retrieve is a list of fields and filters
+                  is a list of conditions, excluding the id constraint.
+        """
+        link_map = {}
+        fields_to_retrieve = []
+        additional_filters = []
+        
+        # TODO: Support nested conditions
+        for condition in self._filters["conditions"]:
+            vals = condition["values"]
+            
+            # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
+            # the special $FROM$ step based culling filter that is commonly used. Because steps are 
+            # sort of free floating and not associated with an entity, removing them from the 
+            # resolve should be fine in most cases.
+            
+            # so - if at the shot level, we have defined the following filter:
+            # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
+            # the $sequence will be represented by a Token object and we need to get a value for 
+            # this token. We fetch the id for this token and then, as we recurse upwards, and process
+            # the parent folder level (the sequence), this id will be the "seed" when we populate that
+            # level. 
+            
+            if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
+                expr_token = vals[0]
+                # we should get this field (eg. 'sg_sequence')
+                fields_to_retrieve.append(condition["path"])
+                # add to our map for later processing map['sg_sequence'] = 'Sequence'
+                # note that for List fields, the key is EntityType.field
+                link_map[ condition["path"] ] = expr_token 
+            
+            elif not condition["path"].startswith('$FROM$'):
+                # this is a normal filter (we exclude the $FROM$ stuff since it is weird
+                # and specific to steps.) So for example 'name must begin with X' - we want 
+                # to include these in the query where we are looking for the object, to
+                # ensure that assets with names starting with X are not created for an 
+                # asset folder node which explicitly excludes these via its filters. 
+                additional_filters.append(condition)
+        
+        # add some extra fields apart from the stuff in the config
+        if self._entity_type == "Project":
+            fields_to_retrieve.append("name")
+        elif self._entity_type == "Task":
+            fields_to_retrieve.append("content")
+        elif self._entity_type == "HumanUser":
+            fields_to_retrieve.append("login")
+        else:
+            fields_to_retrieve.append("code")
+            
+        return (link_map, fields_to_retrieve, additional_filters)
+
+    def prefetch_shotgun_data_upwards(self, sg, entity_ids, sg_data_cache):
+        """
+        Loads the shotgun data needed by extract_shotgun_data_upwards() and by the
+        folder creation for a set of entities in bulk, using a single query per 
+        folder level rather than one query per entity and level.
+        
+        The entity_ids input is a dictionary keyed by sg data key, for example
+        { "Shot": set([1234, 1235]) }. Ids of linked parent entities are collected
+        from the returned records and passed up to the parent levels.
+        
+        Entities which cannot be prefetched are resolved with individual queries
+        later on, so this is purely an optimization. Folder objects are shared by
+        all the folder creation requests, so the records are stored in the cache
+        of the current request rather than on the folder object.
+
+        :param sg: Shotgun API instance
+        :param entity_ids: Dictionary of sets of entity ids, keyed by sg data key.
+        :param sg_data_cache: Dictionary of shotgun data, keyed by folder object. The
+                              records of this node are stored in a dictionary keyed
+                              by entity id. A value of None indicates an existing
+                              entity which is excluded by our filters.
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+        ids = entity_ids.get(my_sg_data_key)
+        
+        if ids:
+            
+            (link_map, fields_to_retrieve, additional_filters) = self.__get_upwards_query()
+            
+            records = sg_data_cache.setdefault(self, {})
+            ids_to_fetch = [x for x in ids if x not in records]
+            if ids_to_fetch:
+                
+                fields = set(fields_to_retrieve)
+                fields.update( self.__get_entity_fields() )
+                
+                conditions = additional_filters + [{"path": "id", "relation": "in", "values": ids_to_fetch}]
+                filter_dict = { "logical_operator": "and", "conditions": conditions }
+                
+                for rec in sg.find(self._entity_type, filter_dict, list(fields)):
+                    records[rec["id"]] = rec
+                    
+                # entities which exist but were filtered out are flagged as such so
+                # that we don't have to query them again. Ids which do not exist at all
+                # are left out and will be reported when the data is extracted.
+                missing_ids = [x for x in ids_to_fetch if x not in records]
+                if missing_ids:
+                    for rec in sg.find(self._entity_type, [["id", "in", missing_ids]]):
+                        records[rec["id"]] = None
+            
+            # now collect the ids of the parent entities that our records link to
+            entity_ids = copy.copy(entity_ids)
+            for entity_id in ids:
+                rec = records.get(entity_id)
+                if rec is None:
+                    continue
+                for (field, link_obj) in link_map.items():
+                    value = rec.get(field)
+                    if isinstance(value, dict) and value.get("type") == link_obj.get_entity_type():
+                        parent_ids = entity_ids.setdefault(link_obj.get_sg_data_key(), set())
+                        parent_ids.add(value["id"])
+        
+        # now keep recursing upwards
+        if self._parent:
+            self._parent.prefetch_shotgun_data_upwards(sg, entity_ids, sg_data_cache)
 
-    def extract_shotgun_data_upwards(self, sg, shotgun_data):
+    def extract_shotgun_data_upwards(self, sg, shotgun_data, sg_data_cache=None):
         """
         Extracts the shotgun data necessary to create this object and all its parents.
         The shotgun_data input needs to contain a dictionary with a "seed". For example:
@@ -254,6 +453,9 @@ class Entity(Folder):
         NOTE! Because we are using a dictionary where we key by type, it would not be possible
         to have a pathway where the same entity type exists multiple times. For example an 
         asset / sub asset relationship.
+        
+        Records loaded by prefetch_shotgun_data_upwards() are used rather than querying
+        shotgun when an sg_data_cache dictionary is passed.
         """
         
         tokens = copy.deepcopy(shotgun_data)
@@ -269,53 +471,8 @@ class Entity(Folder):
         # by its children as we move upwards - for example a step.
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
         if my_sg_data_key in tokens:
-
-            
-            link_map = {}
-            fields_to_retrieve = []
-            additional_filters = []
             
-            # TODO: Support nested conditions
-            for condition in self._filters["conditions"]:
-                vals = condition["values"]
-                
-                # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
-                # the special $FROM$ step based culling filter that is commonly used. Because steps are 
-                # sort of free floating and not associated with an entity, removing them from the 
-                # resolve should be fine in most cases.
-                
-                # so - if at the shot level, we have defined the following filter:
-                # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
-                # the $sequence will be represented by a Token object and we need to get a value for 
-                # this token. We fetch the id for this token and then, as we recurse upwards, and process
-                # the parent folder level (the sequence), this id will be the "seed" when we populate that
-                # level. 
-                
-                if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
-                    expr_token = vals[0]
-                    # we should get this field (eg. 'sg_sequence')
-                    fields_to_retrieve.append(condition["path"])
-                    # add to our map for later processing map['sg_sequence'] = 'Sequence'
-                    # note that for List fields, the key is EntityType.field
-                    link_map[ condition["path"] ] = expr_token 
-                
-                elif not condition["path"].startswith('$FROM$'):
-                    # this is a normal filter (we exclude the $FROM$ stuff since it is weird
-                    # and specific to steps.) So for example 'name must begin with X' - we want 
-                    # to include these in the query where we are looking for the object, to
-                    # ensure that assets with names starting with X are not created for an 
-                    # asset folder node which explicitly excludes these via its filters. 
-                    additional_filters.append(condition)
-            
-            # add some extra fields apart from the stuff in the config
-            if self._entity_type == "Project":
-                fields_to_retrieve.append("name")
-            elif self._entity_type == "Task":
-                fields_to_retrieve.append("content")
-            elif self._entity_type == "HumanUser":
-                fields_to_retrieve.append("login")
-            else:
-                fields_to_retrieve.append("code")
+            (link_map, fields_to_retrieve, additional_filters) = self.__get_upwards_query()
             
             # TODO: AND the id query with this folder's query to make sure this path is
             # valid for the current entity. Throw error if not so driver code knows to 
@@ -323,30 +480,43 @@ class Entity(Folder):
             # appears in several locations in the filesystem and that the filters are responsible
             # for determining which location to use for a particular asset.
             my_id = tokens[ my_sg_data_key ]["id"]
-            additional_filters.append( {"path": "id", "relation": "is", "values": [my_id]})
             
-            # append additional filter cruft
-            filter_dict = { "logical_operator": "and", "conditions": additional_filters }
+            rec = (sg_data_cache or {}).get(self, {}).get(my_id, _NOT_PREFETCHED)
+            if rec is None:
+                # data has already been loaded in bulk - the entity exists
+                # but has been filtered out
+                raise EntityLinkTypeMismatch()
             
-            # carry out find
-            rec = sg.find_one(self._entity_type, filter_dict, fields_to_retrieve)
+            elif rec is not _NOT_PREFETCHED:
+                # data has already been loaded in bulk.
+                # link values end up in the tokens - don't share them with the prefetch
+                rec = copy.deepcopy(rec)
             
-            # there are now two reasons why find_one did not return:
-            # - the specified entity id does not exist or has been deleted
-            # - there are filters which has filtered it out. For example imagine that you 
-            #   have one folder structure for all assets starting with A and a second structure
-            #   for the rest. This would be a filter condition (code does not start with A, and
-            #   code starts with A respectively). In these cases, the object does exist but has been
-            #   explicitly filtered out - which is not an error!
+            else:
+                additional_filters.append( {"path": "id", "relation": "is", "values": [my_id]})
+                
+                # append additional filter cruft
+                filter_dict = { "logical_operator": "and", "conditions": additional_filters }
+                
+                # carry out find
+                rec = sg.find_one(self._entity_type, filter_dict, fields_to_retrieve)
             
-            if not rec:
+                # there are now two reasons why find_one did not return:
+                # - the specified entity id does not exist or has been deleted
+                # - there are filters which has filtered it out. For example imagine that you 
+                #   have one folder structure for all assets starting with A and a second structure
+                #   for the rest. This would be a filter condition (code does not start with A, and
+                #   code starts with A respectively). In these cases, the object does exist but has been
+                #   explicitly filtered out - which is not an error!
                 
-                # check if it is a missing id or just a filtered out thing
-                if sg.find_one(self._entity_type, [["id", "is", my_id]]) is None:                
-                    raise TankError("Could not find Shotgun %s with id %s as required by "
-                                    "the folder creation setup." % (self._entity_type, my_id))
-                else:
-                    raise EntityLinkTypeMismatch()
+                if not rec:
+                    
+                    # check if it is a missing id or just a filtered out thing
+                    if sg.find_one(self._entity_type, [["id", "is", my_id]]) is None:                
+                        raise TankError("Could not find Shotgun %s with id %s as required by "
+                                        "the folder creation setup." % (self._entity_type, my_id))
+                    else:
+                        raise EntityLinkTypeMismatch()
             
             # and append the 'name field' which is always needed.
             name = None # used for error reporting
@@ -399,6 +569,6 @@ class Entity(Folder):
             return tokens
         
         else:
-            return self._parent.extract_shotgun_data_upwards(sg, tokens)
+            return self._parent.extract_shotgun_data_upwards(sg, tokens, sg_data_cache)
 
 
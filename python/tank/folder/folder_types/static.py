@@ -102,8 +102,6 @@ class Static(Folder):
         self._constraints_filter = constraints_filter 
         self._create_with_parent = create_with_parent 
         self._tk = tk
-        
-        self._cached_sg_data = {}
     
     def is_dynamic(self):
         """
@@ -162,17 +160,19 @@ class Static(Folder):
             
             # depending on the filter, it is possible that the same static query will 
             # be generated more than once - so cache the results so that we can minimize
-            # shotgun queries.
+            # shotgun queries. The results are only cached for the current folder creation 
+            # request since this folder object is shared by all requests.
             hash_key = hash(str(resolved_filters))
+            cached_sg_data = io_receiver.get_shotgun_data_cache().setdefault(self, {})
             
-            if hash_key in self._cached_sg_data:
-                data = self._cached_sg_data[hash_key]
+            if hash_key in cached_sg_data:
+                data = cached_sg_data[hash_key]
             
             else:
                 # call out to shotgun
                 data = self._tk.shotgun.find_one(self._constrain_node.get_entity_type(), resolved_filters)
                 # and cache it
-                self._cached_sg_data[hash_key] = data
+                cached_sg_data[hash_key] = data
                         
             if data is None:
                 # no match! this means that our constraints filter did not match the current object
@@ -8,9 +8,12 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import copy
+
 from ...util import login
 from ...errors import TankError
 
+from .base import Folder
 from .entity import Entity
 from .util import translate_filter_tokens
 
@@ -50,10 +53,6 @@ class UserWorkspace(Entity):
         constructor
         """
         
-        # lazy setup: we defer the lookup of the current user until the folder node
-        # is actually being utilized, see extract_shotgun_data_upwards() below
-        self._user_initialized = False
-        
         # user work spaces are always deferred so make sure to add a setting to the metadata
         # note: This should ideally be a parameter passed to the base class.
         metadata["defer_creation"] = True
@@ -68,41 +67,42 @@ class UserWorkspace(Entity):
                         entity_filter, 
                         create_with_parent=True)
         
-    def create_folders(self, io_receiver, path, sg_data, is_primary, explicit_child_list, engine):
+    def prefetch_shotgun_data_upwards(self, sg, entity_ids, sg_data_cache):
         """
-        Inherited and wrapps base class implementation
+        Inherited. User filters are resolved lazily in _get_filters() so 
+        user nodes are never prefetched. Parent nodes are processed as normal.
         """
-        
-        # first we need to check to see if folders should be created. if the
-        # folder creation is deferred, for example, until a specific engine
-        # is run. 
-        if not self._should_item_be_processed(engine, is_primary):
-            return
-        
-        # wraps around the Entity.create_folders() method and adds
-        # the current user to the filer query in case this has not already been done.
-        # having this set up before the first call to create_folders rather than in the
+        return Folder.prefetch_shotgun_data_upwards(self, sg, entity_ids, sg_data_cache)
+
+    def _get_filters(self):
+        """
+        Inherited. Adds the current user to the filter query.
+        """
+        # resolving the current user when folders are created rather than in the 
         # constructor is partly for performance, but primarily so that a valid current user 
         # isn't required unless you actually create a user sandbox folder. For example,
         # if you have a dedicated machine that creates higher level folders, this machine
         # shouldn't need to have a user id set up - only the artists that actually create 
-        # the user folders should need to.
+        # the user folders should need to. This is only called once the deferred
+        # creation checks have passed.
         
-        if not self._user_initialized:
+        # note that the folder configuration is shared by subsequent and concurrent folder
+        # creation requests, so the current user is resolved each time and the filters are
+        # copied rather than modified. The user is cached by the login module so this 
+        # doesn't require a shotgun query.
 
-            # this query confirms that there is a matching HumanUser in shotgun for the local login
-            user = login.get_current_user(self._tk) 
-    
-            if not user:
-                msg = ("Folder Creation Error: Could not find a HumanUser in shotgun with login " 
-                       "matching the local login. Check that the local login corresponds to a "
-                       "user in shotgun.")
-                raise TankError(msg)
-    
-            user_filter = { "path": "id", "relation": "is", "values": [ user["id"] ] }
-            self._filters["conditions"].append( user_filter )            
-            self._user_initialized = True
-        
-        return Entity.create_folders(self, io_receiver, path, sg_data, is_primary, explicit_child_list, engine)
+        # this query confirms that there is a matching HumanUser in shotgun for the local login
+        user = login.get_current_user(self._tk) 
+
+        if not user:
+            msg = ("Folder Creation Error: Could not find a HumanUser in shotgun with login " 
+                   "matching the local login. Check that the local login corresponds to a "
+                   "user in shotgun.")
+            raise TankError(msg)
+
+        user_filter = { "path": "id", "relation": "is", "values": [ user["id"] ] }
+        filters = copy.copy(self._filters)
+        filters["conditions"] = self._filters["conditions"] + [ user_filter ]
+        return filters
         
 
@@ -0,0 +1,248 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Execution of the I/O requests computed by the folder creation.
+"""
+
+import os
+import sys
+import errno
+import shutil
+from multiprocessing.pool import ThreadPool
+
+from ..errors import TankError
+from ..util.filesystem import with_cleared_umask
+from .. import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+class FolderIOError(TankError):
+    """
+    Raised when some of the items passed to a :class:`FolderIOExecutor`
+    could not be processed.
+
+    The ``failures`` attribute holds a list of ``(item, exception)`` tuples,
+    one for each item which failed, in the order the items were passed in.
+    """
+
+    def __init__(self, failures):
+        """
+        :param failures: List of ``(item, exception)`` tuples.
+        """
+        lines = ["%d folder creation item(s) failed:" % len(failures)]
+        for (item, error) in failures:
+            lines.append("%s: %s" % (_get_item_path(item), error))
+        TankError.__init__(self, "\n".join(lines))
+        self.failures = failures
+
+
+class FolderIOExecutor(object):
+    """
+    Carries out the I/O requests passed to the ``process_folder_creation`` core hook.
+
+    Items are grouped into levels by the depth of their path on disk, so that
+    parent folders are always processed before their children. All the items of
+    a level are processed concurrently by a pool of threads, which helps a lot
+    with high latency file systems. Children of folders created by the executor
+    can't possibly exist yet, so they are created without checking for their
+    existence first.
+
+    Failures don't stop the execution. Items which couldn't be processed are
+    collected and reported at the end with a :class:`FolderIOError`, and items
+    below a folder which failed are skipped.
+
+    For a description of the items, see the ``process_folder_creation`` hook.
+    """
+
+    def __init__(self, max_workers=1, preview_mode=False):
+        """
+        :param max_workers: Maximum number of threads used to access the disk.
+        :param preview_mode: If True, no changes are made on disk and the paths
+                             which would be created are reported.
+        """
+        self._max_workers = max(1, max_workers or 1)
+        self._preview_mode = preview_mode
+        # folders created (or which would be created in preview mode) by this executor
+        self._created_folders = set()
+        # folders which could not be created
+        self._failed_folders = set()
+
+    @with_cleared_umask
+    def execute(self, items):
+        """
+        Processes a list of folder creation items.
+
+        :param items: List of item dictionaries.
+        :returns: List of the paths created, in the order of the items.
+        :raises: :class:`FolderIOError` if some items could not be processed.
+        """
+        # group the items by depth, keeping track of their position. The same
+        # path is typically requested several times when creating folders for
+        # multiple entities, only the first request is processed.
+        levels = {}
+        seen_paths = set()
+        for (index, item) in enumerate(items):
+            path = _get_item_path(item)
+            if path is None or path in seen_paths or item.get("action") == "remote_entity_folder":
+                # folders created by other users have already been created
+                # on the shared storage, nothing to do. See the hook for details.
+                continue
+            seen_paths.add(path)
+            depth = len(os.path.normpath(path).split(os.path.sep))
+            levels.setdefault(depth, []).append((index, item))
+
+        results = [None] * len(items)
+        failures = []
+
+        pool = None
+        try:
+            for depth in sorted(levels):
+                level = levels[depth]
+                if self._max_workers == 1 or len(level) < 2:
+                    level_results = [self._process_item(x) for x in level]
+                else:
+                    if pool is None:
+                        pool = ThreadPool(self._max_workers)
+                    level_results = pool.map(self._process_item, level)
+
+                for ((index, item), (created_path, error)) in zip(level, level_results):
+                    results[index] = created_path
+                    if error:
+                        failures.append((index, item, error))
+                        if item.get("action") in ["entity_folder", "folder"]:
+                            self._failed_folders.add(os.path.normpath(item["path"]))
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        if failures:
+            failures.sort(key=lambda x: x[0])
+            raise FolderIOError([(item, error) for (_, item, error) in failures])
+
+        return [path for path in results if path]
+
+    def _process_item(self, indexed_item):
+        """
+        Processes a single item. Called from the worker threads.
+
+        :param indexed_item: Tuple with the position of the item and the item.
+        :returns: Tuple with the path created, or None, and the exception
+                  raised while processing the item, or None.
+        """
+        (_, item) = indexed_item
+        path = _get_item_path(item)
+        parent_path = os.path.dirname(os.path.normpath(path))
+
+        if parent_path in self._failed_folders:
+            return (None, TankError("Parent folder %s could not be created." % parent_path))
+
+        # paths below folders we created can't exist yet
+        parent_created = parent_path in self._created_folders
+
+        try:
+            created_path = self._execute_item(item, parent_created)
+        except Exception, e:
+            log.debug("Could not process folder creation item %s: %s" % (path, e))
+            return (None, e)
+
+        return (created_path, None)
+
+    def _execute_item(self, item, parent_created):
+        """
+        Carries out the I/O for an item.
+
+        :param item: Item dictionary.
+        :param parent_created: True if the folder holding the item was created
+                               by this executor.
+        :returns: The path created, or None if nothing was created.
+        """
+        action = item.get("action")
+
+        if action in ["entity_folder", "folder"]:
+            path = item.get("path")
+            if not parent_created and os.path.exists(path):
+                return None
+            if not self._preview_mode:
+                if parent_created:
+                    os.mkdir(path, 0777)
+                else:
+                    try:
+                        # create the folder using open permissions
+                        os.makedirs(path, 0777)
+                    except OSError, e:
+                        # the folder may have been created by someone else in the meantime
+                        if e.errno != errno.EEXIST or not os.path.isdir(path):
+                            raise
+                        return None
+            # folders of this level are only looked up when processing the next one
+            self._created_folders.add(os.path.normpath(path))
+            return path
+
+        elif action == "symlink":
+            if sys.platform == "win32":
+                # no windows support
+                return None
+            path = item.get("path")
+            target = item.get("target")
+            # note use of lexists to check existance of symlink
+            # rather than what symlink is pointing at
+            if not parent_created and os.path.lexists(path):
+                return None
+            if not self._preview_mode:
+                os.symlink(target, path)
+            return path
+
+        elif action == "copy":
+            source_path = item.get("source_path")
+            target_path = item.get("target_path")
+            if not parent_created and os.path.exists(target_path):
+                return None
+            if not self._preview_mode:
+                # do a standard file copy
+                shutil.copy(source_path, target_path)
+                # set permissions to open
+                os.chmod(target_path, 0666)
+            return target_path
+
+        elif action == "create_file":
+            path = item.get("path")
+            parent_folder = os.path.dirname(path)
+            content = item.get("content")
+            if not parent_created and not os.path.exists(parent_folder) and not self._preview_mode:
+                os.makedirs(parent_folder, 0777)
+            if not parent_created and os.path.exists(path):
+                return None
+            if not self._preview_mode:
+                # create the file
+                fp = open(path, "wb")
+                try:
+                    fp.write(content)
+                finally:
+                    fp.close()
+                # and set permissions to open
+                os.chmod(path, 0666)
+            return path
+
+        return None
+
+
+def _get_item_path(item):
+    """
+    Returns the path on disk an item relates to.
+
+    :param item: Folder creation item dictionary.
+    :returns: Path, or None for unknown items.
+    """
+    if item.get("action") == "copy":
+        return item.get("target_path")
+    return item.get("path")
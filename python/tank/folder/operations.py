@@ -13,8 +13,8 @@ Main entry points for folder creation.
 
 """
 
-from .configuration import FolderConfiguration
 from .folder_io import FolderIOReceiver
+from .plan import FolderCreationPlan
 from .folder_types import EntityLinkTypeMismatch
 from ..errors import TankError
 
@@ -51,7 +51,9 @@ def create_single_folder_item(tk, config_obj, io_receiver, entity_type, entity_i
         # up the tree and resolve all the entity ids that are required 
         # in order to create folders.
         try:
-            shotgun_entity_data = folder_obj.extract_shotgun_data_upwards(tk.shotgun, entity_id_seed)
+            shotgun_entity_data = folder_obj.extract_shotgun_data_upwards(tk.shotgun, 
+                                                                          entity_id_seed,
+                                                                          io_receiver.get_shotgun_data_cache())
         except EntityLinkTypeMismatch:
             # the seed entity id object does not satisfy the link
             # path from folder_obj up to the root. 
@@ -119,6 +121,74 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
     :returns: list of items processed
     
     """
+    io_receiver = _compute_folder_items(tk, entity_type, entity_ids, preview, engine)
+    if io_receiver is None:
+        return
+
+    folders_created = io_receiver.execute_folder_creation()
+    
+    return folders_created
+
+
+def process_filesystem_structure_by_entity(tk, entity_type, entity_ids, preview, engine):
+    """
+    Creates filesystem structure like :meth:`process_filesystem_structure`, 
+    but reports the folders processed for each entity separately.
+    
+    :param tk: A tk instance
+    :param entity_type: A shotgun entity type to create folders for
+    :param entity_ids: list of entity ids to process or a single entity id
+    :param preview: enable dry run mode?
+    :param engine: Engine to create folders for / indicate second pass if not None.
+                   See :meth:`process_filesystem_structure`.
+    
+    :returns: Dictionary of lists of items processed, keyed by entity id. 
+              Entities no folders were computed for are left out.
+    """
+    io_receiver = _compute_folder_items(tk, entity_type, entity_ids, preview, engine)
+    if io_receiver is None:
+        return {}
+
+    io_receiver.execute_folder_creation()
+
+    return io_receiver.get_folders_by_entity()
+
+
+def plan_filesystem_structure(tk, entity_type, entity_ids, engine):
+    """
+    Computes the filesystem structure for a set of entities and compares it
+    with what is on disk and in the path cache, without making any changes.
+    
+    :param tk: A tk instance
+    :param entity_type: A shotgun entity type to create folders for
+    :param entity_ids: list of entity ids to process or a single entity id
+    :param engine: Engine to create folders for / indicate second pass if not None.
+                   See :meth:`process_filesystem_structure`.
+    
+    :returns: :class:`FolderCreationPlan` instance
+    """
+    io_receiver = _compute_folder_items(tk, entity_type, entity_ids, False, engine)
+    if io_receiver is None:
+        io_receiver = FolderIOReceiver(tk, False, entity_type, [])
+
+    return FolderCreationPlan(tk, io_receiver)
+
+
+def _compute_folder_items(tk, entity_type, entity_ids, preview, engine):
+    """
+    Computes the folder creation requests for a set of entities, without
+    carrying them out.
+    
+    :param tk: A tk instance
+    :param entity_type: A shotgun entity type to create folders for
+    :param entity_ids: list of entity ids to process or a single entity id
+    :param preview: enable dry run mode?
+    :param engine: Engine to create folders for / indicate second pass if not None.
+                   See :meth:`process_filesystem_structure`.
+    
+    :returns: :class:`FolderIOReceiver` holding all the requests, or None
+              if no entity ids were passed
+    """
 
     # check that engine is either a string or None
     if not (isinstance(engine, basestring) or engine is None):
@@ -135,11 +205,10 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
             raise ValueError("Parameter entity_ids was passed %s, accepted types are list, tuple and int.")
     
     if len(entity_ids) == 0:
-        return
+        return None
 
-    # create schema builder
-    schema_cfg_folder = tk.pipeline_configuration.get_schema_config_location()   
-    config = FolderConfiguration(tk, schema_cfg_folder)
+    # get the schema builder, only built again when the schema changes
+    config = tk.folder_configuration_cache.get()
 
     # all things to create
     items = []
@@ -184,27 +253,41 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
             if sg_entry["entity"]: # task may not be associated with an entity                
                 items.append( { "type":    sg_entry["entity"]["type"], 
                                 "id":      sg_entry["entity"]["id"], 
-                                "sg_task_data": sg_entry } )
+                                "sg_task_data": sg_entry,
+                                "requested_id": sg_entry["id"] } )
             
     else:
         # normal entities
         for i in entity_ids:
-            items.append( { "type": entity_type, "id": i, "sg_task_data": None } )
+            items.append( { "type": entity_type, "id": i, "sg_task_data": None, "requested_id": i } )
         
     
     # create an object to receive all IO requests
     io_receiver = FolderIOReceiver(tk, preview, entity_type, entity_ids)
 
-    # now loop over all individual objects and create folders
-    for i in items:        
-        create_single_folder_item(tk, 
-                                  config, 
-                                  io_receiver, 
-                                  i["type"], 
-                                  i["id"], 
-                                  i["sg_task_data"],
-                                  engine)
-
-    folders_created = io_receiver.execute_folder_creation()
+    # load all the shotgun data we need up front, with one query per level
+    # in the folder configuration rather than one query per item and level.
+    ids_by_type = {}
+    for i in items:
+        ids_by_type.setdefault(i["type"], []).append(i["id"])
     
-    return folders_created
+    try:
+        for (et, ids) in ids_by_type.items():
+            config.prefetch_shotgun_data(et, ids, io_receiver.get_shotgun_data_cache())
+    
+        # now loop over all individual objects and create folders
+        for i in items:        
+            io_receiver.start_entity(i["requested_id"])
+            create_single_folder_item(tk, 
+                                      config, 
+                                      io_receiver, 
+                                      i["type"], 
+                                      i["id"], 
+                                      i["sg_task_data"],
+                                      engine)
+    finally:
+        # the shotgun data isn't needed to execute the requests, which
+        # may happen much later for folder creation plans
+        io_receiver.clear_shotgun_data_cache()
+
+    return io_receiver
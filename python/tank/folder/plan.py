@@ -0,0 +1,145 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Dry runs of the folder creation, compared with the disk and the path cache.
+"""
+
+import os
+
+from ..path_cache import PathCache
+from .io_executor import _get_item_path
+from .. import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+class FolderCreationPlan(object):
+    """
+    Describes what creating folders for a set of entities would do, without
+    making any changes on disk or in the path cache.
+
+    The I/O requests computed by the folder creation are sorted into the
+    following lists of item dictionaries. For a description of the items,
+    see the ``process_folder_creation`` core hook. A path requested more
+    than once only appears the first time.
+
+    - ``to_create``: Items which don't exist on disk yet.
+    - ``existing``: Items which already exist on disk.
+    - ``remote``: Entity folders which are registered in the path cache,
+      typically by another user or site, but don't exist on this disk yet.
+    - ``conflicts``: ``(item, message)`` tuples for the entity folders which
+      conflict with the path cache. Folder creation is aborted when there
+      are conflicts.
+
+    A plan can be carried out with :meth:`execute`.
+    """
+
+    def __init__(self, tk, io_receiver):
+        """
+        :param tk: A tk API instance
+        :param io_receiver: :class:`FolderIOReceiver` holding the requests to plan,
+                            created outside of preview mode.
+        """
+        self._tk = tk
+        self._io_receiver = io_receiver
+
+        self.to_create = []
+        self.existing = []
+        self.remote = []
+        self.conflicts = []
+
+        # check all the entity folders against the path cache at once
+        db_entries = io_receiver.get_path_cache_entries()
+        path_cache = PathCache(tk)
+        try:
+            (conflicts, registered) = path_cache.check_mappings(db_entries)
+        finally:
+            path_cache.close()
+
+        conflicts_by_path = dict((db_entries[idx]["path"], msg) for (idx, msg) in conflicts.iteritems())
+        registered_paths = set(db_entries[idx]["path"] for idx in registered)
+
+        listings = _DirectoryListings()
+        seen_paths = set()
+        for item in io_receiver.get_items():
+            path = _get_item_path(item)
+            if path is None or path in seen_paths:
+                continue
+            seen_paths.add(path)
+
+            if path in conflicts_by_path:
+                self.conflicts.append((item, conflicts_by_path[path]))
+            elif listings.exists(path):
+                self.existing.append(item)
+            elif item.get("action") == "entity_folder" and path in registered_paths:
+                self.remote.append(item)
+            else:
+                self.to_create.append(item)
+
+        log.debug("Planned folder creation: %s, %d directory listings." % (self, listings.count))
+
+    def __repr__(self):
+        return "<FolderCreationPlan %d to create, %d existing, %d remote, %d conflicts>" % (
+            len(self.to_create), len(self.existing), len(self.remote), len(self.conflicts)
+        )
+
+    def execute(self):
+        """
+        Creates the planned folders and registers them in the path cache.
+
+        The path cache is synchronized and validated again first, since it
+        may have changed since the plan was computed.
+
+        :returns: List of paths which were calculated to be created, see
+                  :meth:`Sgtk.create_filesystem_structure`.
+        :raises: TankError if the path cache conflicts with the plan.
+        """
+        return self._io_receiver.execute_folder_creation()
+
+
+class _DirectoryListings(object):
+    """
+    Looks up paths on disk by listing their parent folder, so that a folder
+    with many children is only read once rather than once per child.
+    """
+
+    def __init__(self):
+        # sets of normalized names, keyed by folder. None for folders
+        # which can't be listed.
+        self._listings = {}
+        # number of folders listed, for diagnostics
+        self.count = 0
+
+    def exists(self, path):
+        """
+        Checks if a file, folder or symlink exists.
+
+        :param path: Path to look up.
+        :returns: True if the path exists.
+        """
+        path = os.path.normpath(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            # root of the file system
+            return os.path.exists(path)
+
+        if parent not in self._listings:
+            self.count += 1
+            try:
+                names = set(os.path.normcase(x) for x in os.listdir(parent))
+            except OSError:
+                # the parent doesn't exist or isn't a folder
+                names = None
+            self._listings[parent] = names
+
+        names = self._listings[parent]
+        return names is not None and os.path.normcase(os.path.basename(path)) in names
+
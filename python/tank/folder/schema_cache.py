@@ -0,0 +1,123 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Persistent cache of the folder schema scanned from a pipeline configuration.
+"""
+
+import os
+import sys
+
+from .. import constants
+from .. import pipelineconfig_utils
+from ..util import cache_file as cache_file_util
+from .. import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+def load_schema_data(cache_file, schema_config_path):
+    """
+    Loads the schema data stored in a cache file, provided it was scanned
+    from the same location, which hasn't changed since.
+
+    :param cache_file: Path to the cache file.
+    :param schema_config_path: Path to the schema configuration folder.
+    :returns: Schema data, as returned by :meth:`FolderConfiguration.get_schema_data`,
+              or None if the cache file doesn't exist or is out of date.
+    """
+    try:
+        cache_data = cache_file_util.read_cache_file(cache_file)
+    except Exception, e:
+        log.debug("Could not read schema cache %s: %s" % (cache_file, e))
+        return None
+
+    if cache_data is None:
+        return None
+
+    if cache_data.get("header") != _get_header(schema_config_path):
+        log.debug("Schema cache %s was created for another core or schema location." % cache_file)
+        return None
+
+    schema_data = cache_data["schema_data"]
+    if not is_up_to_date(schema_data["dependencies"]):
+        log.debug("Schema cache %s is out of date." % cache_file)
+        return None
+
+    log.debug("Read %d schema folders from schema cache %s" % (len(schema_data["folders"]), cache_file))
+    return schema_data
+
+
+def save_schema_data(cache_file, schema_data, schema_config_path):
+    """
+    Stores schema data in a cache file. This silently fails if the
+    cache file can't be written.
+
+    :param cache_file: Path to the cache file.
+    :param schema_data: Schema data, as returned by :meth:`FolderConfiguration.get_schema_data`.
+    :param schema_config_path: Path to the schema configuration folder.
+    """
+    try:
+        cache_file_util.write_cache_file(
+            cache_file,
+            {"header": _get_header(schema_config_path), "schema_data": schema_data}
+        )
+    except Exception, e:
+        log.debug("Could not write schema cache %s: %s" % (cache_file, e))
+        return
+
+    log.debug("Wrote %d schema folders to schema cache %s" % (len(schema_data["folders"]), cache_file))
+
+
+def get_signature(path):
+    """
+    Describes the state of a file or folder on disk, so that changes to it
+    can be detected without reading it.
+
+    :param path: Path to the file or folder.
+    :returns: List with the modification time, size and inode of the path,
+              or None if it doesn't exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size, st.st_ino]
+
+
+def is_up_to_date(dependencies):
+    """
+    Checks that none of the files and folders some schema data was
+    scanned from have changed.
+
+    :param dependencies: Dictionary of signatures, keyed by path, as
+                         returned by :func:`get_signature`.
+    :returns: True if nothing changed.
+    """
+    for (path, signature) in dependencies.iteritems():
+        if get_signature(path) != signature:
+            return False
+    return True
+
+
+def _get_header(schema_config_path):
+    """
+    Describes everything cached schema data depends on, apart from the
+    schema files themselves.
+
+    :param schema_config_path: Path to the schema configuration folder.
+    :returns: Dictionary which is identical for identical dependencies.
+    """
+    return {
+        "format_version": constants.SCHEMA_CACHE_FORMAT_VERSION,
+        "core_version": pipelineconfig_utils.get_currently_running_api_version(),
+        "platform": sys.platform,
+        "schema_config_path": schema_config_path,
+    }
@@ -0,0 +1,294 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Long running folder creation, for processes reacting to entities being created.
+"""
+
+import time
+import threading
+
+from . import constants
+from .operations import process_filesystem_structure_by_entity
+from .. import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+class FolderCreationRequest(object):
+    """
+    Request for the folders of an entity, submitted to a :class:`FolderCreationService`.
+    """
+
+    def __init__(self, entity_type, entity_id):
+        """
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        """
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+        # list of folders processed for the entity
+        self.folders = None
+        # exception raised while creating the folders of the entity
+        self.error = None
+        self._done_event = threading.Event()
+
+    def __repr__(self):
+        return "<FolderCreationRequest %s %s>" % (self.entity_type, self.entity_id)
+
+    @property
+    def done(self):
+        """
+        True once the request has been processed, successfully or not.
+        """
+        return self._done_event.isSet()
+
+    @property
+    def succeeded(self):
+        """
+        True if the folders of the entity have been created.
+        """
+        return self.done and self.error is None
+
+    def wait(self, timeout=None):
+        """
+        Waits for the request to be processed.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait forever.
+        :returns: True if the request has been processed.
+        """
+        self._done_event.wait(timeout)
+        return self.done
+
+    def _complete(self, folders, error):
+        """
+        Records the outcome of the request.
+
+        :param folders: List of folders processed, or None.
+        :param error: Exception raised, or None.
+        """
+        self.folders = folders
+        self.error = error
+        self._done_event.set()
+
+
+class FolderCreationService(object):
+    """
+    Creates folders for a stream of entities, typically from a daemon reacting
+    to entities being created in Shotgun.
+
+    The service holds on to a toolkit instance, so that the folder configuration,
+    the path cache connections and the Shotgun connection of the worker thread are
+    set up once rather than for each entity. Requests submitted in a burst are
+    coalesced, and all the entities of a type in a batch are processed with a single
+    call to the folder creation, which loads their Shotgun data in bulk. If a batch
+    fails, its entities are processed again one at a time, so that the failure is
+    only reported for the entities which caused it::
+
+        >>> service = FolderCreationService(tk, callback=report)
+        >>> service.start()
+        >>> for event in events:
+        ...     service.submit(event["entity"]["type"], event["entity"]["id"])
+        >>> service.stop()
+
+    Requests can also be processed without a worker thread, by calling
+    :meth:`process_pending`.
+    """
+
+    def __init__(self, tk, engine=None, callback=None,
+                 batch_interval=constants.SERVICE_BATCH_INTERVAL,
+                 max_batch_size=constants.SERVICE_MAX_BATCH_SIZE):
+        """
+        :param tk: A tk API instance
+        :param engine: Optional engine name, to execute the deferred folder
+                       creation pass. See :meth:`Sgtk.create_filesystem_structure`.
+        :param callback: Optional callable, called with each :class:`FolderCreationRequest`
+                         once processed. Called from the thread processing the request.
+        :param batch_interval: Number of seconds to wait for more requests after
+                               receiving one, before processing them.
+        :param max_batch_size: Maximum number of requests processed at once.
+        """
+        self._tk = tk
+        self._engine = engine
+        self._callback = callback
+        self._batch_interval = batch_interval
+        self._max_batch_size = max(1, max_batch_size)
+
+        self._condition = threading.Condition()
+        self._pending = []
+        self._halted = False
+        self._thread = None
+        # makes sure batches are processed one at a time
+        self._process_lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts processing submitted requests in a worker thread.
+        If the service is already running, this does nothing.
+        """
+        if self._thread:
+            return
+
+        # read the folder configuration now rather than with the first request
+        self._tk.folder_configuration_cache.get()
+
+        self._halted = False
+        self._thread = threading.Thread(target=self._run, name="FolderCreationService")
+        # don't prevent the process from exiting if the service isn't stopped
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the worker thread, once all the requests submitted
+        so far have been processed.
+        """
+        if not self._thread:
+            return
+
+        with self._condition:
+            self._halted = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, entity_type, entity_id):
+        """
+        Requests the creation of the folders of an entity.
+
+        :param entity_type: Shotgun entity type, e.g. ``Shot`` or ``Task``
+        :param entity_id: Shotgun entity id
+        :returns: :class:`FolderCreationRequest`, which is completed once processed.
+        """
+        request = FolderCreationRequest(entity_type, entity_id)
+        with self._condition:
+            self._pending.append(request)
+            self._condition.notify()
+        return request
+
+    def process_pending(self):
+        """
+        Processes all the requests submitted so far, in batches.
+
+        :returns: List of the :class:`FolderCreationRequest` processed.
+        """
+        with self._process_lock:
+            with self._condition:
+                requests = self._pending
+                self._pending = []
+
+            for i in range(0, len(requests), self._max_batch_size):
+                self._process_batch(requests[i:i + self._max_batch_size])
+
+        return requests
+
+    def _run(self):
+        """
+        Worker thread loop, waiting for bursts of requests to build up
+        before processing them.
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._halted:
+                    self._condition.wait()
+
+                if not self._pending:
+                    # halted, and nothing left to do
+                    return
+
+                deadline = time.time() + self._batch_interval
+                while not self._halted and len(self._pending) < self._max_batch_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+            try:
+                self.process_pending()
+            except Exception, e:
+                # keep the service running, requests report their own errors
+                log.exception("Folder creation service error: %s" % e)
+
+    def _process_batch(self, requests):
+        """
+        Creates folders for a batch of requests.
+
+        :param requests: List of :class:`FolderCreationRequest`
+        """
+        # group the requests by entity type and id, requests
+        # for the same entity are only processed once.
+        requests_by_type = {}
+        entity_types = []
+        for request in requests:
+            if request.entity_type not in requests_by_type:
+                requests_by_type[request.entity_type] = {}
+                entity_types.append(request.entity_type)
+            requests_by_type[request.entity_type].setdefault(request.entity_id, []).append(request)
+
+        for entity_type in entity_types:
+            requests_by_id = requests_by_type[entity_type]
+            entity_ids = sorted(requests_by_id)
+            try:
+                folders_by_id = self._create_folders(entity_type, entity_ids)
+            except Exception, e:
+                if len(entity_ids) == 1:
+                    self._complete(requests_by_id[entity_ids[0]], None, e)
+                    continue
+                # find out which entities are failing
+                log.debug("Folder creation failed for %d %s entities, processing "
+                          "them one at a time: %s" % (len(entity_ids), entity_type, e))
+                for entity_id in entity_ids:
+                    try:
+                        folders_by_id = self._create_folders(entity_type, [entity_id])
+                    except Exception, e:
+                        self._complete(requests_by_id[entity_id], None, e)
+                    else:
+                        self._complete(requests_by_id[entity_id], folders_by_id.get(entity_id, []), None)
+            else:
+                for entity_id in entity_ids:
+                    self._complete(requests_by_id[entity_id], folders_by_id.get(entity_id, []), None)
+
+    def _create_folders(self, entity_type, entity_ids):
+        """
+        Creates folders for entities of the same type.
+
+        :param entity_type: Shotgun entity type
+        :param entity_ids: List of Shotgun entity ids
+        :returns: Dictionary of lists of folders processed, keyed by entity id
+        """
+        start_time = time.time()
+        folders_by_id = process_filesystem_structure_by_entity(
+            self._tk, entity_type, entity_ids, False, self._engine
+        )
+        log.debug("Processed %d folders for %d %s entities in %.3fs." % (
+            sum(len(x) for x in folders_by_id.values()), len(entity_ids), entity_type,
+            time.time() - start_time)
+        )
+        return folders_by_id
+
+    def _complete(self, requests, folders, error):
+        """
+        Records the outcome of requests and reports them.
+
+        :param requests: List of :class:`FolderCreationRequest`
+        :param folders: List of folders processed, or None.
+        :param error: Exception raised, or None.
+        """
+        for request in requests:
+            if error:
+                log.debug("Could not create folders for %s %s: %s" % (
+                    request.entity_type, request.entity_id, error)
+                )
+            request._complete(folders, error)
+            if self._callback:
+                try:
+                    self._callback(request)
+                except Exception, e:
+                    log.exception("Folder creation service callback error: %s" % e)
@@ -18,6 +18,10 @@ import collections
 import sqlite3
 import sys
 import os
+import threading
+import time
+from functools import wraps
+from multiprocessing.pool import ThreadPool
 
 # use api json to cover py 2.5
 # todo - replace with proper external library  
@@ -29,6 +33,7 @@ from . import constants
 from .errors import TankError
 from . import LogManager
 from .util.login import get_current_user
+from .util import filesystem, LocalFileStorageManager
 
 # Shotgun field definitions to store the path cache data
 SHOTGUN_ENTITY = "FilesystemLocation"
@@ -43,44 +48,401 @@ SG_PIPELINE_CONFIG_FIELD = "pipeline_configuration"
 
 log = LogManager.get_logger(__name__)
 
-class PathCache(object):
+# version of the path cache database schema, stored as the sqlite user_version.
+# Databases with an older schema are upgraded when first opened, see _init_db_schema().
+_SCHEMA_VERSION = 2
+
+# database files whose schema has been checked by this process, keyed
+# by (path, device, inode), see PathCacheConnectionPool.
+_g_initialized_databases = set()
+_g_initialized_databases_lock = threading.Lock()
+
+
+class _PathCacheStats(object):
     """
-    A global cache which holds the mapping between a shotgun entity and a location on disk.
-    
-    NOTE! This uses sqlite and the db is typically hosted on an NFS storage.
-    Ensure that the code is developed with the constraints that this entails in mind.
+    Counters of the time this process spent in the path cache, see :meth:`get_stats`.
     """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def add(self, name, duration, rows=0):
+        """
+        Records an operation.
+
+        :param name: Name of the counter of the operation
+        :param duration: Time the operation took, in seconds
+        :param rows: Number of path cache rows or Shotgun records
+                     returned or written by the operation
+        """
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters[name] = {"count": 0, "time": 0.0, "rows": 0}
+            counter["count"] += 1
+            counter["time"] += duration
+            counter["rows"] += rows
+
+    def add_rows(self, name, rows):
+        """
+        Records rows returned by an operation recorded earlier.
+
+        :param name: Name of the counter of the operation
+        :param rows: Number of rows
+        """
+        with self._lock:
+            if name in self._counters:
+                self._counters[name]["rows"] += rows
+
+    def get(self):
+        """
+        :returns: Dictionary of counters keyed by name, see :meth:`get_stats`.
+        """
+        with self._lock:
+            return dict((name, dict(counter)) for (name, counter) in self._counters.items())
+
+    def reset(self):
+        """
+        Resets all the counters.
+        """
+        with self._lock:
+            self._counters = {}
+
+_g_stats = _PathCacheStats()
+
+
+def get_stats():
+    """
+    Returns the time this process spent in the path cache, as a dictionary with
+    the following keys, whose values are dictionaries with the number of operations
+    (``count``), the time they took in seconds (``time``) and the number of rows they
+    returned or wrote (``rows``):
+
+    - ``connect``: Connections opened to path cache databases, including schema checks.
+    - ``query``: SQL statements run against path cache databases, and rows returned or modified.
+      Only the time spent executing the statements is counted, not the time spent
+      fetching their results.
+    - ``slow_query``: The queries which took longer than the ``path_cache_slow_query_threshold``
+      setting of the pipeline configuration. These are also logged.
+    - ``full_sync``: Full synchronizations with Shotgun, and folders added.
+    - ``incremental_sync``: Incremental synchronizations with Shotgun, and folders added.
+    - ``shotgun_upload``: Uploads of new folders to Shotgun, and folders uploaded.
+
+    Counters are only present once the operation has happened.
+
+    :returns: Dictionary of counters.
+    """
+    return _g_stats.get()
+
+
+def reset_stats():
+    """
+    Resets the counters returned by :meth:`get_stats`.
+    """
+    _g_stats.reset()
+
+
+def _timed(name, count_rows):
+    """
+    Decorator recording the time spent in a method in the path cache statistics.
+
+    :param name: Name of the counter, see :meth:`get_stats`
+    :param count_rows: Function returning the number of rows from the result of the method.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            time_before = time.time()
+            rows = 0
+            try:
+                result = func(*args, **kwargs)
+                rows = count_rows(result)
+                return result
+            finally:
+                _g_stats.add(name, time.time() - time_before, rows)
+        return wrapper
+    return decorator
+
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor recording the statements it runs in the path cache statistics,
+    and logging the ones slower than the slow query threshold of its connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_InstrumentedCursor, self).__init__(*args, **kwargs)
+        # rows fetched since the last statement, not recorded yet
+        self._rows_fetched = 0
+
+    def execute(self, sql, *args):
+        return self._run(super(_InstrumentedCursor, self).execute, sql, args)
+
+    def executemany(self, sql, *args):
+        return self._run(super(_InstrumentedCursor, self).executemany, sql, args)
+
+    def executescript(self, sql):
+        return self._run(super(_InstrumentedCursor, self).executescript, sql, ())
+
+    def _run(self, method, sql, args):
+        """
+        Runs a statement, recording how long it took.
+        """
+        self._record_rows_fetched()
+        time_before = time.time()
+        try:
+            return method(sql, *args)
+        finally:
+            duration = time.time() - time_before
+            # rowcount is -1 for queries, whose rows are counted as they are fetched
+            rows = max(0, self.rowcount)
+            _g_stats.add("query", duration, rows)
+
+            if duration >= self.connection.slow_query_threshold:
+                _g_stats.add("slow_query", duration, rows)
+                log.info(
+                    "Slow path cache query: %.3fs for %s" % (duration, " ".join(sql.split()))
+                )
+
+    def _record_rows_fetched(self):
+        """
+        Adds the rows fetched since the last statement to the statistics.
+        """
+        if self._rows_fetched:
+            _g_stats.add_rows("query", self._rows_fetched)
+            self._rows_fetched = 0
+
+    def next(self):
+        try:
+            row = super(_InstrumentedCursor, self).next()
+        except StopIteration:
+            self._record_rows_fetched()
+            raise
+        self._rows_fetched += 1
+        return row
+
+    def fetchone(self):
+        row = super(_InstrumentedCursor, self).fetchone()
+        if row is None:
+            self._record_rows_fetched()
+        else:
+            self._rows_fetched += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = super(_InstrumentedCursor, self).fetchmany(*args)
+        self._rows_fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super(_InstrumentedCursor, self).fetchall()
+        self._rows_fetched += len(rows)
+        self._record_rows_fetched()
+        return rows
+
+    def close(self):
+        self._record_rows_fetched()
+        super(_InstrumentedCursor, self).close()
+
+
+class _InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection to a path cache database, whose cursors record the statements
+    they run in the path cache statistics, see :class:`_InstrumentedCursor`.
+    """
+
+    # statements taking longer than this number of seconds are logged
+    slow_query_threshold = constants.DEFAULT_PATH_CACHE_SLOW_QUERY_THRESHOLD
+
+    def cursor(self, factory=_InstrumentedCursor):
+        return super(_InstrumentedConnection, self).cursor(factory)
+
+
+def _init_db_schema(connection):
+    """
+    Creates the path cache tables in a new database, and
+    upgrades the tables of an existing database.
+
+    :param connection: sqlite connection to the path cache database
+    """
+    c = connection.cursor()
+    try:
+    
+        # get a list of tables in the current database
+        ret = c.execute("SELECT name FROM main.sqlite_master WHERE type='table';")
+        table_names = [x[0] for x in ret.fetchall()]
+        
+        if len(table_names) == 0:
+            # we have a brand new database. Create all tables and indices
+            c.executescript("""
+                CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
+            
+                CREATE INDEX path_cache_path_entity ON path_cache(root, path, primary_entity, entity_type, entity_id, entity_name);
+            
+                CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+                
+                CREATE TABLE event_log_sync (last_id integer);
+                
+                CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+                
+                CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
+
+                CREATE INDEX shotgun_status_shotgun_id ON shotgun_status(shotgun_id, path_cache_id);
+
+                CREATE TABLE full_sync_checkpoint (max_event_log_id integer, last_shotgun_id integer);
+
+                PRAGMA user_version = %d;
+                """ % _SCHEMA_VERSION)
+            connection.commit()
+            
+        else:
+            
+            # we have an existing database! Ensure it is up to date
+            if "event_log_sync" not in table_names:
+                # this is a pre-0.15 setup where the path cache does not have event log sync
+                c.executescript("CREATE TABLE event_log_sync (last_id integer);")
+                connection.commit()
+            
+            if "shotgun_status" not in table_names:
+                # this is a pre-0.15 setup where the path cache does not have the shotgun_status table
+                c.executescript("""CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+                                   CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);""")
+                connection.commit()
+
+            if "full_sync_checkpoint" not in table_names:
+                # this is a setup where full syncs could not be resumed
+                c.executescript("CREATE TABLE full_sync_checkpoint (max_event_log_id integer, last_shotgun_id integer);")
+                connection.commit()
+
+            
+            # now ensure that some key fields that have been added during the dev cycle are there
+            ret = c.execute("PRAGMA table_info(path_cache)")
+            field_names = [x[1] for x in ret.fetchall()]
+            
+            # check for primary entity field - this was added back in 0.12.x
+            if "primary_entity" not in field_names:
+                c.executescript("""
+                    ALTER TABLE path_cache ADD COLUMN primary_entity integer;
+                    UPDATE path_cache SET primary_entity=1;
+    
+                    DROP INDEX IF EXISTS path_cache_path;
+                    CREATE INDEX IF NOT EXISTS path_cache_path ON path_cache(root, path, primary_entity);
+                    
+                    DROP INDEX IF EXISTS path_cache_all;
+                    CREATE UNIQUE INDEX IF NOT EXISTS path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+                    """)
     
+                connection.commit()
+
+            schema_version = list(c.execute("PRAGMA user_version"))[0][0]
+
+            if schema_version < 2:
+                # schema v2 - the path lookups are answered from the path index alone,
+                # the entity lookups from the unique index, which makes the entity index
+                # redundant, and folders can be looked up by their shotgun id.
+                log.debug("Upgrading the path cache schema to version 2...")
+                c.executescript("""
+                    BEGIN;
+
+                    CREATE INDEX IF NOT EXISTS path_cache_path_entity ON path_cache(root, path, primary_entity, entity_type, entity_id, entity_name);
+                    DROP INDEX IF EXISTS path_cache_path;
+                    DROP INDEX IF EXISTS path_cache_entity;
+
+                    CREATE INDEX IF NOT EXISTS shotgun_status_shotgun_id ON shotgun_status(shotgun_id, path_cache_id);
+
+                    PRAGMA user_version = 2;
+
+                    COMMIT;
+                    """)
+    
+    finally:
+        c.close()
+
+
+def _enable_wal_journal(connection, path):
+    """
+    Switches a database to write-ahead logging, which lets readers and a writer
+    access the database at the same time. The journal mode is stored in the
+    database file, so this only needs to be done once per database.
+
+    :param connection: sqlite connection to the database
+    :param path: path to the database file
+    """
+    try:
+        journal_mode = list(connection.execute("PRAGMA journal_mode=WAL"))[0][0]
+    except sqlite3.Error, e:
+        log.debug("Could not enable write-ahead logging for %s: %s" % (path, e))
+        return
+
+    if journal_mode.lower() != "wal":
+        # e.g. the sqlite version or the filesystem doesn't support it.
+        log.debug(
+            "Write-ahead logging is not supported for %s, using the %s "
+            "journal mode." % (path, journal_mode)
+        )
+
+
+class PathCacheConnectionPool(object):
+    """
+    Pool of connections to the path cache database of a toolkit instance.
+
+    Opening the path cache involves running the cache location core hook,
+    connecting to the database and checking its schema. The pool only does
+    this once, and keeps connections open so that they can be reused by the
+    :class:`PathCache` instances created afterwards. The schema of a database
+    file is only checked once per process.
+
+    A connection is used by one :class:`PathCache` at a time, so a connection
+    is never shared by several threads at the same time. Connections are
+    created as needed, for example when several threads use the path cache
+    concurrently. Since the pooled connections don't keep transactions open,
+    data written through one connection, e.g. by :meth:`PathCache.synchronize`,
+    is seen by all the others.
+    """
+
     def __init__(self, tk):
         """
         Constructor.
-        
+
         :param tk: Toolkit API instance
         """
-        self._connection = None
         self._tk = tk
-        self._sync_with_sg = tk.pipeline_configuration.get_shotgun_path_cache_enabled()
-
-        if tk.pipeline_configuration.has_associated_data_roots():
-            self._path_cache_disabled = False
-            self._init_db()
-            self._roots = tk.pipeline_configuration.get_data_roots()
-        else:
-            # no primary location found. Path cache therefore does not exist!
-            # go into a no-path-cache-mode
-            self._path_cache_disabled = True
-    
-    def _init_db(self):
+        self._lock = threading.Lock()
+        # location of the database file, keyed by whether the shotgun path cache is enabled
+        self._locations = {}
+        # (path, device, inode) of the database file the pooled connections are opened on
+        self._database_id = None
+        self._idle_connections = []
+        # database file id of each connection, keyed by connection object id
+        self._connection_database_ids = {}
+
+    def acquire(self):
         """
-        Sets up the database
+        Returns a connection to the path cache database. The connection
+        must be handed back with :meth:`release` once done with it.
+
+        :returns: sqlite connection
         """
-        # first, make way for the path cache file. This call
-        # will ensure that there is a valid folder and file on
-        # disk, created with all the right permissions etc.
-        path_cache_file = self._get_path_cache_location()
-        
-        self._connection = sqlite3.connect(path_cache_file)
-        
+        with self._lock:
+            (path, database_id, empty) = self._get_database()
+            if database_id != self._database_id:
+                # the database file was replaced, or is used for the first time
+                self._close_idle_connections()
+                self._database_id = database_id
+            elif self._idle_connections:
+                return self._idle_connections.pop()
+
+        log.debug("Opening a connection to the path cache %s" % path)
+        time_before = time.time()
+        connection = sqlite3.connect(path, check_same_thread=False, factory=_InstrumentedConnection)
+        connection.slow_query_threshold = (
+            self._tk.pipeline_configuration.get_path_cache_slow_query_threshold()
+        )
+
         # this is to handle unicode properly - make sure that sqlite returns 
         # str objects for TEXT fields rather than unicode. Note that any unicode
         # objects that are passed into the database will be automatically
@@ -88,72 +450,58 @@ class PathCache(object):
         # representation will work for any language, as long as data is either input
         # as UTF-8 (byte string) or unicode. And in the latter case, the returned data
         # will always be unicode.
-        self._connection.text_factory = str
-        
-        c = self._connection.cursor()
-        try:
-        
-            # get a list of tables in the current database
-            ret = c.execute("SELECT name FROM main.sqlite_master WHERE type='table';")
-            table_names = [x[0] for x in ret.fetchall()]
-            
-            if len(table_names) == 0:
-                # we have a brand new database. Create all tables and indices
-                c.executescript("""
-                    CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
-                
-                    CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
-                
-                    CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
-                
-                    CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
-                    
-                    CREATE TABLE event_log_sync (last_id integer);
-                    
-                    CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
-                    
-                    CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
-                    """)
-                self._connection.commit()
-                
-            else:
-                
-                # we have an existing database! Ensure it is up to date
-                if "event_log_sync" not in table_names:
-                    # this is a pre-0.15 setup where the path cache does not have event log sync
-                    c.executescript("CREATE TABLE event_log_sync (last_id integer);")
-                    self._connection.commit()
-                
-                if "shotgun_status" not in table_names:
-                    # this is a pre-0.15 setup where the path cache does not have the shotgun_status table
-                    c.executescript("""CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
-                                       CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);""")
-                    self._connection.commit()
+        connection.text_factory = str
 
-                
-                # now ensure that some key fields that have been added during the dev cycle are there
-                ret = c.execute("PRAGMA table_info(path_cache)")
-                field_names = [x[1] for x in ret.fetchall()]
-                
-                # check for primary entity field - this was added back in 0.12.x
-                if "primary_entity" not in field_names:
-                    c.executescript("""
-                        ALTER TABLE path_cache ADD COLUMN primary_entity integer;
-                        UPDATE path_cache SET primary_entity=1;
-        
-                        DROP INDEX IF EXISTS path_cache_path;
-                        CREATE INDEX IF NOT EXISTS path_cache_path ON path_cache(root, path, primary_entity);
-                        
-                        DROP INDEX IF EXISTS path_cache_all;
-                        CREATE UNIQUE INDEX IF NOT EXISTS path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
-                        """)
-        
-                    self._connection.commit()
-        
-        finally:
-            c.close()
+        with _g_initialized_databases_lock:
+            if empty or database_id not in _g_initialized_databases:
+                self._init_schema(connection)
+                if self._tk.pipeline_configuration.get_path_cache_wal_enabled():
+                    _enable_wal_journal(connection, path)
+                _g_initialized_databases.add(database_id)
 
-    def _get_path_cache_location(self):
+        _g_stats.add("connect", time.time() - time_before)
+
+        with self._lock:
+            self._connection_database_ids[id(connection)] = database_id
+        return connection
+
+    def release(self, connection):
+        """
+        Hands back a connection obtained with :meth:`acquire`, so that
+        it can be reused. Uncommitted changes are rolled back.
+
+        :param connection: sqlite connection
+        """
+        connection.rollback()
+        with self._lock:
+            if self._connection_database_ids.get(id(connection)) == self._database_id:
+                self._idle_connections.append(connection)
+                return
+            # the database file was replaced while the connection was in use
+            self._connection_database_ids.pop(id(connection), None)
+        connection.close()
+
+    def close(self):
+        """
+        Closes the connections which are not in use.
+        """
+        with self._lock:
+            self._close_idle_connections()
+
+    def get_location(self):
+        """
+        Returns the location of the path cache database, creating the file if needed.
+
+        :returns: The path to the path cache file
+        """
+        key = self._tk.pipeline_configuration.get_shotgun_path_cache_enabled()
+        path = self._locations.get(key)
+        if path is None or not os.path.exists(path):
+            path = self._create_location()
+            self._locations[key] = path
+        return path
+
+    def _create_location(self):
         """
         Creates the path cache file and returns its location on disk.
 
@@ -203,6 +551,475 @@ class PathCache(object):
 
         return path
 
+    def _init_schema(self, connection):
+        """
+        Creates or upgrades the tables of the database.
+
+        :param connection: sqlite connection to the database
+        """
+        _init_db_schema(connection)
+
+    def _get_database(self):
+        """
+        Locates the database file.
+
+        :returns: Tuple with the path to the database file, its id,
+                  and whether the file is empty.
+        """
+        path = self.get_location()
+        stat = os.stat(path)
+        return (path, (path, stat.st_dev, stat.st_ino), stat.st_size == 0)
+
+    def _close_idle_connections(self):
+        """
+        Closes the connections which are not in use. Must be called with the lock held.
+        """
+        for connection in self._idle_connections:
+            del self._connection_database_ids[id(connection)]
+            connection.close()
+        self._idle_connections = []
+
+
+class PathCacheReplicaConnectionPool(PathCacheConnectionPool):
+    """
+    Pool of connections to the node-local copy of the path cache database,
+    used when the ``use_path_cache_replica`` setting is enabled.
+
+    The replica is stored in the local cache folder of the pipeline configuration
+    and is synchronized with Shotgun rather than copied from the shared path cache,
+    so that processes which only read the path cache never open the shared database.
+    The time of the last synchronization is stored in its replica_sync table.
+    """
+
+    def get_location(self):
+        """
+        Returns the location of the replica database, creating the file if needed.
+
+        :returns: The path to the replica file
+        """
+        path = self._locations.get(None)
+        if path is None or not os.path.exists(path):
+            path = self._create_location()
+            self._locations[None] = path
+        return path
+
+    def _create_location(self):
+        """
+        Creates the replica file and returns its location on disk.
+
+        :returns: The path to the replica file
+        """
+        pipeline_configuration = self._tk.pipeline_configuration
+        cache_root = LocalFileStorageManager.get_configuration_root(
+            self._tk.shotgun_url,
+            pipeline_configuration.get_project_id(),
+            pipeline_configuration.get_plugin_id(),
+            pipeline_configuration.get_shotgun_id(),
+            LocalFileStorageManager.CACHE
+        )
+        path = os.path.join(cache_root, constants.PATH_CACHE_REPLICA_FILE)
+        if not os.path.exists(path):
+            filesystem.ensure_folder_exists(cache_root)
+            filesystem.touch_file(path)
+        return path
+
+    def _init_schema(self, connection):
+        """
+        Creates or upgrades the path cache tables, and creates the table
+        tracking when the replica was last synchronized.
+
+        :param connection: sqlite connection to the replica database
+        """
+        super(PathCacheReplicaConnectionPool, self)._init_schema(connection)
+        connection.execute("CREATE TABLE IF NOT EXISTS replica_sync (last_sync real)")
+        connection.commit()
+
+
+class _PathTrieNode(object):
+    """
+    Folder of a :class:`_PathTrie`.
+    """
+    __slots__ = ("primary", "secondary", "children")
+
+    def __init__(self):
+        # (entity type, entity id, entity name) of the primary entity,
+        # or _AMBIGUOUS if there is more than one.
+        self.primary = None
+        # list of (entity type, entity id, entity name) secondary entities
+        self.secondary = None
+        # child nodes keyed by folder name
+        self.children = None
+
+
+# primary entity of a path associated with several primary entities
+_AMBIGUOUS = object()
+
+
+class _PathTrie(object):
+    """
+    In-memory copy of the path_cache table, as a prefix tree of folder
+    names for each storage root. Parent folders are shared by all the paths
+    below them, and folder names are interned, so the table takes a fraction
+    of the memory it would take as a flat dictionary of paths.
+
+    The trie is never modified once loaded, so it can be read by several threads.
+    """
+
+    def __init__(self, rows):
+        """
+        Constructor.
+
+        :param rows: path_cache rows as (root, path, entity type, entity id,
+                     entity name, primary) tuples, in insertion order.
+        """
+        self._roots = {}
+        # (root, path, primary) tuples keyed by (entity type, entity id)
+        self._entity_paths = {}
+
+        for (root_name, db_path, entity_type, entity_id, entity_name, primary) in rows:
+            # convert to string, not unicode!
+            entity = (intern(str(entity_type)), entity_id, str(entity_name))
+            node = self._get_node(root_name, db_path, create=True)
+            if primary:
+                node.primary = _AMBIGUOUS if node.primary is not None else entity
+            else:
+                if node.secondary is None:
+                    node.secondary = []
+                node.secondary.append(entity)
+            self._entity_paths.setdefault((entity[0], entity_id), []).append(
+                (root_name, db_path, bool(primary))
+            )
+
+    def _get_node(self, root_name, db_path, create=False):
+        """
+        Returns the node of a path.
+
+        :param root_name: Storage root name
+        :param db_path: Path relative to the root, in its database form
+        :param create: Create the missing nodes if True.
+        :returns: :class:`_PathTrieNode`, or None if the path is not in the trie
+                  and create is False.
+        """
+        node = self._roots.get(root_name)
+        if node is None:
+            if not create:
+                return None
+            node = self._roots[intern(str(root_name))] = _PathTrieNode()
+
+        for name in db_path.split("/"):
+            if not name:
+                continue
+            children = node.children
+            child = children.get(name) if children is not None else None
+            if child is None:
+                if not create:
+                    return None
+                if children is None:
+                    children = node.children = {}
+                child = children[intern(str(name))] = _PathTrieNode()
+            node = child
+        return node
+
+    def get_entity(self, root_name, db_path):
+        """
+        Returns the primary entity of a path.
+
+        :param root_name: Storage root name
+        :param db_path: Path relative to the root, in its database form
+        :returns: Shotgun entity dict or None if not found
+        :raises: TankError if the path is associated with several primary entities.
+        """
+        node = self._get_node(root_name, db_path)
+        if node is None or node.primary is None:
+            return None
+        if node.primary is _AMBIGUOUS:
+            # never supposed to happen!
+            raise TankError("More than one entry in path database for [%s] %s!" % (root_name, db_path))
+        return _entity_dict(node.primary)
+
+    def get_secondary_entities(self, root_name, db_path):
+        """
+        Returns the secondary entities of a path.
+
+        :param root_name: Storage root name
+        :param db_path: Path relative to the root, in its database form
+        :returns: list of Shotgun entity dicts
+        """
+        node = self._get_node(root_name, db_path)
+        if node is None or node.secondary is None:
+            return []
+        return [_entity_dict(entity) for entity in node.secondary]
+
+    def get_paths(self, entity_type, entity_id, primary_only):
+        """
+        Returns the paths associated with an entity.
+
+        :param entity_type: A Shotgun entity type
+        :param entity_id: A Shotgun entity id
+        :param primary_only: Only return items marked as primary
+        :returns: list of (root name, db path) tuples
+        """
+        return [
+            (root_name, db_path)
+            for (root_name, db_path, primary) in self._entity_paths.get((entity_type, entity_id), [])
+            if primary or not primary_only
+        ]
+
+
+def _entity_dict(entity):
+    """
+    Converts an entity stored in a :class:`_PathTrie` to a Shotgun entity dict.
+
+    :param entity: (entity type, entity id, entity name) tuple
+    :returns: Shotgun entity dict, e.g. {"type": "Shot", "name": "xxx", "id": 123}
+    """
+    return {"type": entity[0], "id": entity[1], "name": entity[2]}
+
+
+class PathCacheSnapshot(object):
+    """
+    In-memory copy of the path cache of a toolkit instance, used when the
+    ``use_path_cache_snapshot`` setting is enabled so that read-only processes
+    resolve paths and entities without querying sqlite.
+
+    The copy is loaded on first use, and loaded again when the path cache
+    database changes, which is detected by comparing its synchronization
+    marker and last row id with the ones the copy was loaded from. Path caches
+    larger than the ``path_cache_snapshot_max_rows`` setting are not loaded.
+    """
+
+    def __init__(self, tk):
+        """
+        Constructor.
+
+        :param tk: Toolkit API instance
+        """
+        self._tk = tk
+        self._lock = threading.Lock()
+        self._trie = None
+        # state of the database the trie was loaded from, or None if not loaded
+        self._marker = None
+
+    def get(self, connection):
+        """
+        Returns the in-memory copy of a path cache database, loading it if
+        it hasn't been loaded yet or if the database changed since.
+
+        :param connection: sqlite connection to the path cache database
+        :returns: :class:`_PathTrie`, or None if the path cache is too large.
+        """
+        c = connection.cursor()
+        try:
+            marker = (
+                list(c.execute("SELECT max(last_id) FROM event_log_sync"))[0][0],
+                list(c.execute("SELECT max(rowid) FROM path_cache"))[0][0],
+            )
+            with self._lock:
+                if marker != self._marker:
+                    self._trie = self._load(c)
+                    self._marker = marker
+                return self._trie
+        finally:
+            c.close()
+
+    def invalidate(self):
+        """
+        Discards the in-memory copy, so that it is loaded again on next use.
+        """
+        with self._lock:
+            self._trie = None
+            self._marker = None
+
+    def _load(self, cursor):
+        """
+        Loads the path_cache table in memory.
+
+        :param cursor: Sqlite database cursor
+        :returns: :class:`_PathTrie`, or None if the path cache is too large.
+        """
+        max_rows = self._tk.pipeline_configuration.get_path_cache_snapshot_max_rows()
+        num_rows = list(cursor.execute("SELECT count(*) FROM path_cache"))[0][0]
+        if num_rows > max_rows:
+            log.debug(
+                "The path cache has %d entries, more than the %d which can be "
+                "loaded in memory. Lookups will use the database." % (num_rows, max_rows)
+            )
+            return None
+
+        log.debug("Loading %d path cache entries in memory..." % num_rows)
+        return _PathTrie(cursor.execute(
+            "SELECT root, path, entity_type, entity_id, entity_name, primary_entity "
+            "FROM path_cache ORDER BY rowid"
+        ))
+
+
+class PathCache(object):
+    """
+    A global cache which holds the mapping between a shotgun entity and a location on disk.
+    
+    NOTE! This uses sqlite and the db is typically hosted on an NFS storage.
+    Ensure that the code is developed with the constraints that this entails in mind.
+    """
+
+    # maximum number of parameters of a query, sqlite doesn't allow more than 999 by default
+    _MAX_QUERY_PARAMETERS = 900
+    
+    def __init__(self, tk):
+        """
+        Constructor.
+
+        The database connection is taken from the connection pool of the toolkit
+        instance and handed back to it when the path cache is closed.
+
+        When the ``use_path_cache_replica`` setting is enabled, entity and path
+        lookups are served by a node-local copy of the path cache, which is
+        synchronized with Shotgun when older than ``path_cache_replica_max_age``
+        seconds. The shared path cache is then only opened when it is written to,
+        or read as part of a write.
+
+        When the ``use_path_cache_snapshot`` setting is enabled, these lookups are
+        answered from the in-memory copy of the path cache kept by the toolkit
+        instance, see :class:`PathCacheSnapshot`.
+
+        :param tk: Toolkit API instance
+        """
+        self._shared_connection = None
+        self._replica_connection = None
+        self._replica_stale = True
+        self._use_snapshot = tk.pipeline_configuration.get_path_cache_snapshot_enabled()
+        # the in-memory copy used by this path cache, once checked to be up to date
+        self._snapshot = None
+        self._snapshot_checked = False
+        self._tk = tk
+        self._sync_with_sg = tk.pipeline_configuration.get_shotgun_path_cache_enabled()
+        # the replica is kept up to date through the shotgun event log,
+        # so it is only available with the shotgun path cache.
+        self._use_replica = (
+            self._sync_with_sg and tk.pipeline_configuration.get_path_cache_replica_enabled()
+        )
+
+        if tk.pipeline_configuration.has_associated_data_roots():
+            self._path_cache_disabled = False
+            self._roots = tk.pipeline_configuration.get_data_roots()
+            if not self._use_replica:
+                self._shared_connection = tk.path_cache_pool.acquire()
+        else:
+            # no primary location found. Path cache therefore does not exist!
+            # go into a no-path-cache-mode
+            self._path_cache_disabled = True
+
+    @property
+    def _connection(self):
+        """
+        Connection to the shared path cache database, opened on first use.
+        """
+        if self._shared_connection is None:
+            self._shared_connection = self._tk.path_cache_pool.acquire()
+        return self._shared_connection
+
+    @property
+    def _read_connection(self):
+        """
+        Connection used for entity and path lookups. This is the connection to
+        the local replica when it is enabled, synchronized with Shotgun if
+        needed, and the connection to the shared path cache otherwise.
+        """
+        if not self._use_replica:
+            return self._connection
+
+        if self._replica_connection is None:
+            self._replica_connection = self._tk.path_cache_replica_pool.acquire()
+        if self._replica_stale:
+            self._refresh_replica()
+            self._replica_stale = False
+        return self._replica_connection
+
+    def _get_snapshot(self):
+        """
+        Returns the in-memory copy of the path cache to answer lookups from,
+        loading it if needed, see :class:`PathCacheSnapshot`.
+
+        :returns: :class:`_PathTrie`, or None if lookups should use the database.
+        """
+        if not self._use_snapshot:
+            return None
+
+        if not self._snapshot_checked:
+            self._snapshot = self._tk.path_cache_snapshot.get(self._read_connection)
+            self._snapshot_checked = True
+        return self._snapshot
+
+    def _invalidate_snapshot(self):
+        """
+        Discards the in-memory copy of the path cache after it was written to.
+        """
+        if not self._use_snapshot:
+            return
+
+        self._tk.path_cache_snapshot.invalidate()
+        self._snapshot = None
+        self._snapshot_checked = False
+
+    def _refresh_replica(self):
+        """
+        Synchronizes the local replica with Shotgun if it is older
+        than the maximum age set in the pipeline configuration.
+
+        If the synchronization fails, a replica which was synchronized
+        before is still used, and a warning is logged.
+        """
+        max_age = self._tk.pipeline_configuration.get_path_cache_replica_max_age()
+        c = self._replica_connection.cursor()
+        try:
+            last_sync = list(c.execute("SELECT max(last_sync) FROM replica_sync"))[0][0]
+            now = time.time()
+            if last_sync is not None and 0 <= now - last_sync < max_age:
+                return
+
+            log.debug("Synchronizing the local path cache replica with Shotgun...")
+            try:
+                self._synchronize(c, False)
+            except Exception, e:
+                self._replica_connection.rollback()
+                last_id = list(c.execute("SELECT max(last_id) FROM event_log_sync"))[0][0]
+                if last_id is None:
+                    # the replica has never been synchronized, there is nothing to fall back on.
+                    raise
+                log.warning(
+                    "Could not synchronize the local path cache replica, "
+                    "path lookups may be out of date: %s" % e
+                )
+                return
+
+            c.execute("DELETE FROM replica_sync")
+            c.execute("INSERT INTO replica_sync(last_sync) VALUES(?)", (now, ))
+            self._replica_connection.commit()
+        finally:
+            c.close()
+
+    def _invalidate_replica(self):
+        """
+        Marks the local replica as out of date after the shared path cache
+        was written to, so that it is synchronized with Shotgun before the
+        next lookup, in this process or another one on this machine.
+        """
+        if not self._use_replica:
+            return
+
+        if self._replica_connection is None:
+            self._replica_connection = self._tk.path_cache_replica_pool.acquire()
+        self._replica_connection.execute("DELETE FROM replica_sync")
+        self._replica_connection.commit()
+        self._replica_stale = True
+
+    def _get_path_cache_location(self):
+        """
+        Creates the path cache file and returns its location on disk.
+
+        :returns: The path to the path cache file
+        """
+        return self._tk.path_cache_pool.get_location()
+
     def _path_to_dbpath(self, relative_path):
         """
         converts a  relative path to a db path form
@@ -269,9 +1086,12 @@ class PathCache(object):
         """
         Close the database connection.
         """
-        if self._connection is not None:
-            self._connection.close()
-            self._connection = None
+        if self._shared_connection is not None:
+            self._tk.path_cache_pool.release(self._shared_connection)
+            self._shared_connection = None
+        if self._replica_connection is not None:
+            self._tk.path_cache_replica_pool.release(self._replica_connection)
+            self._replica_connection = None
                 
     ############################################################################################
     # shotgun synchronization (SG data pushed into path cache database)
@@ -302,114 +1122,132 @@ class PathCache(object):
             return []
                 
         c = self._connection.cursor()
-        
         try:
+            data = self._synchronize(c, full_sync)
+        finally:
+            c.close()
 
-            # check if we should do a full sync
-            if full_sync:
-                return self._do_full_sync(c)
-            
-            # first get the last synchronized event log event.        
-            res = c.execute("SELECT max(last_id) FROM event_log_sync")
-            # get first item in the data set
-            data = list(res)[0]
-            
-            log.debug("Path cache sync tracking marker in local sqlite db: %r" % data)
-            
-            # expect back something like [(249660,)] for a running cache and [(None,)] for a clear
-            if len(data) != 1 or data[0] is None:
-                # we should do a full sync
-                return self._do_full_sync(c)
-    
-            # we have an event log id - so check if there are any more recent events
-            event_log_id = data[0]
-
-            # note! We search for all events greater than the prev event_log_id-1.
-            # this way, the first record returned should be the last record that was 
-            # synced. This is a way of detecting that the event log chain is not broken.
-            # it could break for example if someone has culled the event log table and in 
-            # that case we should fall back on a full sync.
-            
-            log.debug(
-                "Fetching create/delete folder event log "
-                "entries >= id %s for project %s..." % (event_log_id, self._get_project_link())
-            )
-            
-            # note that we return the records in ascending order, meaning that they get 
-            # "played back" in the same order as they were created.
-            #
-            # for a non-truncated event log table, the first record returned
-            # by this query should be the last one previously processed by the 
-            # path cache (via the event_log_id variable)
-            response = self._tk.shotgun.find(
-                "EventLogEntry",
-                [["event_type", "in", ["Toolkit_Folders_Create", "Toolkit_Folders_Delete"]],
-                 ["id", "greater_than", (event_log_id - 1)],
-                 ["project", "is", self._get_project_link()]
-                 ],
-                ["id", "meta", "event_type"],
-                [{"field_name": "id", "direction": "asc"}]
-            )
+        # the replica and the in-memory copy may not have the new entries yet
+        self._invalidate_replica()
+        self._invalidate_snapshot()
+        if data or full_sync:
+            # and contexts may be missing the entities of the new folders
+            self._tk.context_cache.invalidate()
+        return data
 
-            log.debug("Got %s event log entries" % len(response))
-        
-            # count creation and deletion entries
-            num_deletions = 0
-            num_creations = 0
-            for r in response:
-                if r["event_type"] == "Toolkit_Folders_Create":
-                    num_creations += 1
-                if r["event_type"] == "Toolkit_Folders_Delete":
-                    num_deletions += 1
-                    
-            log.debug("Event log contains %s creations and %s deletions" % (num_creations, num_deletions))
-            
-            if len(response) == 0:
-                # nothing in event log. Probably a truncated setup.
-                log.debug("No sync information in the event log. Falling back on a full sync.")
-                return self._do_full_sync(c)
+    def _synchronize(self, cursor, full_sync):
+        """
+        Ensures that a path cache database is in sync with Shotgun.
+
+        :param cursor: Sqlite database cursor
+        :param full_sync: Boolean to indicate that a full sync should be carried out.
+        :returns: A list of remote items which were detected, created remotely
+                  and not existing in the database. See :meth:`synchronize`.
+        """
+        # check if we should do a full sync
+        if full_sync:
+            return self._do_full_sync(cursor)
+        
+        # first get the last synchronized event log event.        
+        res = cursor.execute("SELECT max(last_id) FROM event_log_sync")
+        # get first item in the data set
+        data = list(res)[0]
+        
+        log.debug("Path cache sync tracking marker in local sqlite db: %r" % data)
+        
+        # expect back something like [(249660,)] for a running cache and [(None,)] for a clear
+        if len(data) != 1 or data[0] is None:
+            # we should do a full sync
+            return self._do_full_sync(cursor)
+
+        # we have an event log id - so check if there are any more recent events
+        event_log_id = data[0]
+
+        # note! We search for all events greater than the prev event_log_id-1.
+        # this way, the first record returned should be the last record that was 
+        # synced. This is a way of detecting that the event log chain is not broken.
+        # it could break for example if someone has culled the event log table and in 
+        # that case we should fall back on a full sync.
+        
+        log.debug(
+            "Fetching create/delete folder event log "
+            "entries >= id %s for project %s..." % (event_log_id, self._get_project_link())
+        )
+        
+        # note that we return the records in ascending order, meaning that they get 
+        # "played back" in the same order as they were created.
+        #
+        # for a non-truncated event log table, the first record returned
+        # by this query should be the last one previously processed by the 
+        # path cache (via the event_log_id variable)
+        response = self._tk.shotgun.find(
+            "EventLogEntry",
+            [["event_type", "in", ["Toolkit_Folders_Create", "Toolkit_Folders_Delete"]],
+             ["id", "greater_than", (event_log_id - 1)],
+             ["project", "is", self._get_project_link()]
+             ],
+            ["id", "meta", "event_type"],
+            [{"field_name": "id", "direction": "asc"}]
+        )
+
+        log.debug("Got %s event log entries" % len(response))
+    
+        # count creation and deletion entries
+        num_deletions = 0
+        num_creations = 0
+        for r in response:
+            if r["event_type"] == "Toolkit_Folders_Create":
+                num_creations += 1
+            if r["event_type"] == "Toolkit_Folders_Delete":
+                num_deletions += 1
                 
+        log.debug("Event log contains %s creations and %s deletions" % (num_creations, num_deletions))
+        
+        if len(response) == 0:
+            # nothing in event log. Probably a truncated setup.
+            log.debug("No sync information in the event log. Falling back on a full sync.")
+            return self._do_full_sync(cursor)
             
-            elif response[0]["id"] != event_log_id:
-                # there is either no event log data at all or a gap
-                # in the event log. Assume that some culling has occured and
-                # fall back on a full sync
-                log.debug(
-                    "Local path cache tracking marker is %s. "
-                    "First event log id returned is %s. It looks "
-                    "like the event log has been truncated, so falling back "
-                    "on a full sync." % (event_log_id, response[0]["id"])
-                )
-                return self._do_full_sync(c)
-            
-            elif len(response) == 1 and response[0]["id"] == event_log_id:
-                # nothing has changed since the last sync
-                log.debug("Path cache syncing not necessary - local folders already up to date!")
-                return []
-            
-            elif num_deletions > 0:
-                # some stuff was deleted. fall back on full sync
-                log.debug("Deletions detected, doing full sync")
-                return self._do_full_sync(c)
-            
-            elif num_creations > 0:
-                # we have a complete trail of increments. 
-                # note that we skip the current entity.
-                log.debug("Full event log history traced. Running incremental sync.")
-                return self._do_incremental_sync(c, response[1:])
-            
-            else:
-                # should never be here
-                raise Exception("Unknown error - please contact support.")
-
-        finally:       
-            c.close()
+        
+        elif response[0]["id"] != event_log_id:
+            # there is either no event log data at all or a gap
+            # in the event log. Assume that some culling has occured and
+            # fall back on a full sync
+            log.debug(
+                "Local path cache tracking marker is %s. "
+                "First event log id returned is %s. It looks "
+                "like the event log has been truncated, so falling back "
+                "on a full sync." % (event_log_id, response[0]["id"])
+            )
+            return self._do_full_sync(cursor)
+        
+        elif len(response) == 1 and response[0]["id"] == event_log_id:
+            # nothing has changed since the last sync
+            log.debug("Path cache syncing not necessary - local folders already up to date!")
+            return []
+        
+        elif num_deletions > 0:
+            # some stuff was deleted. fall back on full sync
+            log.debug("Deletions detected, doing full sync")
+            return self._do_full_sync(cursor)
+        
+        elif num_creations > 0:
+            # we have a complete trail of increments. 
+            # note that we skip the current entity.
+            log.debug("Full event log history traced. Running incremental sync.")
+            return self._do_incremental_sync(cursor, response[1:])
+        
+        else:
+            # should never be here
+            raise Exception("Unknown error - please contact support.")
 
+    @_timed("shotgun_upload", lambda result: len(result[1]))
     def _upload_cache_data_to_shotgun(self, data, event_log_desc):
         """
         Takes a standard chunk of Shotgun data and uploads it to Shotgun
-        using a single batch statement. Then writes a single event log entry record
-        which binds the created path records. Returns the id of this event log record.
+        using batch statements of ``path_cache_upload_batch_size`` records. Then writes
+        a single event log entry record which binds the created path records.
+        Returns the id of this event log record.
         
         data needs to be a list of dicts with the following keys:
         - entity - std sg entity dict with name, id and type
@@ -461,29 +1299,29 @@ class PathCache(object):
             
             sg_batch_data.append(req)
         
-        # push to shotgun in a single xact
+        # push to shotgun, in batches to keep the size of each request reasonable
         log.debug("Uploading %s path entries to Shotgun..." % len(sg_batch_data))
-        
-        try:    
-            response = self._tk.shotgun.batch(sg_batch_data)
+        batch_size = self._tk.pipeline_configuration.get_path_cache_upload_batch_size()
+
+        created_ids = []
+        try:
+            for start in xrange(0, len(sg_batch_data), batch_size):
+                response = self._tk.shotgun.batch(sg_batch_data[start:start + batch_size])
+                created_ids.extend([sg_obj["id"] for sg_obj in response])
         except Exception, e:
+            if created_ids:
+                # the path cache transaction is rolled back, so don't leave the records
+                # of the previous batches behind, they would be picked up by full syncs.
+                self._delete_folder_entities(created_ids)
             raise TankError("Critical! Could not update Shotgun with folder "
                             "data. Please contact support. Error details: %s" % e)
         
         # now create a dictionary where input path cache rowid (path_cache_row_id)
-        # is mapped to the shotgun ids that were just created
-        def _rowid_from_path(path):
-            for d in data:
-                if d["path"] == path:
-                    return d["path_cache_row_id"] 
-            raise TankError("Could not resolve row id for path! Please contact support! "
-                            "trying to resolve path '%s'. Source data set: %s" % (path, data))
-        
+        # is mapped to the shotgun ids that were just created. Batch responses
+        # are in the same order as the requests.
         rowid_sgid_lookup = {}
-        for sg_obj in response:
-            sg_id = sg_obj["id"]
-            pc_row_id = _rowid_from_path( sg_obj[SG_PATH_FIELD]["local_path"] )
-            rowid_sgid_lookup[pc_row_id] = sg_id
+        for (d, sg_id) in zip(data, created_ids):
+            rowid_sgid_lookup[d["path_cache_row_id"]] = sg_id
         
         # now register the created ids in the event log
         # this will later on be read by the synchronization            
@@ -493,7 +1331,7 @@ class PathCache(object):
         # the api version used is always useful to know
         meta["core_api_version"] = self._tk.version
         # shotgun ids created
-        meta["sg_folder_ids"] = [ x["id"] for x in response]
+        meta["sg_folder_ids"] = created_ids
         
         sg_event_data = {}
         sg_event_data["event_type"] = "Toolkit_Folders_Create"
@@ -513,6 +1351,22 @@ class PathCache(object):
         # return the event log id which represents this uploaded slab
         return (response["id"], rowid_sgid_lookup)
 
+    def _delete_folder_entities(self, ids):
+        """
+        Deletes FilesystemLocation records from Shotgun, logging rather than
+        raising errors.
+
+        :param ids: FilesystemLocation ids
+        """
+        log.debug("Deleting %s path entries from Shotgun..." % len(ids))
+        try:
+            self._tk.shotgun.batch([
+                {"request_type": "delete", "entity_type": SHOTGUN_ENTITY, "entity_id": sg_id}
+                for sg_id in ids
+            ])
+        except Exception, e:
+            log.warning("Could not delete FilesystemLocation records %s from Shotgun: %s" % (ids, e))
+
     def _get_project_link(self):
         """
         Returns the project link dictionary.
@@ -528,6 +1382,7 @@ class PathCache(object):
                 "id": self._tk.pipeline_configuration.get_project_id()
             }
 
+    @_timed("full_sync", len)
     def _do_full_sync(self, cursor):
         """
         Ensure the local path cache is in sync with Shotgun.
@@ -538,7 +1393,11 @@ class PathCache(object):
             - entity
             - metadata 
             - path
-            
+
+        FilesystemLocation entities are downloaded page by page, and each page
+        is committed to the database together with a checkpoint, so that a
+        full sync which was interrupted continues where it stopped.
+
         :param cursor: Sqlite database cursor
         """
         
@@ -547,31 +1406,201 @@ class PathCache(object):
                           "setup is up to date. Hang tight while data is being downloaded..."))
         
         try:
-            log.debug("Performing a complete Shotgun folder sync...")
-            
-            # find the max event log id. we will store this in the sync db later.
-            sg_data = self._tk.shotgun.find_one(
-                "EventLogEntry",
-                [["event_type", "in", ["Toolkit_Folders_Create", "Toolkit_Folders_Delete"]],
-                 ["project", "is", self._get_project_link()]
-                 ],
-                ["id"],
-                [{"field_name": "id", "direction": "desc"}]
-            )
+            checkpoint = list(cursor.execute(
+                "SELECT max_event_log_id, last_shotgun_id FROM full_sync_checkpoint"
+            ))
+
+            if checkpoint:
+                (max_event_log_id, last_shotgun_id) = checkpoint[0]
+                log.debug(
+                    "Resuming the complete Shotgun folder sync after FilesystemLocation %s..." % last_shotgun_id
+                )
 
-            if sg_data is None:
-                # event log was wiped or we haven't done any folder operations
-                max_event_log_id = 0
             else:
-                max_event_log_id = sg_data["id"]
-            
-            data = self._replay_folder_entities(cursor, max_event_log_id)
+                log.debug("Performing a complete Shotgun folder sync...")
+
+                # find the max event log id. we will store this in the sync db later.
+                sg_data = self._tk.shotgun.find_one(
+                    "EventLogEntry",
+                    [["event_type", "in", ["Toolkit_Folders_Create", "Toolkit_Folders_Delete"]],
+                     ["project", "is", self._get_project_link()]
+                     ],
+                    ["id"],
+                    [{"field_name": "id", "direction": "desc"}]
+                )
+
+                if sg_data is None:
+                    # event log was wiped or we haven't done any folder operations
+                    max_event_log_id = 0
+                else:
+                    max_event_log_id = sg_data["id"]
+                last_shotgun_id = 0
+
+                # complete sync - clear our tables first
+                log.debug("Full sync - clearing local sqlite path cache tables...")
+                cursor.execute("DELETE FROM event_log_sync")
+                cursor.execute("DELETE FROM shotgun_status")
+                cursor.execute("DELETE FROM path_cache")
+                cursor.execute("DELETE FROM full_sync_checkpoint")
+                cursor.execute(
+                    "INSERT INTO full_sync_checkpoint(max_event_log_id, last_shotgun_id) VALUES(?, ?)",
+                    (max_event_log_id, last_shotgun_id)
+                )
+                cursor.connection.commit()
+
+            data = self._replay_all_folder_entities(cursor, max_event_log_id, last_shotgun_id)
 
         finally:
             clear_global_busy()
         
         return data
 
+    def _replay_all_folder_entities(self, cursor, max_event_log_id, last_shotgun_id):
+        """
+        Downloads the FilesystemLocation entities of the project from Shotgun
+        in pages of increasing ids, and inserts each page in the path cache
+        as it arrives. The next page is downloaded while the previous one is
+        being inserted.
+
+        Lastly, this method updates the event_log_sync marker in the sqlite database
+        and removes the full sync checkpoint.
+
+        :param cursor: Sqlite database cursor
+        :param max_event_log_id: max event log marker to write to the path
+                                 cache database after a full operation.
+        :param last_shotgun_id: FilesystemLocation id to download the entities after.
+        :returns: A list of remote items which were detected, created remotely
+                  and not existing in this path cache. See :meth:`_replay_folder_entities`.
+        """
+        page_size = constants.PATH_CACHE_SYNC_PAGE_SIZE
+        return_data = []
+
+        pool = ThreadPool(1)
+        try:
+            pending = pool.apply_async(self._get_folder_entities_page, (last_shotgun_id, page_size))
+            while pending is not None:
+                sg_data = pending.get()
+                if not sg_data:
+                    break
+
+                last_shotgun_id = sg_data[-1]["id"]
+                if len(sg_data) < page_size:
+                    # this was the last page
+                    pending = None
+                else:
+                    pending = pool.apply_async(self._get_folder_entities_page, (last_shotgun_id, page_size))
+
+                return_data.extend(self._insert_folder_entities(cursor, sg_data))
+                cursor.execute("UPDATE full_sync_checkpoint SET last_shotgun_id = ?", (last_shotgun_id, ))
+                cursor.connection.commit()
+                log.debug("Inserted FilesystemLocation entities up to id %s." % last_shotgun_id)
+        finally:
+            pool.close()
+            pool.join()
+
+        # the path cache has been cleared before the first page was inserted,
+        # so a path associated with several primary entities can only come from shotgun.
+        conflicts = list(cursor.execute(
+            "SELECT root, path FROM path_cache WHERE primary_entity = 1 "
+            "GROUP BY root, path HAVING count(*) > 1 LIMIT 1"
+        ))
+
+        # lastly, id of this event log entry for purpose of future syncing
+        # note - we don't maintain a list of event log entries but just a single
+        # value in the db, so start by clearing the table.
+        log.debug("Inserting path cache marker %s in the sqlite db" % max_event_log_id)
+        cursor.execute("DELETE FROM full_sync_checkpoint")
+        cursor.execute("DELETE FROM event_log_sync")
+        if not conflicts:
+            cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (max_event_log_id, ))
+        cursor.connection.commit()
+
+        if conflicts:
+            (root_name, db_path) = conflicts[0]
+            raise TankError("Database concurrency problems: The path '[%s] %s' is associated "
+                            "with more than one Shotgun entity. Please re-run the path cache "
+                            "synchronization to try again." % (root_name, db_path))
+
+        return return_data
+
+    def _get_folder_entities_page(self, last_shotgun_id, page_size):
+        """
+        Downloads a page of FilesystemLocation entities for the project.
+
+        :param last_shotgun_id: Only entities with a greater id are returned.
+        :param page_size: Maximum number of entities to return.
+        :returns: List of FilesystemLocation entity dicts, by increasing id.
+        """
+        return self._tk.shotgun.find(
+            SHOTGUN_ENTITY,
+            [["project", "is", self._get_project_link()],
+             ["id", "greater_than", last_shotgun_id]],
+            ["id",
+             SG_METADATA_FIELD,
+             SG_IS_PRIMARY_FIELD,
+             SG_ENTITY_ID_FIELD,
+             SG_PATH_FIELD,
+             SG_ENTITY_TYPE_FIELD,
+             SG_ENTITY_NAME_FIELD],
+            [{"field_name": "id", "direction": "asc"}, ],
+            limit=page_size
+        )
+
+    def _insert_folder_entities(self, cursor, sg_data):
+        """
+        Inserts FilesystemLocation entities in the path cache, together with
+        their shotgun status, using one statement for all the entities.
+
+        :param cursor: Sqlite database cursor
+        :param sg_data: List of FilesystemLocation entity dicts.
+        :returns: A list of remote items which were inserted. See :meth:`_replay_folder_entities`.
+        """
+        rows = []
+        return_data = []
+        for x in sg_data:
+            mapping = self._get_folder_entity_mapping(x)
+            if mapping is None:
+                continue
+            (entity, local_os_path, root_name, relative_path, is_primary) = mapping
+            rows.append((
+                x["id"],
+                entity["type"],
+                entity["id"],
+                entity["name"],
+                root_name,
+                self._path_to_dbpath(relative_path),
+                is_primary
+            ))
+            return_data.append({"entity": entity,
+                                "path": local_os_path,
+                                "metadata": SG_METADATA_FIELD})
+
+        # note: the INSERT OR IGNORE INTO skips the entries which are
+        # already in the db, see _add_db_mapping()
+        cursor.executemany("""INSERT OR IGNORE INTO path_cache(entity_type,
+                                                               entity_id,
+                                                               entity_name,
+                                                               root,
+                                                               path,
+                                                               primary_entity)
+                              VALUES(?, ?, ?, ?, ?, ?)""",
+                           [row[1:] for row in rows])
+        if cursor.rowcount != len(rows):
+            # Note: edge case - some entries were duplicates of each other, or were
+            # already there because another process is running a full sync too.
+            log.debug("%d existing records skipped." % (len(rows) - cursor.rowcount))
+
+        # because these records came from shotgun, insert a record in the
+        # shotgun_status table to indicate that they exist in sg
+        cursor.executemany("""INSERT OR IGNORE INTO shotgun_status(path_cache_id, shotgun_id)
+                              SELECT rowid, ? FROM path_cache
+                              WHERE entity_type = ? AND entity_id = ? AND root = ?
+                              AND path = ? AND primary_entity = ?""",
+                           [(row[0], ) + row[1:3] + row[4:] for row in rows])
+
+        return return_data
+
+    @_timed("incremental_sync", len)
     def _do_incremental_sync(self, cursor, sg_data):
         """
         Ensure the local path cache is in sync with Shotgun.
@@ -631,21 +1660,19 @@ class PathCache(object):
         return self._replay_folder_entities(cursor, max_event_log_id, created_folder_ids)
 
 
-    def _replay_folder_entities(self, cursor, max_event_log_id, ids=None):
+    def _replay_folder_entities(self, cursor, max_event_log_id, ids):
         """
         Does the actual download from shotgun and pushes those changes
-        to the path cache. If ids is None, this indicates a full sync, and 
-        the path cache db table is cleared first. If not, the table
-        is appended to.
+        to the path cache, for an incremental sync. Full syncs are
+        carried out by :meth:`_replay_all_folder_entities`.
         
         Lastly, this method updates the event_log_sync marker in the sqlite database
         that tracks what the most recent event log id was being synced.
 
         :param cursor: Sqlite database cursor
         :param max_event_log_id: max event log marker to write to the path
-                                 cache database after a full operation.
-        :param ids: List of FilesystemLocation ids to replay. If set to None,
-                    a full sync will take place.
+                                 cache database after the operation.
+        :param ids: List of FilesystemLocation ids to replay.
         :returns: A list of remote items which were detected, created remotely
                   and not existing in this path cache. These are returned as a list of 
                   dictionaries, each containing keys:
@@ -658,22 +1685,7 @@ class PathCache(object):
         
         sg_data = []
         
-        if ids is None:
-            # get all folder data from shotgun
-            log.debug(
-                "Doing a full sync, so getting all the FilesystemLocations for the current project..."
-            )
-            sg_data = self._tk.shotgun.find(SHOTGUN_ENTITY, 
-                                  [["project", "is", self._get_project_link()]],
-                                  ["id",
-                                   SG_METADATA_FIELD, 
-                                   SG_IS_PRIMARY_FIELD, 
-                                   SG_ENTITY_ID_FIELD,
-                                   SG_PATH_FIELD,
-                                   SG_ENTITY_TYPE_FIELD, 
-                                   SG_ENTITY_NAME_FIELD],
-                                  [{"field_name": "id", "direction": "asc"},])
-        elif ids == []:
+        if ids == []:
             # incremental sync but with no folders
             log.debug("No folders need to be replayed, won't fetch anything from Shotgun...")
         
@@ -700,89 +1712,14 @@ class PathCache(object):
         
         log.debug("...Retrieved %s records." % len(sg_data))
             
-        # now start a single transaction in which we do all our work
-        if ids is None:
-            # complete sync - clear our tables first
-            log.debug("Full sync - clearing local sqlite path cache tables...")
-            cursor.execute("DELETE FROM event_log_sync")
-            cursor.execute("DELETE FROM shotgun_status")
-            cursor.execute("DELETE FROM path_cache")
-            
         return_data = []
             
         for x in sg_data:
             
-            # get entity data from our entry            
-            entity = {"id":   x[SG_ENTITY_ID_FIELD],
-                      "name": x[SG_ENTITY_NAME_FIELD],
-                      "type": x[SG_ENTITY_TYPE_FIELD]}
-            is_primary = x[SG_IS_PRIMARY_FIELD]
-            
-            # note! If a local storage which is associated with a path is retired,
-            # parts of the entity data returned by shotgun will be omitted.
-            # 
-            # A valid, active path entry will be on the form:
-            #  {'id': 653,
-            #   'path': {'content_type': None,
-            #            'id': 2186,
-            #            'link_type': 'local',
-            #            'local_path': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_linux': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_mac': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_windows': None,
-            #            'local_storage': {'id': 2,
-            #                              'name': 'primary',
-            #                              'type': 'LocalStorage'},
-            #            'name': '[primary] /sequences/aaa',
-            #            'type': 'Attachment',
-            #            'url': 'file:///Volumes/xyz/proj1/sequences/aaa'},
-            #   'type': 'FilesystemLocation'},
-            #
-            # With a retired storage, the returned data from the SG API is
-            #  {'id': 646,
-            #   'path': {'content_type': None,
-            #            'id': 2141,
-            #            'link_type': 'local',
-            #            'local_storage': None,
-            #            'name': '[primary] /sequences/aaa/missing',
-            #            'type': 'Attachment'},
-            #   'type': 'FilesystemLocation'},
-            #
-            
-            # no path at all - this is an anomaly but handle it gracefully regardless
-            if x[SG_PATH_FIELD] is None:
-                log.debug("No path associated with entry for %s. Skipping." % entity)
-                continue
-            
-            # retired storage case - see above for details
-            if x[SG_PATH_FIELD].get("local_storage") is None:
-                log.debug("The storage for the path for %s has been deleted. Skipping." % entity)
-                continue
-                
-            # get the local path from our attachment entity dict
-            sg_local_storage_os_map = {"linux2": "local_path_linux", 
-                                       "win32": "local_path_windows", 
-                                       "darwin": "local_path_mac" }
-            local_os_path_field = sg_local_storage_os_map[sys.platform]
-            local_os_path = x[SG_PATH_FIELD].get(local_os_path_field)
-
-            # if the storage is not correctly configured for an OS, it is possible
-            # that the path comes back as null. Skip such paths and report them in the log.
-            if local_os_path is None:
-                log.debug("No local os path associated with entry for %s. Skipping." % entity)
-                continue
-
-            # if the path cannot be split up into a root_name and a leaf path
-            # using the roots.yml file, log a warning and continue. This can happen
-            # if roots files and storage setups change half-way through a project,
-            # or if roots files are not in sync with the main storage definition
-            # in this case, we want to just warn and skip rather than raise
-            # an exception which will stop execution entirely.
-            try:
-                root_name, relative_path = self._separate_root(local_os_path)
-            except TankError, e:
-                log.debug("Could not resolve storages - skipping: %s" % e)
+            mapping = self._get_folder_entity_mapping(x)
+            if mapping is None:
                 continue
+            (entity, local_os_path, _, _, is_primary) = mapping
             
             # all validation checks seem ok - go ahead and make the changes.
             new_rowid = self._add_db_mapping(cursor, local_os_path, entity, is_primary)
@@ -812,10 +1749,93 @@ class PathCache(object):
         cursor.execute("DELETE FROM event_log_sync")
         cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (max_event_log_id, ))
             
-        self._connection.commit()
+        cursor.connection.commit()
 
         return return_data
 
+    def _get_folder_entity_mapping(self, x):
+        """
+        Extracts the path mapping of a FilesystemLocation entity.
+
+        :param x: FilesystemLocation entity dict
+        :returns: (entity, local path, root name, relative path, is primary) tuple, where entity is a
+                  Shotgun entity dict, or None if the entity can't be mapped
+                  to a path of the project on this platform.
+        """
+        # get entity data from our entry            
+        entity = {"id":   x[SG_ENTITY_ID_FIELD],
+                  "name": x[SG_ENTITY_NAME_FIELD],
+                  "type": x[SG_ENTITY_TYPE_FIELD]}
+        is_primary = x[SG_IS_PRIMARY_FIELD]
+        
+        # note! If a local storage which is associated with a path is retired,
+        # parts of the entity data returned by shotgun will be omitted.
+        # 
+        # A valid, active path entry will be on the form:
+        #  {'id': 653,
+        #   'path': {'content_type': None,
+        #            'id': 2186,
+        #            'link_type': 'local',
+        #            'local_path': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_linux': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_mac': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_windows': None,
+        #            'local_storage': {'id': 2,
+        #                              'name': 'primary',
+        #                              'type': 'LocalStorage'},
+        #            'name': '[primary] /sequences/aaa',
+        #            'type': 'Attachment',
+        #            'url': 'file:///Volumes/xyz/proj1/sequences/aaa'},
+        #   'type': 'FilesystemLocation'},
+        #
+        # With a retired storage, the returned data from the SG API is
+        #  {'id': 646,
+        #   'path': {'content_type': None,
+        #            'id': 2141,
+        #            'link_type': 'local',
+        #            'local_storage': None,
+        #            'name': '[primary] /sequences/aaa/missing',
+        #            'type': 'Attachment'},
+        #   'type': 'FilesystemLocation'},
+        #
+        
+        # no path at all - this is an anomaly but handle it gracefully regardless
+        if x[SG_PATH_FIELD] is None:
+            log.debug("No path associated with entry for %s. Skipping." % entity)
+            return None
+        
+        # retired storage case - see above for details
+        if x[SG_PATH_FIELD].get("local_storage") is None:
+            log.debug("The storage for the path for %s has been deleted. Skipping." % entity)
+            return None
+            
+        # get the local path from our attachment entity dict
+        sg_local_storage_os_map = {"linux2": "local_path_linux", 
+                                   "win32": "local_path_windows", 
+                                   "darwin": "local_path_mac" }
+        local_os_path_field = sg_local_storage_os_map[sys.platform]
+        local_os_path = x[SG_PATH_FIELD].get(local_os_path_field)
+
+        # if the storage is not correctly configured for an OS, it is possible
+        # that the path comes back as null. Skip such paths and report them in the log.
+        if local_os_path is None:
+            log.debug("No local os path associated with entry for %s. Skipping." % entity)
+            return None
+
+        # if the path cannot be split up into a root_name and a leaf path
+        # using the roots.yml file, log a warning and skip the entry. This can happen
+        # if roots files and storage setups change half-way through a project,
+        # or if roots files are not in sync with the main storage definition
+        # in this case, we want to just warn and skip rather than raise
+        # an exception which will stop execution entirely.
+        try:
+            root_name, relative_path = self._separate_root(local_os_path)
+        except TankError, e:
+            log.debug("Could not resolve storages - skipping: %s" % e)
+            return None
+        
+        return (entity, local_os_path, root_name, relative_path, is_primary)
+
     ############################################################################################
     # pre-insertion validation
 
@@ -830,77 +1850,222 @@ class PathCache(object):
                       - path: a path on disk
                       - primary: a boolean indicating if this is a primary entry
                       - metadata: configuration metadata
+        :raises: TankError describing the first conflicting mapping
         """
-        for d in data:
-            self._validate_mapping(d["path"], d["entity"], d["primary"])
-        
-        
-    def _validate_mapping(self, path, entity, is_primary):
+        (conflicts, _) = self.check_mappings(data)
+        if conflicts:
+            raise TankError(conflicts[min(conflicts)])
+
+    def check_mappings(self, data):
         """
-        Consistency checks happening prior to folder creation. May raise a TankError
-        if an inconsistency is detected.
-        
-        :param path: The path calculated
-        :param entity: Sg entity dict with keys id, type and name
-        :param is_primary: indicates that this is a primary mapping - each folder may have
-                           both primary and secondary entity associations - the secondary
-                           being more loosely tied to the path.
+        Checks a series of path mappings against existing path cache data, 
+        reporting every conflicting mapping rather than just the first one.
+        All the mappings are checked at once, with a couple of queries.
+        
+        :param data: list of mapping dictionaries, see :meth:`validate_mappings`
+        :returns: Tuple with a dictionary of error messages, keyed by the index
+                  of the conflicting mappings in the list, and a set with the
+                  indices of the primary mappings already in the path cache.
         """
-        
-        # Make sure that there isn't already a record with the same
-        # name in the database and file system, but with a different id.
-        # We only do this for primary items - for secondary items, multiple items can exist
-        if is_primary:
-            entity_in_db = self.get_entity(path)
-            
-            if entity_in_db is not None:
-                if entity_in_db["id"] != entity["id"] or entity_in_db["type"] != entity["type"]:
-                    
-                    # there is already a record in the database for this path,
-                    # but associated with another entity! Display an error message
-                    # and ask that the user investigates using special tank commands.
-                    #
-                    # Note! We are only comparing against the type and the id
-                    # not against the name. It should be perfectly valid to rename something
-                    # in shotgun and if folders are then recreated for that item, nothing happens
-                    # because there is already a folder which represents that item. (although now with 
-                    # an incorrect name)
-
-                    msg  = "The path '%s' cannot be processed because it is already associated " % path
-                    msg += "with %s '%s' (id %s) in Shotgun. " % (entity_in_db["type"], entity_in_db["name"], entity_in_db["id"])
-                    msg += "You are now trying to associate it with %s '%s' (id %s). " % (entity["type"], entity["name"], entity["id"])
-                    msg += "If you want to unregister your previously created folders, you can run "
-                    msg += "the following command: 'tank unregister_folders %s' " % path
-                    raise TankError(msg)
-                
-        # Check 2. Check if a folder for this shot has already been created,
-        # but with another name. This can happen if someone
-        # - creates a shot AAA
-        # - creates folders on disk for Shot AAA
-        # - renamed the shot to BBB
-        # - tries to create folders. Now we don't want to create folders for BBB,
-        #   since we already have a location on disk for this shot. 
-        #
-        # note: this can also happen if the folder creation rules change.
-        #
-        # we only check for primary entities, doing the check for secondary
-        # would only be to carry out the same check twice.
-        if is_primary:
-            for p in self.get_paths(entity["type"], entity["id"], primary_only=False):
-                # so we got a path that matches our entity
-                if p != path and os.path.dirname(p) == os.path.dirname(path):
-                    # this path is identical to our path we are about to create except for the name. 
-                    # there is still a folder on disk. Abort folder creation
-                    # with a descriptive error message
-                    msg  = "The path '%s' cannot be created because another " % path
-                    msg += "path '%s' is already associated with %s %s. " % (p, entity["type"], entity["name"])
-                    msg += "This typically happens if an item in Shotgun is renamed or "
-                    msg += "if the path naming in the folder creation configuration "
-                    msg += "is changed. In order to continue you can either change "
-                    msg += "the %s back to its previous name or you can unregister " % entity["type"]
-                    msg += "the currently associated folders by running the following command: "
-                    msg += "'tank %s %s unregister_folders' and then try again." % (entity["type"], entity["name"])                    
-                    raise TankError(msg)
+        # validate against the shared path cache, which the mappings will be added to
+        c = self._connection.cursor()
+        try:
+            self._load_mapping_candidates(c, data, skip_unknown_roots=True)
+            entity_conflicts = self._get_entity_conflicts(c)
+            path_conflicts = self._get_path_conflicts(c, data)
+            registered = self._get_registered_candidates(c)
+        finally:
+            c.close()
+            # discard the candidates
+            self._connection.rollback()
+
+        # check the path of each mapping before its entity
+        conflicts = {}
+        for idx in set(entity_conflicts) | set(path_conflicts):
+            path = data[idx]["path"]
+            entity = data[idx]["entity"]
+
+            if idx in entity_conflicts:
+                entity_in_db = entity_conflicts[idx]
+
+                # there is already a record in the database for this path,
+                # but associated with another entity! Display an error message
+                # and ask that the user investigates using special tank commands.
+                #
+                # Note! We are only comparing against the type and the id
+                # not against the name. It should be perfectly valid to rename something
+                # in shotgun and if folders are then recreated for that item, nothing happens
+                # because there is already a folder which represents that item. (although now with 
+                # an incorrect name)
+
+                msg  = "The path '%s' cannot be processed because it is already associated " % path
+                msg += "with %s '%s' (id %s) in Shotgun. " % (entity_in_db["type"], entity_in_db["name"], entity_in_db["id"])
+                msg += "You are now trying to associate it with %s '%s' (id %s). " % (entity["type"], entity["name"], entity["id"])
+                msg += "If you want to unregister your previously created folders, you can run "
+                msg += "the following command: 'tank unregister_folders %s' " % path
+
+            else:
+                # this path is identical to our path we are about to create except for the name. 
+                # there is still a folder on disk. Abort folder creation
+                # with a descriptive error message
+                msg  = "The path '%s' cannot be created because another " % path
+                msg += "path '%s' is already associated with %s %s. " % (path_conflicts[idx], entity["type"], entity["name"])
+                msg += "This typically happens if an item in Shotgun is renamed or "
+                msg += "if the path naming in the folder creation configuration "
+                msg += "is changed. In order to continue you can either change "
+                msg += "the %s back to its previous name or you can unregister " % entity["type"]
+                msg += "the currently associated folders by running the following command: "
+                msg += "'tank %s %s unregister_folders' and then try again." % (entity["type"], entity["name"])                    
+
+            conflicts[idx] = msg
+
+        return (conflicts, registered)
+
+    def _load_mapping_candidates(self, cursor, data, skip_unknown_roots):
+        """
+        Loads path mappings into the path_cache_candidate temporary table, so that
+        they can be checked against the path cache with a few joins, rather than
+        with a few queries each.
+
+        The temporary table is only visible from the connection of the cursor, and
+        the candidates are kept until the current transaction is committed or rolled back.
+
+        :param cursor: Sqlite database cursor
+        :param data: list of mapping dictionaries, see :meth:`add_mappings`. The position
+                     of a mapping in the list is stored in the idx column.
+        :param skip_unknown_roots: If True, mappings with a path outside the storage roots
+                                   of the project have a null root and path, otherwise
+                                   a TankError is raised.
+        """
+        cursor.execute("""CREATE TEMP TABLE IF NOT EXISTS path_cache_candidate (idx integer PRIMARY KEY,
+                                                                                 entity_type text,
+                                                                                 entity_id integer,
+                                                                                 entity_name text,
+                                                                                 root text,
+                                                                                 path text,
+                                                                                 primary_entity integer,
+                                                                                 new integer)""")
+        cursor.execute("DELETE FROM path_cache_candidate")
+
+        rows = []
+        for (idx, d) in enumerate(data):
+            try:
+                root_name, relative_path = self._separate_root(d["path"])
+                db_path = self._path_to_dbpath(relative_path)
+            except TankError:
+                if not skip_unknown_roots:
+                    raise
+                # this path can't be in the path cache
+                root_name = db_path = None
+
+            rows.append((idx,
+                         d["entity"]["type"],
+                         d["entity"]["id"],
+                         d["entity"]["name"],
+                         root_name,
+                         db_path,
+                         d["primary"]))
+
+        cursor.executemany("""INSERT INTO path_cache_candidate(idx,
+                                                               entity_type,
+                                                               entity_id,
+                                                               entity_name,
+                                                               root,
+                                                               path,
+                                                               primary_entity,
+                                                               new)
+                              VALUES(?, ?, ?, ?, ?, ?, ?, 0)""", rows)
+
+    def _get_entity_conflicts(self, cursor):
+        """
+        Finds the primary mapping candidates whose path is already associated
+        with another entity in the path cache.
+
+        Note! We are only comparing against the type and the id not against the name.
+        It should be perfectly valid to rename something in shotgun and if folders are
+        then recreated for that item, nothing happens because there is already a folder
+        which represents that item. (although now with an incorrect name)
+
+        :param cursor: Sqlite database cursor, see :meth:`_load_mapping_candidates`
+        :returns: dictionary of the entity associated with the path in the path cache,
+                  keyed by mapping candidate index.
+        """
+        res = cursor.execute("""SELECT c.idx, pc.entity_type, pc.entity_id, pc.entity_name
+                                FROM path_cache_candidate c
+                                INNER JOIN path_cache pc ON pc.root = c.root
+                                                        AND pc.path = c.path
+                                                        AND pc.primary_entity = 1
+                                WHERE c.primary_entity = 1
+                                AND (pc.entity_type != c.entity_type OR pc.entity_id != c.entity_id)""")
+
+        conflicts = {}
+        for (idx, entity_type, entity_id, entity_name) in res:
+            # convert to string, not unicode!
+            conflicts[idx] = {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+        return conflicts
+
+    def _get_registered_candidates(self, cursor):
+        """
+        Finds the primary mapping candidates which are already in the path cache,
+        associated with the same entity.
+
+        :param cursor: Sqlite database cursor, see :meth:`_load_mapping_candidates`
+        :returns: set of mapping candidate indices.
+        """
+        res = cursor.execute("""SELECT c.idx
+                                FROM path_cache_candidate c
+                                INNER JOIN path_cache pc ON pc.root = c.root
+                                                        AND pc.path = c.path
+                                                        AND pc.primary_entity = 1
+                                                        AND pc.entity_type = c.entity_type
+                                                        AND pc.entity_id = c.entity_id
+                                WHERE c.primary_entity = 1""")
+        return set(idx for (idx,) in res)
+
+    def _get_path_conflicts(self, cursor, data):
+        """
+        Finds the primary mapping candidates whose entity is already associated
+        with another folder in the same parent folder. This can happen if someone
+        - creates a shot AAA
+        - creates folders on disk for Shot AAA
+        - renamed the shot to BBB
+        - tries to create folders. Now we don't want to create folders for BBB,
+          since we already have a location on disk for this shot. 
+
+        note: this can also happen if the folder creation rules change.
+
+        we only check for primary entities, doing the check for secondary
+        would only be to carry out the same check twice.
+
+        :param cursor: Sqlite database cursor, see :meth:`_load_mapping_candidates`
+        :param data: list of mapping dictionaries loaded as candidates
+        :returns: dictionary of the path already associated with the entity,
+                  keyed by mapping candidate index.
+        """
+        res = cursor.execute("""SELECT c.idx, pc.root, pc.path
+                                FROM path_cache_candidate c
+                                INNER JOIN path_cache pc ON pc.entity_type = c.entity_type
+                                                        AND pc.entity_id = c.entity_id
+                                WHERE c.primary_entity = 1
+                                ORDER BY c.idx, pc.rowid""")
+
+        conflicts = {}
+        for (idx, root_name, relative_path) in res:
+            if idx in conflicts:
+                continue
+
+            root_path = self._roots.get(root_name)
+            if not root_path:
+                # The root name doesn't match a recognized name, so skip this entry
+                continue
+
+            p = self._dbpath_to_path(root_path, relative_path)
+            path = data[idx]["path"]
+            if p != path and os.path.dirname(p) == os.path.dirname(path):
+                # so we got a path that matches our entity, with another name
+                conflicts[idx] = p
+
+        return conflicts
 
 
 
@@ -932,17 +2097,81 @@ class PathCache(object):
         
         c = self._connection.cursor()
         try:
+            candidates = self._get_unique_mappings(data)
+            self._load_mapping_candidates(c, candidates, skip_unknown_roots=False)
+
+            # the primary entity must be unique: path/id/type.
+            #
+            # Note! We are only comparing against the type and the id
+            # not against the name. It should be perfectly valid to rename something
+            # in shotgun and if folders are then recreated for that item, nothing happens
+            # because there is already a folder which repreents that item. (although now with
+            # an incorrect name)
+            #
+            # also note that we have already done this once as part of the validation checks -
+            # this time round, we are doing it more as an integrity check.
+            conflicts = self._get_entity_conflicts(c)
+            if conflicts:
+                idx = min(conflicts)
+                raise TankError("Database concurrency problems: The path '%s' is "
+                                "already associated with Shotgun entity %s. Please re-run "
+                                "folder creation to try again." % (candidates[idx]["path"], str(conflicts[idx])))
+
+            # flag the mappings which are not in the db yet. A primary mapping is in the
+            # db if its path is registered, which we now know is with the same entity.
+            # For secondary entities, it is okay with more than one record for a path
+            # but we don't want to insert the exact same record over and over again
+            c.execute("""UPDATE path_cache_candidate SET new = 1
+                         WHERE (primary_entity = 1 AND NOT EXISTS (
+                                    SELECT 1 FROM path_cache pc
+                                    WHERE pc.root = path_cache_candidate.root
+                                    AND pc.path = path_cache_candidate.path
+                                    AND pc.primary_entity = 1))
+                         OR (primary_entity = 0 AND NOT EXISTS (
+                                    SELECT 1 FROM path_cache pc
+                                    WHERE pc.entity_type = path_cache_candidate.entity_type
+                                    AND pc.entity_id = path_cache_candidate.entity_id
+                                    AND pc.root = path_cache_candidate.root
+                                    AND pc.path = path_cache_candidate.path))""")
+            num_new = c.rowcount
+
+            # note: the INSERT OR IGNORE INTO checks if we already have a
+            # record in the db for this combination - if we do, another process
+            # registered it since we checked, and we bail out rather than
+            # uploading it to Shotgun a second time.
+            c.execute("""INSERT OR IGNORE INTO path_cache(entity_type,
+                                                          entity_id,
+                                                          entity_name,
+                                                          root,
+                                                          path,
+                                                          primary_entity)
+                         SELECT entity_type, entity_id, entity_name, root, path, primary_entity
+                         FROM path_cache_candidate
+                         WHERE new = 1
+                         ORDER BY idx""")
+            if c.rowcount != num_new:
+                raise TankError("Database concurrency problems: %d of the folders were registered "
+                                "by another process at the same time. Please re-run folder creation "
+                                "to try again." % (num_new - c.rowcount))
+
+            # these entries weren't already in the db. So add them to the list to
+            # potentially upload to SG later on, with their path cache row id
             data_for_sg = []
-            
-            for d in data:
-                new_rowid = self._add_db_mapping(c, d["path"], d["entity"], d["primary"]) 
-                if new_rowid:
-                    # this entry wasn't already in the db. So add it to the list to
-                    # potentially upload to SG later on
-                    data_for_sg.append(d)
-                    # append path cache row id to data
-                    d["path_cache_row_id"] = new_rowid
-                    
+            res = c.execute("""SELECT c.idx, pc.rowid
+                               FROM path_cache_candidate c
+                               INNER JOIN path_cache pc ON pc.entity_type = c.entity_type
+                                                       AND pc.entity_id = c.entity_id
+                                                       AND pc.root = c.root
+                                                       AND pc.path = c.path
+                                                       AND pc.primary_entity = c.primary_entity
+                               WHERE c.new = 1
+                               ORDER BY c.idx""")
+            for (idx, rowid) in list(res):
+                d = candidates[idx]
+                d["path_cache_row_id"] = rowid
+                data_for_sg.append(d)
+
+            c.execute("DELETE FROM path_cache_candidate")
                 
             # now, if there were any FilesystemLocation records created,
             # create an event log entry that links back to those entries.
@@ -959,9 +2188,8 @@ class PathCache(object):
                 c.execute("DELETE FROM event_log_sync")
                 c.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (event_log_id, ))
                 # and indicate in the path cache that all these records have been pushed
-                for (pc_row_id, sg_id) in sg_id_lookup.items():
-                    c.execute("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
-                              "VALUES(?, ?)", (pc_row_id, sg_id) )
+                c.executemany("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
+                              "VALUES(?, ?)", sg_id_lookup.items())
                     
 
         except:
@@ -977,9 +2205,50 @@ class PathCache(object):
         finally:
             c.close()
 
+        if data_for_sg:
+            # the replica and the in-memory copy don't have the new entries yet
+            self._invalidate_replica()
+            self._invalidate_snapshot()
+            self._tk.context_cache.invalidate()
 
 
 
+
+    def _get_unique_mappings(self, data):
+        """
+        Removes the duplicates from a list of mappings, keeping the first one.
+        A primary mapping duplicates an earlier primary mapping for the same path,
+        and a secondary mapping any earlier mapping of the same entity to the same path.
+
+        :param data: list of mapping dictionaries, see :meth:`add_mappings`
+        :returns: list of mapping dictionaries
+        :raises: TankError if two primary mappings associate a path with different entities.
+        """
+        unique_mappings = []
+        primary_entities = {}
+        entity_paths = set()
+        for d in data:
+            path = d["path"]
+            entity_key = (d["entity"]["type"], d["entity"]["id"], path)
+
+            if d["primary"]:
+                entity = primary_entities.get(path)
+                if entity is not None:
+                    if entity["type"] != d["entity"]["type"] or entity["id"] != d["entity"]["id"]:
+                        raise TankError("Database concurrency problems: The path '%s' is "
+                                        "already associated with Shotgun entity %s. Please re-run "
+                                        "folder creation to try again." % (path, str(entity)))
+                    continue
+                primary_entities[path] = d["entity"]
+
+            elif entity_key in entity_paths:
+                continue
+
+            entity_paths.add(entity_key)
+            unique_mappings.append(d)
+
+        return unique_mappings
+
     def _add_db_mapping(self, cursor, path, entity, primary):
         """
         Adds an association to the database. If the association already exists, it will
@@ -1141,12 +2410,14 @@ class PathCache(object):
         matches.append( {"path": self._dbpath_to_path(root_path, path), "sg_id": shotgun_id } )
                          
         
-        # now get all paths that are child paths
-        like_path = "%s/%%" % path
+        # now get all paths that are child paths. These are the paths between
+        # "path/" and "path0", '0' being the character following '/', which
+        # is a range of the path index, unlike a "path/%" like pattern.
         res = c.execute("""SELECT pc.root, pc.path, ss.shotgun_id
                           FROM path_cache pc
                           INNER JOIN shotgun_status ss on pc.rowid = ss.path_cache_id
-                          WHERE root = ? and path like ?""", (root_name, like_path))
+                          WHERE root = ? and path >= ? and path < ?""",
+                        (root_name, "%s/" % path, "%s0" % path))
         
         for x in list(res):
             root_name = x[0]
@@ -1174,36 +2445,48 @@ class PathCache(object):
             # no entries because we don't have a path cache
             return []
         
-        paths = []
-        
+        snapshot = self._get_snapshot() if cursor is None else None
+        if snapshot is not None:
+            return self._rows_to_paths(snapshot.get_paths(entity_type, entity_id, primary_only))
+
         # use built in cursor unless specifically provided - means this
         # is part of a larger transaction
-        c = cursor or self._connection.cursor()
+        c = cursor or self._read_connection.cursor()
         
         try:
             if primary_only:
                 res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ? and primary_entity = 1", (entity_type, entity_id))
             else:
                 res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id))
-    
-            for row in res:
-                root_name = row[0]
-                relative_path = row[1]
-                
-                root_path = self._roots.get(root_name)
-                if not root_path:
-                    # The root name doesn't match a recognized name, so skip this entry
-                    continue
-                
-                # assemble path
-                path_str = self._dbpath_to_path(root_path, relative_path)
-                paths.append(path_str)
+            paths = self._rows_to_paths(res)
         finally:        
             if cursor is None:
                 c.close()
         
         return paths
 
+    def _rows_to_paths(self, rows):
+        """
+        Converts root names and db paths to paths on disk.
+
+        :param rows: (root name, db path) tuples
+        :returns: list of paths on disk, skipping the ones in unknown roots.
+        """
+        paths = []
+        for row in rows:
+            root_name = row[0]
+            relative_path = row[1]
+            
+            root_path = self._roots.get(root_name)
+            if not root_path:
+                # The root name doesn't match a recognized name, so skip this entry
+                continue
+            
+            # assemble path
+            path_str = self._dbpath_to_path(root_path, relative_path)
+            paths.append(path_str)
+        return paths
+
     def get_entity(self, path, cursor=None):
         """
         Returns an entity given a path.
@@ -1234,12 +2517,17 @@ class PathCache(object):
             # eg. doesn't belong to the project
             return None
 
+        db_path = self._path_to_dbpath(relative_path)
+
+        snapshot = self._get_snapshot() if cursor is None else None
+        if snapshot is not None:
+            return snapshot.get_entity(root_path, db_path)
+
         # use built in cursor unless specifically provided - means this
         # is part of a larger transaction
-        c = cursor or self._connection.cursor()        
+        c = cursor or self._read_connection.cursor()        
 
         try:
-            db_path = self._path_to_dbpath(relative_path)
             res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 1", (db_path, root_path))
             data = list(res)
         finally:
@@ -1277,9 +2565,14 @@ class PathCache(object):
             # eg. doesn't belong to the project
             return []
 
-        c = self._connection.cursor()
+        db_path = self._path_to_dbpath(relative_path)
+
+        snapshot = self._get_snapshot()
+        if snapshot is not None:
+            return snapshot.get_secondary_entities(root_path, db_path)
+
+        c = self._read_connection.cursor()
         try:
-            db_path = self._path_to_dbpath(relative_path)
             res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 0", (db_path, root_path))
             data = list(res)
         finally:
@@ -1295,6 +2588,179 @@ class PathCache(object):
         return matches
     
 
+    def get_ancestor_entities(self, path):
+        """
+        Returns the primary and secondary entities for a path and for
+        each of its parent folders, up to the storage root the path belongs to.
+        All the folders are looked up with a single database query.
+
+        :param path: a path on disk
+        :returns: list of (path, entity, secondary entities) tuples, one for the path and
+                  each of its parents, starting with the path itself. Entity is a shotgun
+                  entity dict as returned by :meth:`get_entity` or None, and secondary entities
+                  a list of entity dicts as returned by :meth:`get_secondary_entities`.
+        """
+        if path is None:
+            # basic sanity checking
+            return []
+
+        return self.get_ancestor_entities_many([path])[path]
+
+    def get_ancestor_entities_many(self, paths):
+        """
+        Returns the primary and secondary entities for several paths and their
+        parent folders. This is equivalent to calling :meth:`get_ancestor_entities`
+        for each path, but folders shared by several paths are only looked up once,
+        and all the folders are looked up with a few database queries.
+
+        :param paths: list of paths on disk
+        :returns: dictionary keyed by path, with values as returned by
+                  :meth:`get_ancestor_entities`. None paths are skipped.
+        """
+        # gather all roots as lower case
+        project_roots = set(x.lower() for x in self._tk.pipeline_configuration.get_data_roots().values())
+
+        # ancestors of each path and folder seen so far
+        ancestors = {}
+        for path in paths:
+            if path is not None and path not in ancestors:
+                self._get_ancestor_paths(path, project_roots, ancestors)
+
+        if self._path_cache_disabled:
+            # no entries because we don't have a path cache
+            return dict(
+                (path, [(ancestor, None, []) for ancestor in ancestors[path]])
+                for path in paths if path is not None
+            )
+
+        # db paths keyed by root name, so that the queries can use the (root, path) index
+        db_paths = {}
+        ancestor_keys = {}
+        key_paths = {}
+        for ancestor in ancestors:
+            try:
+                root_name, relative_path = self._separate_root(ancestor)
+            except TankError:
+                # fail gracefully if path is not a valid path
+                # eg. doesn't belong to the project
+                ancestor_keys[ancestor] = None
+                continue
+            db_path = self._path_to_dbpath(relative_path)
+            db_paths.setdefault(root_name, []).append(db_path)
+            ancestor_keys[ancestor] = (root_name, db_path)
+            key_paths[(root_name, db_path)] = ancestor
+
+        primary_entities = {}
+        secondary_entities = {}
+
+        snapshot = self._get_snapshot()
+        if snapshot is not None:
+            for key in key_paths:
+                primary_entities[key] = snapshot.get_entity(*key)
+                secondary_entities[key] = snapshot.get_secondary_entities(*key)
+
+        elif db_paths:
+            c = self._read_connection.cursor()
+            try:
+                for (conditions, values) in self._get_db_path_conditions(db_paths):
+                    res = c.execute(
+                        "SELECT root, path, entity_type, entity_id, entity_name, primary_entity "
+                        "FROM path_cache WHERE %s ORDER BY rowid" % conditions,
+                        values
+                    )
+                    for (root_name, db_path, entity_type, entity_id, entity_name, primary) in res:
+                        # convert to string, not unicode!
+                        entity = {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+                        key = (root_name, db_path)
+                        if primary:
+                            if key in primary_entities:
+                                # never supposed to happen!
+                                raise TankError("More than one entry in path database for %s!" % key_paths[key])
+                            primary_entities[key] = entity
+                        else:
+                            secondary_entities.setdefault(key, []).append(entity)
+            finally:
+                c.close()
+
+        results = {}
+        for path in paths:
+            if path is None:
+                continue
+            results[path] = [
+                (ancestor, primary_entities.get(key), secondary_entities.get(key, []))
+                for (ancestor, key) in ((x, ancestor_keys[x]) for x in ancestors[path])
+            ]
+        return results
+
+    def _get_db_path_conditions(self, db_paths):
+        """
+        Splits a lookup of db paths in several queries, to stay
+        below the maximum number of parameters of a sqlite query.
+
+        :param db_paths: lists of db paths keyed by root name
+        :returns: list of (where clause, values) tuples
+        """
+        queries = []
+        conditions = []
+        values = []
+        for root_name, root_db_paths in db_paths.iteritems():
+            # one parameter is used by the root name
+            chunk_size = self._MAX_QUERY_PARAMETERS - 1
+            for i in range(0, len(root_db_paths), chunk_size):
+                chunk = root_db_paths[i:i + chunk_size]
+                if values and len(values) + len(chunk) + 1 > self._MAX_QUERY_PARAMETERS:
+                    queries.append((" OR ".join(conditions), values))
+                    conditions = []
+                    values = []
+                conditions.append("(root = ? AND path IN (%s))" % ",".join("?" * len(chunk)))
+                values.append(root_name)
+                values.extend(chunk)
+        if conditions:
+            queries.append((" OR ".join(conditions), values))
+        return queries
+
+    def _get_ancestor_paths(self, path, project_roots=None, ancestors=None):
+        """
+        Returns a path and its parent folders, up to the storage root
+        it belongs to, or up to the file system root for paths which
+        are not part of the project.
+
+        :param path: a path on disk
+        :param project_roots: lower case storage root paths
+        :param ancestors: dictionary of the ancestors of the paths already walked,
+                          keyed by path. The ancestors of the given path and of its
+                          parents are added to it, and the walk stops at the first
+                          parent already in it.
+        :returns: list of paths, starting with the path itself.
+        """
+        if project_roots is None:
+            # gather all roots as lower case
+            project_roots = [x.lower() for x in self._tk.pipeline_configuration.get_data_roots().values()]
+        if ancestors is None:
+            ancestors = {}
+
+        walked = [path]
+        curr_path = path
+        while curr_path.lower() not in project_roots:
+            #TODO this could fail with windows path variations
+            parent_path = os.path.abspath(os.path.join(curr_path, ".."))
+            if parent_path == curr_path:
+                # We're at the disk root, probably a degenerate path
+                break
+            if parent_path in ancestors:
+                # the rest of the walk is already known
+                walked.extend(ancestors[parent_path])
+                break
+            walked.append(parent_path)
+            curr_path = parent_path
+
+        for (i, ancestor) in enumerate(walked):
+            if ancestor in ancestors:
+                break
+            ancestors[ancestor] = walked[i:]
+
+        return walked
+
     def ensure_all_entries_are_in_shotgun(self):
         """
         Ensures that all the path cache data in this database is also registered in Shotgun.
@@ -99,6 +99,58 @@ class PipelineConfiguration(object):
             "use_shotgun_path_cache",
             False
         )
+        self._use_path_cache_replica = pipeline_config_metadata.get(
+            "use_path_cache_replica",
+            False
+        )
+        self._path_cache_replica_max_age = pipeline_config_metadata.get(
+            "path_cache_replica_max_age",
+            constants.DEFAULT_PATH_CACHE_REPLICA_MAX_AGE
+        )
+        self._use_path_cache_snapshot = pipeline_config_metadata.get(
+            "use_path_cache_snapshot",
+            False
+        )
+        self._path_cache_snapshot_max_rows = pipeline_config_metadata.get(
+            "path_cache_snapshot_max_rows",
+            constants.DEFAULT_PATH_CACHE_SNAPSHOT_MAX_ROWS
+        )
+        self._use_path_cache_wal = pipeline_config_metadata.get(
+            "use_path_cache_wal",
+            False
+        )
+        self._path_cache_upload_batch_size = pipeline_config_metadata.get(
+            "path_cache_upload_batch_size",
+            constants.DEFAULT_PATH_CACHE_UPLOAD_BATCH_SIZE
+        )
+        self._path_cache_slow_query_threshold = pipeline_config_metadata.get(
+            "path_cache_slow_query_threshold",
+            constants.DEFAULT_PATH_CACHE_SLOW_QUERY_THRESHOLD
+        )
+        self._context_cache_ttl = pipeline_config_metadata.get(
+            "context_cache_ttl",
+            constants.DEFAULT_CONTEXT_CACHE_TTL
+        )
+        self._template_fields_cache_size = pipeline_config_metadata.get(
+            "template_fields_cache_size",
+            constants.DEFAULT_TEMPLATE_FIELDS_CACHE_SIZE
+        )
+        self._filesystem_scan_max_workers = pipeline_config_metadata.get(
+            "filesystem_scan_max_workers",
+            constants.DEFAULT_FILESYSTEM_SCAN_MAX_WORKERS
+        )
+        self._use_templates_cache = pipeline_config_metadata.get(
+            "use_templates_cache",
+            False
+        )
+        self._folder_creation_max_workers = pipeline_config_metadata.get(
+            "folder_creation_max_workers",
+            constants.DEFAULT_FOLDER_CREATION_MAX_WORKERS
+        )
+        self._use_schema_cache = pipeline_config_metadata.get(
+            "use_schema_cache",
+            False
+        )
 
         # figure out whether to use the bundle cache or the
         # local pipeline configuration 'install' cache
@@ -435,7 +487,130 @@ class PipelineConfiguration(object):
         self._update_metadata({"use_shotgun_path_cache": True})
         self._use_shotgun_path_cache = True
 
-        
+    def get_path_cache_replica_enabled(self):
+        """
+        Returns true if path cache lookups should be served by a copy of the
+        path cache stored in the local cache folder, synchronized with Shotgun,
+        rather than by the path cache file shared with other machines.
+        Writes always go to the shared path cache.
+
+        Only used when the shotgun path cache is enabled.
+        """
+        return self._use_path_cache_replica
+
+    def get_path_cache_replica_max_age(self):
+        """
+        Returns the number of seconds after which the local copy of the
+        path cache is synchronized with Shotgun again before being read.
+        """
+        return self._path_cache_replica_max_age
+
+    def get_path_cache_snapshot_enabled(self):
+        """
+        Returns true if path cache lookups should be answered from an in-memory
+        copy of the path cache, loaded once and reloaded when the path cache changes.
+        """
+        return self._use_path_cache_snapshot
+
+    def get_path_cache_snapshot_max_rows(self):
+        """
+        Returns the maximum number of path cache entries loaded in memory.
+        Lookups in a larger path cache are made against the database.
+        """
+        return self._path_cache_snapshot_max_rows
+
+    def get_path_cache_wal_enabled(self):
+        """
+        Returns true if the path cache databases should use write-ahead logging,
+        so that reading the path cache doesn't block writing to it and vice versa.
+        Write-ahead logging requires all the processes using a database to run on
+        the same machine, so this should only be enabled for path caches
+        stored on a local filesystem.
+        """
+        return self._use_path_cache_wal
+
+    def get_path_cache_upload_batch_size(self):
+        """
+        Returns the number of FilesystemLocation entities created in Shotgun
+        with each batch request when folders are registered in the path cache.
+        """
+        return self._path_cache_upload_batch_size
+
+    def get_path_cache_slow_query_threshold(self):
+        """
+        Returns the number of seconds above which path cache queries are logged.
+        """
+        return self._path_cache_slow_query_threshold
+
+    def get_context_cache_ttl(self):
+        """
+        Returns the number of seconds for which the contexts built from Shotgun
+        entities are cached. 0 means that contexts are not cached.
+        """
+        return self._context_cache_ttl
+
+    ########################################################################################
+    # templates
+
+    def get_template_fields_cache_size(self):
+        """
+        Returns the maximum number of paths for which each template keeps
+        the fields extracted by :meth:`Template.get_fields` in memory.
+        0 means that results are not cached.
+        """
+        return self._template_fields_cache_size
+
+    def get_filesystem_scan_max_workers(self):
+        """
+        Returns the default number of threads used to list directories
+        when searching for files matching a template.
+        """
+        return self._filesystem_scan_max_workers
+
+    def get_templates_cache_enabled(self):
+        """
+        Returns true if the templates configuration should be cached
+        on disk, see :meth:`get_templates_cache_location`.
+        """
+        return self._use_templates_cache
+
+    def get_templates_cache_location(self):
+        """
+        Returns the path to the file holding the templates configuration with
+        its includes processed, so that the templates configuration doesn't
+        need to be parsed again as long as none of its files change.
+
+        :returns: path string
+        """
+        return os.path.join(self._pc_root, constants.TEMPLATES_CACHE_FILE)
+
+    ########################################################################################
+    # folder creation
+
+    def get_folder_creation_max_workers(self):
+        """
+        Returns the number of threads used to create folders on disk
+        by the default folder creation hook.
+        """
+        return self._folder_creation_max_workers
+
+    def get_schema_cache_enabled(self):
+        """
+        Returns true if the folder schema scanned from the configuration should
+        be cached on disk, see :meth:`get_schema_cache_location`.
+        """
+        return self._use_schema_cache
+
+    def get_schema_cache_location(self):
+        """
+        Returns the path to the file holding the folder schema scanned from the
+        configuration, so that the schema folder doesn't need to be scanned
+        again as long as none of its files change.
+
+        :returns: path string
+        """
+        return os.path.join(self._pc_root, constants.SCHEMA_CACHE_FILE)
+
     ########################################################################################
     # storage roots related
         
@@ -851,25 +1026,37 @@ class PipelineConfiguration(object):
         """
         return os.path.join(self._pc_root, "config", "env", "%s.yml" % env_name)
     
-    def get_templates_config(self):
+    def get_templates_config(self, dependencies=None):
         """
         Returns the templates configuration as an object
+
+        :param dependencies: Optional dictionary filled with what the templates
+                             configuration was read from, see
+                             :meth:`~tank.template_includes.process_includes`.
         """
-        templates_file = os.path.join(
-            self._pc_root,
-            "config",
-            "core",
-            constants.CONTENT_TEMPLATES_FILE,
-        )
+        templates_file = self.get_templates_config_location()
 
         try:
             data = yaml_cache.g_yaml_cache.get(templates_file, deepcopy_data=False)
-            data = template_includes.process_includes(templates_file, data)
+            data = template_includes.process_includes(templates_file, data, dependencies)
         except TankUnreadableFileError:
             data = dict()
 
         return data
 
+    def get_templates_config_location(self):
+        """
+        Returns the path to the main templates configuration file.
+
+        :returns: path string
+        """
+        return os.path.join(
+            self._pc_root,
+            "config",
+            "core",
+            constants.CONTENT_TEMPLATES_FILE,
+        )
+
     ########################################################################################
     # helpers and internal
 
@@ -16,11 +16,14 @@ Management of file and directory templates.
 import os
 import re
 import sys
+import threading
+from collections import OrderedDict
 
 from . import templatekey
 from .errors import TankError
 from . import constants
 from .template_path_parser import TemplatePathParser
+from . import template_cache
 
 class Template(object):
     """
@@ -103,6 +106,26 @@ class Template(object):
         # string which will be prefixed to definition
         self._prefix = ''
         self._static_tokens = []
+        # parsers for each definition variation, see _get_path_parsers
+        self._path_parsers = None
+        # formatters for each definition variation, see _get_formatters
+        self._formatters = None
+
+        # names of the keys which need a value for a variation to be used, the
+        # variation used by apply_fields only depends on which of them have one.
+        self._required_key_names = sorted(set(
+            key.name for keys in self._keys for key in keys.values() if key.default is None
+        ))
+        # (index, missing keys) tuples keyed by which required keys have a value,
+        # see _get_variation_index
+        self._variation_cache = {}
+
+        # most recently used get_fields results, keyed by (path, skip keys)
+        self._fields_cache = OrderedDict()
+        self._fields_cache_lock = threading.Lock()
+        self._fields_cache_size = constants.DEFAULT_TEMPLATE_FIELDS_CACHE_SIZE
+        self._fields_cache_hits = 0
+        self._fields_cache_misses = 0
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -132,6 +155,45 @@ class Template(object):
         # First keys should be most inclusive
         return self._keys[0].copy()
 
+    @property
+    def fields_cache_size(self):
+        """
+        Maximum number of paths for which the result of :meth:`get_fields` is
+        kept in memory. Setting it to 0 disables the cache.
+        """
+        return self._fields_cache_size
+
+    @fields_cache_size.setter
+    def fields_cache_size(self, value):
+        with self._fields_cache_lock:
+            self._fields_cache_size = max(0, int(value))
+            while len(self._fields_cache) > self._fields_cache_size:
+                self._fields_cache.popitem(last=False)
+
+    @property
+    def fields_cache_hits(self):
+        """
+        Number of :meth:`get_fields` calls for which a cached result was used.
+        """
+        return self._fields_cache_hits
+
+    @property
+    def fields_cache_misses(self):
+        """
+        Number of :meth:`get_fields` calls for which the path had to be parsed.
+        """
+        return self._fields_cache_misses
+
+    def clear_fields_cache(self):
+        """
+        Clears the cached :meth:`get_fields` results and resets the
+        hit and miss counters.
+        """
+        with self._fields_cache_lock:
+            self._fields_cache.clear()
+            self._fields_cache_hits = 0
+            self._fields_cache_misses = 0
+
     def is_optional(self, key_name):
         """
         Returns true if the given key name is optional for this template.
@@ -242,7 +304,86 @@ class Template(object):
         """
         return self._apply_fields(fields, platform=platform)
 
-    def _apply_fields(self, fields, ignore_types=None, platform=None):
+    def apply_fields_many(self, fields_list, platform=None):
+        """
+        Creates paths using several sets of fields. Example::
+
+            >>> template_path.apply_fields_many([{"Shot": "shot_1", "version": 1},
+                                                 {"Shot": "shot_2", "version": 3}])
+            ['/studio_root/sgtk/demo_project_1/shots/shot_1/v001.ma',
+             '/studio_root/sgtk/demo_project_1/shots/shot_2/v003.ma']
+
+        This is equivalent to calling :meth:`apply_fields` for each set of fields,
+        but values shared by several sets of fields, e.g. the sequence and shot of
+        all the frames of an image sequence, are only validated and formatted once.
+
+        :param fields_list: List of mappings of keys to fields. Keys must match
+                            those in template definition.
+        :param platform: Optional operating system platform. See :meth:`apply_fields`.
+
+        :returns: List of paths, in the same order as the fields.
+        :raises: :class:`TankError` if a path can't be created for one of the sets of fields.
+        """
+        values_cache = {}
+        return [
+            self._apply_fields(fields, platform=platform, values_cache=values_cache)
+            for fields in fields_list
+        ]
+
+    def _get_variation_index(self, fields):
+        """
+        Finds the most inclusive definition variation for which all keys
+        have a value in the given fields.
+
+        :param fields: Mapping of keys to fields.
+        :returns: Tuple of (index, missing keys). The index is None if no variation
+                  can be used, in which case missing keys lists the keys missing
+                  for the least inclusive variation.
+        """
+        # keys with a default value are never missing, so the variation only
+        # depends on which of the other keys have a value.
+        signature = tuple(fields.get(name) is None for name in self._required_key_names)
+        cached = self._variation_cache.get(signature)
+        if cached is None:
+            missing_keys = []
+            for index, cur_keys in enumerate(self._keys):
+                missing_keys = self._missing_keys(fields, cur_keys, skip_defaults=True)
+                if not missing_keys:
+                    missing_keys = []
+                    break
+            else:
+                index = None
+            cached = (index, tuple(missing_keys))
+            self._variation_cache[signature] = cached
+
+        (index, missing_keys) = cached
+        return (index, list(missing_keys))
+
+    def _get_formatters(self):
+        """
+        Returns the formatters used to create paths from fields, one per
+        definition variation. A formatter is a list of ``(text, key)`` tuples,
+        where key is None for the static parts of the definition. Formatters
+        are created on first use and reused afterwards.
+
+        :returns: List of formatters.
+        """
+        if self._formatters is None:
+            regex = r"{(%s)}" % constants.TEMPLATE_KEY_NAME_REGEX
+            formatters = []
+            for definition, keys in zip(self._definitions, self._keys):
+                formatter = []
+                # the split alternates static text and key names
+                for position, token in enumerate(re.split(regex, definition)):
+                    if position % 2:
+                        formatter.append((token, keys[token]))
+                    elif token:
+                        formatter.append((token, None))
+                formatters.append(formatter)
+            self._formatters = formatters
+        return self._formatters
+
+    def _apply_fields(self, fields, ignore_types=None, platform=None, values_cache=None):
         """
         Creates path using fields.
 
@@ -255,35 +396,50 @@ class Template(object):
                          current operating system. If you pass in a sys.platform-style string
                          (e.g. 'win32', 'linux2' or 'darwin'), paths will be generated to 
                          match that platform.
+        :param values_cache: Optional dictionary used to store formatted values, so
+                             they can be reused across calls.
 
         :returns: Full path, matching the template with the given fields inserted.
         """        
         ignore_types = ignore_types or []
 
         # find largest key mapping without missing values
-        keys = None
         # index of matching keys will be used to find cleaned_definition
-        index = -1
-        for index, cur_keys in enumerate(self._keys):
-            missing_keys = self._missing_keys(fields, cur_keys, skip_defaults=True)
-            if not missing_keys:
-                keys = cur_keys
-                break
-
-        
-        if keys is None:
+        (index, missing_keys) = self._get_variation_index(fields)
+        if index is None:
             raise TankError("Tried to resolve a path from the template %s and a set "
                             "of input fields '%s' but the following required fields were missing "
                             "from the input: %s" % (self, fields, missing_keys))
 
         # Process all field values through template keys 
-        processed_fields = {}
-        for key_name, key in keys.items():
-            value = fields.get(key_name)
-            ignore_type =  key_name in ignore_types
-            processed_fields[key_name] = key.str_from_value(value, ignore_type=ignore_type)
+        tokens = []
+        for (text, key) in self._get_formatters()[index]:
+            if key is None:
+                tokens.append(text)
+                continue
+
+            value = fields.get(key.name)
+            ignore_type = key.name in ignore_types
+            if values_cache is None or value is None:
+                # default values may change between calls, e.g. timestamps
+                tokens.append(key.str_from_value(value, ignore_type=ignore_type))
+                continue
 
-        return self._cleaned_definitions[index] % processed_fields
+            # the type is part of the cache key since 1 == 1.0 == True
+            cache_key = (key, ignore_type, type(value), value)
+            try:
+                text = values_cache.get(cache_key)
+            except TypeError:
+                # unhashable value
+                cache_key = None
+                text = None
+            if text is None:
+                text = key.str_from_value(value, ignore_type=ignore_type)
+                if cache_key is not None:
+                    values_cache[cache_key] = text
+            tokens.append(text)
+
+        return "".join(tokens)
 
     def _definition_variations(self, definition):
         """
@@ -360,6 +516,15 @@ class Template(object):
         # Remove empty strings
         return [x for x in tokens if x]
 
+    def _adjust_path(self, input_path):
+        """
+        Adjusts a path prior to parsing it with the static tokens of this template.
+
+        :param input_path: Path to adjust.
+        :returns: The path the template parser should process.
+        """
+        return input_path
+
     @property
     def parent(self):
         """
@@ -435,6 +600,21 @@ class Template(object):
         """
         return self.validate_and_get_fields(path, fields, skip_keys) != None
         
+    def _get_path_parsers(self):
+        """
+        Returns the parsers used to extract fields from paths, one per
+        definition variation. Parsers are created on first use and reused
+        afterwards, since they compile matching expressions on construction.
+
+        :returns: List of :class:`TemplatePathParser` objects.
+        """
+        if self._path_parsers is None:
+            self._path_parsers = [
+                TemplatePathParser(ordered_keys, static_tokens)
+                for ordered_keys, static_tokens in zip(self._ordered_keys, self._static_tokens)
+            ]
+        return self._path_parsers
+
     def get_fields(self, input_path, skip_keys=None):
         """
         Extracts key name, value pairs from a string. Example::
@@ -456,19 +636,92 @@ class Template(object):
         :returns: Values found in the path based on keys in template
         :rtype: Dictionary
         """
+        cache_key = (os.path.normpath(input_path), tuple(sorted(skip_keys or [])))
+
+        with self._fields_cache_lock:
+            # results are stored as (fields, error message) tuples
+            cached = self._fields_cache.pop(cache_key, None)
+            if cached is not None:
+                # move the entry back to the most recently used end
+                self._fields_cache[cache_key] = cached
+                self._fields_cache_hits += 1
+            else:
+                self._fields_cache_misses += 1
+
+        if cached is None:
+            cached = self._parse_fields(input_path, skip_keys)
+            if self._fields_cache_size:
+                with self._fields_cache_lock:
+                    self._fields_cache[cache_key] = cached
+                    while len(self._fields_cache) > self._fields_cache_size:
+                        self._fields_cache.popitem(last=False)
+
+        (fields, error) = cached
+        if fields is None:
+            raise TankError(error)
+
+        # return a copy so that the cached fields can't be modified by the caller
+        return dict(fields)
+
+    def get_fields_many(self, input_paths, skip_keys=None):
+        """
+        Extracts key name, value pairs from several strings. Example::
+
+            >>> template_path.get_fields_many([good_path, bad_path])
+            [({'Sequence': 'seq_1', 'Shot': 'shot_2', 'Step': 'comp', 'name': 'henry', 'version': 3}, None),
+             (None, "Template <Sgtk TemplatePath ...>: Tried to extract fields from path ...")]
+
+        Unlike :meth:`get_fields`, no exception is raised when a path doesn't
+        match the template, the error is returned for this path instead.
+
+        :param input_paths: Source paths for values
+        :type input_paths: List
+        :param skip_keys: Optional keys to skip
+        :type skip_keys: List
+
+        :returns: List with a ``(fields, error)`` tuple for each path, in the same
+                  order as the input paths. ``fields`` is None if the path doesn't
+                  match the template, in which case ``error`` describes the problem.
+        :rtype: List
+        """
+        # identical paths are only parsed once
+        results = {}
+        for input_path in input_paths:
+            if input_path in results:
+                continue
+            try:
+                results[input_path] = (self.get_fields(input_path, skip_keys), None)
+            except TankError, e:
+                results[input_path] = (None, str(e))
+
+        fields_list = []
+        for input_path in input_paths:
+            (fields, error) = results[input_path]
+            # each path gets its own copy of the fields
+            fields_list.append((dict(fields) if fields is not None else None, error))
+        return fields_list
+
+    def _parse_fields(self, input_path, skip_keys):
+        """
+        Parses a path with each definition variation until one of them matches.
+
+        :param input_path: Source path for values
+        :param skip_keys: Optional keys to skip
+        :returns: Tuple of (fields, error message), where fields is None if
+                  the path couldn't be parsed.
+        """
         path_parser = None
         fields = None
 
-        for ordered_keys, static_tokens in zip(self._ordered_keys, self._static_tokens):
-            path_parser = TemplatePathParser(ordered_keys, static_tokens)
+        for path_parser in self._get_path_parsers():
             fields = path_parser.parse_path(input_path, skip_keys)
             if fields != None:
                 break
 
         if fields is None:
-            raise TankError("Template %s: %s" % (str(self), path_parser.last_error))
+            return (None, "Template %s: %s" % (str(self), path_parser.last_error))
 
-        return fields
+        return (fields, None)
 
 
 class TemplatePath(Template):
@@ -527,7 +780,7 @@ class TemplatePath(Template):
             return TemplatePath(parent_definition, self.keys, self.root_path, None, self._per_platform_roots)
         return None
 
-    def _apply_fields(self, fields, ignore_types=None, platform=None):
+    def _apply_fields(self, fields, ignore_types=None, platform=None, values_cache=None):
         """
         Creates path using fields.
 
@@ -540,10 +793,12 @@ class TemplatePath(Template):
                          current operating system. If you pass in a sys.platform-style string
                          (e.g. 'win32', 'linux2' or 'darwin'), paths will be generated to 
                          match that platform.
+        :param values_cache: Optional dictionary used to store formatted values, so
+                             they can be reused across calls.
 
         :returns: Full path, matching the template with the given fields inserted.
         """        
-        relative_path = super(TemplatePath, self)._apply_fields(fields, ignore_types, platform)
+        relative_path = super(TemplatePath, self)._apply_fields(fields, ignore_types, platform, values_cache)
         
         if platform is None:
             # return the current OS platform's path
@@ -638,9 +893,17 @@ class TemplateString(Template):
         :returns: Values found in the path based on keys in template
         :rtype: Dictionary
         """
+        return super(TemplateString, self).get_fields(self._adjust_path(input_path), skip_keys=skip_keys)
+
+    def _adjust_path(self, input_path):
+        """
+        Adjusts a string prior to parsing it with the static tokens of this template.
+
+        :param input_path: String to adjust.
+        :returns: The string prefixed with the template prefix.
+        """
         # add path prefix as original design was to require project root
-        adj_path = os.path.join(self._prefix, input_path)
-        return super(TemplateString, self).get_fields(adj_path, skip_keys=skip_keys)
+        return os.path.join(self._prefix, input_path)
 
 def split_path(input_path):
     """
@@ -665,8 +928,40 @@ def read_templates(pipeline_configuration):
     :returns: Dictionary of form {template name: template object}
     """    
     per_platform_roots = pipeline_configuration.get_all_platform_data_roots()
-    data = pipeline_configuration.get_templates_config()            
-    
+
+    data = None
+    use_cache = pipeline_configuration.get_templates_cache_enabled()
+    if use_cache:
+        cache_file = pipeline_configuration.get_templates_cache_location()
+        templates_file = pipeline_configuration.get_templates_config_location()
+        data = template_cache.load_templates_config(cache_file, templates_file, per_platform_roots)
+
+    if data is None:
+        dependencies = {}
+        data = pipeline_configuration.get_templates_config(dependencies)
+        if use_cache:
+            template_cache.save_templates_config(cache_file, data, templates_file,
+                                                 per_platform_roots, dependencies)
+
+    templates = _make_templates(data, per_platform_roots)
+
+    cache_size = pipeline_configuration.get_template_fields_cache_size()
+    for template in templates.values():
+        template.fields_cache_size = cache_size
+
+    return templates
+
+
+def _make_templates(data, per_platform_roots):
+    """
+    Creates templates and keys based on the templates configuration.
+
+    :param data: Templates configuration, with includes processed.
+    :param per_platform_roots: Root paths for all platforms. nested dictionary first keyed by
+                               storage root name and then by sys.platform-style os name.
+
+    :returns: Dictionary of form {template name: template object}
+    """
     # get dictionaries from the templates config file:
     def get_data_section(section_name):
         # support both the case where the section 
@@ -688,6 +983,7 @@ def read_templates(pipeline_configuration):
     # Put path and strings together
     templates = template_paths
     templates.update(template_strings)
+
     return templates
 
 
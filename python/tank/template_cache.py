@@ -0,0 +1,127 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Persistent cache of the templates read from a pipeline configuration.
+"""
+
+import os
+import sys
+import hashlib
+
+from . import constants
+from . import pipelineconfig_utils
+from .util import cache_file as cache_file_util
+from . import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+def load_templates_config(cache_file, templates_file, per_platform_roots):
+    """
+    Loads the templates configuration stored in a cache file, provided it
+    was read from the same files, which haven't changed since.
+
+    :param cache_file: Path to the cache file.
+    :param templates_file: Path to the main templates configuration file.
+    :param per_platform_roots: Root paths for all storages and platforms the
+                               templates are created with.
+    :returns: Templates configuration, with includes processed, or None
+              if the cache file doesn't exist or is out of date.
+    """
+    try:
+        cache_data = cache_file_util.read_cache_file(cache_file)
+    except Exception, e:
+        log.debug("Could not read templates cache %s: %s" % (cache_file, e))
+        return None
+
+    if cache_data is None:
+        return None
+
+    header = cache_data.get("header") or {}
+    if header != _get_header(templates_file, per_platform_roots, header.get("environment"),
+                             (header.get("files") or {}).keys()):
+        log.debug("Templates cache %s is out of date." % cache_file)
+        return None
+
+    log.debug("Read templates configuration from templates cache %s" % cache_file)
+    return cache_data["templates_config"]
+
+
+def save_templates_config(cache_file, data, templates_file, per_platform_roots, dependencies):
+    """
+    Stores the templates configuration in a cache file. This silently
+    fails if the cache file can't be written.
+
+    :param cache_file: Path to the cache file.
+    :param data: Templates configuration, with includes processed.
+    :param templates_file: Path to the main templates configuration file.
+    :param per_platform_roots: Root paths for all storages and platforms the
+                               templates were created with.
+    :param dependencies: Dictionary describing the files and environment variables
+                         the templates configuration was read from, as filled by
+                         :meth:`~tank.template_includes.process_includes`.
+    """
+    header = _get_header(
+        templates_file,
+        per_platform_roots,
+        dependencies.get("environment", {}),
+        dependencies.get("files", [])
+    )
+
+    try:
+        cache_file_util.write_cache_file(cache_file, {"header": header, "templates_config": data})
+    except Exception, e:
+        log.debug("Could not write templates cache %s: %s" % (cache_file, e))
+        return
+
+    log.debug("Wrote templates configuration to templates cache %s" % cache_file)
+
+
+def _get_header(templates_file, per_platform_roots, environment, included_files):
+    """
+    Describes everything cached templates depend on.
+
+    :param templates_file: Path to the main templates configuration file.
+    :param per_platform_roots: Root paths for all storages and platforms.
+    :param environment: Dictionary of environment variable names used by the
+                        includes. Values are ignored, current values are used.
+    :param included_files: Paths to the files included by the configuration.
+    :returns: Dictionary which is identical for identical dependencies.
+    """
+    files = {}
+    for path in [templates_file] + list(included_files):
+        files[path] = _hash_file(path)
+
+    return {
+        "format_version": constants.TEMPLATES_CACHE_FORMAT_VERSION,
+        "core_version": pipelineconfig_utils.get_currently_running_api_version(),
+        "platform": sys.platform,
+        "roots": per_platform_roots,
+        "environment": dict((name, os.environ.get(name)) for name in environment or {}),
+        "files": files,
+    }
+
+
+def _hash_file(path):
+    """
+    Computes a hash of the content of a file.
+
+    :param path: Path to the file.
+    :returns: Hexadecimal digest, or None if the file can't be read.
+    """
+    try:
+        fh = open(path, "rb")
+        try:
+            return hashlib.sha1(fh.read()).hexdigest()
+        finally:
+            fh.close()
+    except IOError:
+        return None
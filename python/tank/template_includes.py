@@ -31,6 +31,7 @@ c:\foo\bar\hello.yml - absolute path, windows
 
 
 import os
+import re
 import sys
 
 from .errors import TankError
@@ -38,9 +39,16 @@ from . import constants
 from .util import yaml_cache
 
 
-def _get_includes(file_name, data):
+# environment variable references, $FOO, ${FOO} or %FOO% on windows
+_ENV_VAR_REGEX = re.compile(r"\$(\w+)|\$\{(\w+)\}|%(\w+)%")
+
+
+def _get_includes(file_name, data, dependencies=None):
     """
     Parses the includes section and returns a list of valid paths
+
+    :param dependencies: Optional dictionary filled with the environment
+                         variables used by the includes, see :meth:`process_includes`.
     """
     includes = []
     resolved_includes = []
@@ -75,6 +83,12 @@ def _get_includes(file_name, data):
                 continue
             full_path = os.path.expandvars(include)
                     
+        if dependencies is not None:
+            environment = dependencies.setdefault("environment", {})
+            for names in _ENV_VAR_REGEX.findall(include):
+                name = "".join(names)
+                environment[name] = os.environ.get(name)
+
         # make sure that the paths all exist
         if not os.path.exists(full_path):
             raise TankError("Include Resolve error in %s: Included path %s "
@@ -85,12 +99,15 @@ def _get_includes(file_name, data):
     return resolved_includes
 
 
-def _process_template_includes_r(file_name, data):
+def _process_template_includes_r(file_name, data, dependencies=None):
     """
     Recursively add template include files.
     
     For each of the sections keys, strings, path, populate entries based on
     include files.
+
+    :param dependencies: Optional dictionary filled with the files read and the
+                         environment variables used, see :meth:`process_includes`.
     """
     
     # return data    
@@ -103,13 +120,16 @@ def _process_template_includes_r(file_name, data):
         return output_data
 
     # process includes
-    included_paths = _get_includes(file_name, data)
+    included_paths = _get_includes(file_name, data, dependencies)
     
     for included_path in included_paths:
+        if dependencies is not None:
+            dependencies.setdefault("files", []).append(included_path)
+
         included_data = yaml_cache.g_yaml_cache.get(included_path, deepcopy_data=False) or dict()
         
         # before doing any type of processing, allow the included data to be resolved.
-        included_data = _process_template_includes_r(included_path, included_data)
+        included_data = _process_template_includes_r(included_path, included_data, dependencies)
         
         # add the included data's different sections
         for ts in constants.TEMPLATE_SECTIONS:
@@ -124,7 +144,7 @@ def _process_template_includes_r(file_name, data):
     
     return output_data
         
-def process_includes(file_name, data):
+def process_includes(file_name, data, dependencies=None):
     """
     Processes includes for the main templates file. Will look for 
     any include data structures and transform them into real data.
@@ -135,10 +155,17 @@ def process_includes(file_name, data):
        if there are multiple files, they are loaded in order.
     2. now, on top of this, load in this file's keys, strings and path defs
     3. lastly, process all @refs in the paths section
-        
+
+    :param file_name: Path to the main templates file.
+    :param data: Data read from the main templates file.
+    :param dependencies: Optional dictionary filled with what the templates data
+                         depends on: the included files are added to the ``files``
+                         list, in the order they are read, and the environment
+                         variables used by the includes are added to the
+                         ``environment`` dictionary with their current value.
     """
     # first recursively load all template data from includes
-    resolved_includes_data = _process_template_includes_r(file_name, data)
+    resolved_includes_data = _process_template_includes_r(file_name, data, dependencies)
     
     # Now recursively process any @resolves.
     # these are of the following form:
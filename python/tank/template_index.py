@@ -0,0 +1,191 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Lookup structure used to narrow down which templates may match a given path.
+"""
+
+import os
+
+
+class TemplateIndex(object):
+    """
+    Index over a collection of templates, used to find the few templates that
+    can possibly match a path without parsing the path with every single template
+    in the configuration.
+
+    Templates are grouped by the way they pre-process the paths they parse (e.g.
+    one group per storage root for :class:`TemplatePath` objects and one group for
+    :class:`TemplateString` objects). Within a group, templates are stored in a tree
+    keyed by the path segments of the leading static token of each definition
+    variation. Two properties of the template parser are used to discard templates:
+
+    - a path can only match a template if it starts with the template's leading
+      static token.
+    - key values can never contain path separators, so a path can't contain more
+      separators than the static tokens of the template do.
+
+    In most cases, the path also needs to have exactly the same depth as the template
+    and to end with the template's trailing static token, e.g. its file extension.
+    """
+
+    class _Node(object):
+        """
+        Node in the static token tree, representing a single path segment.
+        """
+        __slots__ = ["children", "entries"]
+
+        def __init__(self):
+            # child nodes keyed by lower case path segment
+            self.children = {}
+            # list of (remainder, suffix, depth, exact_depth, position, template) tuples
+            # for variations whose leading static token ends at this node.
+            self.entries = []
+
+    def __init__(self, templates):
+        """
+        Construction
+
+        :param templates: Dictionary of templates keyed by template name, as
+                          returned by :meth:`~tank.template.read_templates`.
+        """
+        # keep a shallow copy around so that we can detect when the
+        # templates dictionary has been modified after the index was built.
+        self._templates = dict(templates)
+
+        # list of (representative template, root node) tuples, one per group
+        self._groups = []
+        # templates that can't be indexed and always need to be checked
+        self._unindexed = []
+
+        groups = {}
+        for position, template in enumerate(templates.values()):
+
+            static_tokens = getattr(template, "_static_tokens", None)
+            if not static_tokens or not all(static_tokens):
+                # this template doesn't have a leading static token
+                # for one of its variations, so we can't index it.
+                self._unindexed.append((position, template))
+                continue
+
+            group_key = (template.__class__, template._prefix)
+            if group_key not in groups:
+                groups[group_key] = (template, self._Node())
+                self._groups.append(groups[group_key])
+            root = groups[group_key][1]
+
+            for (tokens, ordered_keys) in zip(static_tokens, template._ordered_keys):
+                self._add_variation(root, tokens, len(ordered_keys), position, template)
+
+    def _add_variation(self, root, tokens, num_keys, position, template):
+        """
+        Adds a single definition variation of a template to the tree.
+
+        :param root: Root node of the group the template belongs to.
+        :param tokens: Static tokens for the variation, as returned by
+                       :meth:`Template._calc_static_tokens`.
+        :param num_keys: Number of keys in the variation.
+        :param position: Position of the template in the templates dictionary.
+        :param template: The template to add.
+        """
+        segments = tokens[0].split(os.sep)
+
+        node = root
+        for segment in segments[:-1]:
+            node = node.children.setdefault(segment, self._Node())
+
+        depth = sum(token.count(os.sep) for token in tokens)
+
+        # the parser allows a path to stop right after a static token if there are
+        # still keys left to process. When this happens before the last token, the
+        # next token is found inside the one the path ends with, in which case the
+        # path can be shallower than the template. Normalized paths never end with
+        # a separator so this can't happen with tokens ending with one.
+        exact_depth = True
+        for i in range(len(tokens) - 1):
+            if not tokens[i].endswith(os.sep) and tokens[i + 1] in tokens[i][1:]:
+                exact_depth = False
+
+        # definitions start with a static token, so they end with one when there are
+        # more tokens than keys. Unless the path stops early, it then has to end with it.
+        suffix = ""
+        if exact_depth and len(tokens) > num_keys:
+            suffix = tokens[-1]
+
+        node.entries.append((segments[-1], suffix, depth, exact_depth, position, template))
+
+    def is_current(self, templates):
+        """
+        Checks if this index still reflects the given templates dictionary.
+
+        :param templates: Dictionary of templates keyed by template name.
+        :returns: True if the index was built from the same templates, False otherwise.
+        """
+        return self._templates == templates
+
+    def get_candidates(self, path):
+        """
+        Returns the templates that can possibly match a path. Templates
+        which are not returned are guaranteed not to validate the path.
+
+        :param path: Path to find candidate templates for.
+        :returns: List of templates, in the same order as in the templates
+                  dictionary used to build the index.
+        """
+        return self.get_candidates_many([path])[0]
+
+    def get_candidates_many(self, paths):
+        """
+        Returns the templates that can possibly match each of the given paths.
+
+        Paths are grouped by parent directory so that the part of the lookup
+        which is common to siblings is only done once.
+
+        :param paths: List of paths to find candidate templates for.
+        :returns: List of template lists, one for each path in the same order
+                  as the input paths. See :meth:`get_candidates`.
+        """
+        candidates = [dict(self._unindexed) for path in paths]
+
+        for representative, root in self._groups:
+            # pre-process the paths in the same way the parser will
+            siblings = {}
+            for i, path in enumerate(paths):
+                lower_path = os.path.normpath(representative._adjust_path(path)).lower()
+                if os.sep in lower_path:
+                    (parent, _, name) = lower_path.rpartition(os.sep)
+                else:
+                    (parent, name) = (None, lower_path)
+                siblings.setdefault(parent, []).append((i, lower_path, name))
+
+            for parent, items in siblings.iteritems():
+                # walk down the tree with the parent directory segments
+                entries = []
+                node = root
+                for segment in ([] if parent is None else parent.split(os.sep)):
+                    entries.extend(e for e in node.entries if segment.startswith(e[0]))
+                    node = node.children.get(segment)
+                    if node is None:
+                        break
+
+                for (i, lower_path, name) in items:
+                    path_depth = lower_path.count(os.sep)
+                    path_entries = entries
+                    if node is not None:
+                        path_entries = entries + [e for e in node.entries if name.startswith(e[0])]
+
+                    for (remainder, suffix, depth, exact_depth, position, template) in path_entries:
+                        if not lower_path.endswith(suffix):
+                            continue
+                        if path_depth > depth or (exact_depth and path_depth != depth):
+                            continue
+                        candidates[i][position] = template
+
+        return [[c[position] for position in sorted(c)] for c in candidates]
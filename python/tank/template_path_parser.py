@@ -13,7 +13,10 @@ Parsing of template paths into values for specified keys using a list of static
 """
 
 import os
+import re
+
 from .errors import TankError
+from .templatekey import StringKey, IntegerKey, SequenceKey
 
 class TemplatePathParser(object):
     """
@@ -60,6 +63,11 @@ class TemplatePathParser(object):
         self.input_path = None
         self.last_error = "Unable to parse path" 
 
+        # regular expression used to parse paths without going through the
+        # recursive resolution. None if this can't be done for these keys and
+        # tokens.
+        self._fast_regex = self.__compile_fast_regex()
+
     def parse_path(self, input_path, skip_keys):
         """
         Parses a path against the set of keys and static tokens to extract valid values
@@ -90,6 +98,9 @@ class TemplatePathParser(object):
         skip_keys = skip_keys or []
         input_path = os.path.normpath(input_path)
 
+        # parsers can be reused, so make sure we don't report a previous error
+        self.last_error = "Unable to parse path"
+
         # all token comparisons are done case insensitively.
         lower_path = input_path.lower()
         
@@ -105,6 +116,11 @@ class TemplatePathParser(object):
                 # template with no keys - in this case not matching 
                 # the input path. Return for no match.
                 return None        
+
+        if self._fast_regex:
+            fields = self.__fast_parse(input_path, lower_path, skip_keys)
+            if fields is not None:
+                return fields
             
         # find all occurances of all tokens in the path.  This will 
         # produce a list of lists, one list of positions for each token.
@@ -358,4 +374,123 @@ class TemplatePathParser(object):
                                                                     fully_resolved, 
                                                                     last_error))
             
-        return possible_values
\ No newline at end of file
+        return possible_values
+
+    def __compile_fast_regex(self):
+        """
+        Builds a regular expression matching paths made of the static tokens
+        separated by values for the keys.
+
+        The character class used for each key is built from the key's settings
+        (filter_by, format_spec, choices...). It always accepts every character a
+        valid value for the key can contain, but may accept more. The expression
+        is only built if the class of each key excludes the first character of
+        the token following it (or if the key has a fixed length): in this case
+        there is a single way to split a path between keys and tokens, and a
+        match gives the same result as the recursive resolution.
+
+        :returns: A compiled regular expression or None.
+        """
+        num_keys = len(self.ordered_keys)
+        num_tokens = len(self.static_tokens)
+        if not num_keys or num_keys not in (num_tokens - 1, num_tokens) or not all(self.static_tokens):
+            # only handle definitions alternating between tokens and keys, starting
+            # with a token.
+            return None
+
+        pattern = "^" + re.escape(self.static_tokens[0])
+        for i, key in enumerate(self.ordered_keys):
+            char_class = self.__get_char_class(key)
+            next_token = self.static_tokens[i + 1] if i + 1 < num_tokens else ""
+            if next_token and key.length is None:
+                if re.match("^%s$" % char_class, next_token[0], re.UNICODE):
+                    # the value could stop at different places, e.g. {name}_{version}
+                    # with a name containing underscores, so leave this to the
+                    # recursive resolution.
+                    return None
+
+            if key.length is None:
+                pattern += "(%s+)" % char_class
+            else:
+                pattern += "(%s{%d})" % (char_class, key.length)
+            pattern += re.escape(next_token)
+        pattern += "$"
+
+        return re.compile(pattern, re.UNICODE)
+
+    def __get_char_class(self, key):
+        """
+        Returns a regular expression matching any single character
+        a lower case string value for the given key can contain.
+
+        :param key: The key to get the character class for.
+        :returns: A regular expression string.
+        """
+        # values are extracted from lower case paths and some validations,
+        # like isdigit, accept non ascii characters for unicode strings.
+        # Non ascii characters are always accepted to be on the safe side.
+        non_ascii = r"[^\x00-\x7f]"
+
+        if key.choices:
+            chars = set("".join(str(x).lower() for x in key.choices))
+            if all(ord(c) < 128 for c in chars):
+                return "[%s]" % "".join(re.escape(c) for c in sorted(chars))
+
+        if isinstance(key, SequenceKey):
+            # frame specs and format strings can contain pretty much anything
+            pass
+        elif isinstance(key, IntegerKey):
+            if key._zero_padded:
+                return r"(?:[0-9]|%s)" % non_ascii
+            else:
+                # leading whitespaces are allowed when not padding with zeros
+                return r"(?:[\s0-9]|%s)" % non_ascii
+        elif isinstance(key, StringKey):
+            if key.filter_by == "alphanumeric":
+                return r"(?:[^\W_]|%s)" % non_ascii
+            elif key.filter_by == "alpha":
+                return r"(?:[^\W_0-9]|%s)" % non_ascii
+
+        # values can't contain path separators
+        return "[^%s]" % re.escape(os.path.sep)
+
+    def __fast_parse(self, input_path, lower_path, skip_keys):
+        """
+        Parses a path using the pre-compiled regular expression.
+
+        :param input_path: The normalized path to parse.
+        :param lower_path: The lower case version of the path.
+        :param skip_keys: List of keys for whom we do not need to find values.
+
+        :returns: A dictionary of fields mapping key names to their values, or
+                  None if the path couldn't be parsed this way, in which case the
+                  recursive resolution should be used.
+        """
+        num_keys = len(self.ordered_keys)
+        if num_keys >= len(self.static_tokens) and lower_path.find(self.static_tokens[0], 1) >= 0:
+            # the path may also start with a key
+            return None
+
+        match = self._fast_regex.match(lower_path)
+        if not match:
+            return None
+
+        fields = {}
+        str_values = {}
+        for i, key in enumerate(self.ordered_keys):
+            if key.name in skip_keys:
+                # skipped keys are allowed to contain path separators
+                return None
+
+            str_value = input_path[match.start(i + 1):match.end(i + 1)]
+            if str_values.setdefault(key.name, str_value) != str_value:
+                # conflicting values for the same key
+                return None
+
+            try:
+                fields[key.name] = key.value_from_str(str_value)
+            except TankError:
+                # let the recursive resolution report the error
+                return None
+
+        return fields
@@ -0,0 +1,350 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Search of the files on disk matching a template.
+"""
+
+import os
+import re
+import sys
+import time
+import fnmatch
+from multiprocessing.pool import ThreadPool
+
+from . import constants
+
+# characters with a special meaning in glob patterns
+_MAGIC_CHECK = re.compile("[*?[]")
+
+# frame number at the end of a file name stripped from its extension
+_TRAILING_DIGITS = re.compile("[0-9]+$")
+
+
+class TemplateWalker(object):
+    """
+    Finds the paths on disk matching a template, given values for some of its keys.
+
+    Paths are found by walking down the directory tree one path segment at
+    a time, with the same pattern matching rules as :mod:`glob`. Directories
+    are listed at most once per walker, so several searches for different
+    definition variations of the same template share the same directory
+    listings. Entries which are the value of a single key are validated with
+    this key as soon as they are listed, so that the walk doesn't descend
+    into directories which can't possibly match the template.
+
+    The walk is done breadth first. When more than one worker is used, all
+    the directories found at a given depth are listed concurrently by a pool
+    of threads, which helps a lot with high latency file systems. Results
+    don't depend on the number of workers.
+    """
+
+    def __init__(self, template, max_workers=1):
+        """
+        Construction
+
+        :param template: The :class:`TemplatePath` to find paths for.
+        :param max_workers: Maximum number of threads used to access the disk.
+        """
+        self._template = template
+        self._max_workers = max(1, max_workers or 1)
+        self._pool = None
+        # directory listings, keyed by directory path
+        self._listdir_cache = {}
+        # patterns which were already searched for
+        self._searched = set()
+        self._stats = {
+            "directories_listed": 0,
+            "entries_seen": 0,
+            "wall_time": 0.0,
+        }
+
+    @property
+    def stats(self):
+        """
+        Statistics about the searches done so far, as a dictionary with
+        the following keys:
+
+        - ``directories_listed``: Number of directories listed.
+        - ``entries_seen``: Number of directory entries returned by these listings.
+        - ``wall_time``: Time spent searching, in seconds.
+        """
+        return dict(self._stats)
+
+    def close(self):
+        """
+        Releases the threads used by the walker, if any.
+        """
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def find(self, fields, wildcard_keys):
+        """
+        Finds the paths matching the template for the given fields.
+
+        :param fields: Mapping of key names to values. Keys which values should
+                       be searched for must be set to ``"*"``.
+        :param wildcard_keys: Names of the keys which values should be searched for.
+        :returns: List of paths validating the template.
+        """
+        (paths, _) = self._search(fields, wildcard_keys)
+        return [path for path in paths if self._template.validate(path)]
+
+    def find_sequences(self, fields, wildcard_keys, frame_key):
+        """
+        Finds the paths matching the template for the given fields, collapsing
+        the frames of image sequences.
+
+        Files which only differ by the frame number at the end of their name
+        (before the static part of the definition following the frame key,
+        typically the extension) are grouped together, and only the first frame
+        of each group is parsed with the template. The frame number has to be the
+        value the template finds for the frame key, otherwise each file of the
+        group is parsed on its own.
+
+        :param fields: Mapping of key names to values. Keys which values should
+                       be searched for must be set to ``"*"``.
+        :param wildcard_keys: Names of the keys which values should be searched for.
+        :param frame_key: The :class:`SequenceKey` holding frame numbers.
+        :returns: List of ``(path, frames)`` tuples. For image sequences, ``path`` is
+                  the first frame of the sequence and ``frames`` is the sorted list
+                  of frame numbers found on disk. For other paths, ``frames`` is None.
+        """
+        (paths, index) = self._search(fields, wildcard_keys)
+        suffix = None
+        if frame_key.name in wildcard_keys and index is not None:
+            suffix = self._get_frame_suffix(index, frame_key)
+        if suffix is None:
+            return [(path, None) for path in paths if self._template.validate(path)]
+
+        # group files by everything but their frame number
+        results = []
+        sequences = {}
+        for path in paths:
+            (head, name) = os.path.split(path)
+            stem = name[:len(name) - len(suffix)]
+            match = _TRAILING_DIGITS.search(stem) if name.endswith(suffix) else None
+            if match is None:
+                if self._template.validate(path):
+                    results.append((path, None))
+                continue
+            sequence_key = (head, stem[:match.start()])
+            sequences.setdefault(sequence_key, []).append((int(match.group()), path))
+
+        for sequence_key in sorted(sequences):
+            frames = sorted(sequences[sequence_key])
+            (frame, path) = frames[0]
+            path_fields = self._template.validate_and_get_fields(path)
+            if path_fields is not None and path_fields.get(frame_key.name) == frame:
+                results.append((path, sorted(set(f for (f, _) in frames))))
+            else:
+                # the frame number isn't where we expected it, parse each file
+                results.extend((p, None) for (_, p) in frames if self._template.validate(p))
+
+        return results
+
+    def _search(self, fields, wildcard_keys):
+        """
+        Finds the paths matching the search pattern for the given fields,
+        without validating them.
+
+        :param fields: Mapping of key names to values.
+        :param wildcard_keys: Names of the keys which values should be searched for.
+        :returns: Tuple of (paths, index), where index is the index of the definition
+                  variation used. Paths are empty and index is None if the pattern
+                  was already searched for.
+        """
+        glob_str = self._template._apply_fields(fields, ignore_types=wildcard_keys)
+        if glob_str in self._searched:
+            # it's possible that multiple key sets return the same search
+            # string depending on the fields and skip-keys passed in
+            return ([], None)
+        self._searched.add(glob_str)
+
+        start_time = time.time()
+        try:
+            (index, _) = self._template._get_variation_index(fields)
+            segment_keys = self._get_segment_keys(glob_str, index, wildcard_keys)
+            paths = self._walk(glob_str, segment_keys)
+        finally:
+            self._stats["wall_time"] += time.time() - start_time
+
+        return (paths, index)
+
+    def _get_frame_suffix(self, index, frame_key):
+        """
+        Returns the static text following a frame key at the end of a definition
+        variation, e.g. ``.exr`` for ``{name}.{SEQ}.exr``.
+
+        :param index: Index of the definition variation.
+        :param frame_key: Key holding frame numbers.
+        :returns: The static text, or None if the key isn't only followed by
+                  static text in the last segment of the definition.
+        """
+        leaf = self._template._definitions[index].split(os.sep)[-1]
+        token = "{%s}" % frame_key.name
+        if leaf.count(token) != 1:
+            return None
+        suffix = leaf[leaf.index(token) + len(token):]
+        if "{" in suffix:
+            return None
+        return suffix
+
+    def _get_segment_keys(self, glob_str, index, wildcard_keys):
+        """
+        Finds which segments of a search pattern are the value of a single searched key.
+
+        :param glob_str: Search pattern, as built by the template.
+        :param index: Index of the definition variation the pattern was built with.
+        :param wildcard_keys: Names of the keys which values are searched for.
+        :returns: Dictionary of keys, keyed by position of the segment in the pattern.
+        """
+        root_path = self._template.root_path
+        definition = self._template._definitions[index]
+        if not definition or not glob_str.startswith(root_path):
+            return {}
+
+        segments = definition.split(os.sep)
+        offset = len(glob_str.split(os.sep)) - len(segments)
+        if glob_str[len(root_path):].lstrip(os.sep).count(os.sep) != len(segments) - 1:
+            # a field value contains a path separator, we can't match
+            # the pattern segments with the definition segments.
+            return {}
+
+        segment_keys = {}
+        regex = r"^{(%s)}$" % constants.TEMPLATE_KEY_NAME_REGEX
+        for position, segment in enumerate(segments):
+            match = re.match(regex, segment)
+            if match and match.group(1) in wildcard_keys:
+                segment_keys[offset + position] = self._template._keys[index][match.group(1)]
+        return segment_keys
+
+    def _walk(self, glob_str, segment_keys):
+        """
+        Finds the paths matching a glob pattern.
+
+        :param glob_str: Glob pattern to search for.
+        :param segment_keys: Dictionary of keys to validate entries with, keyed
+                             by position of the segment in the pattern.
+        :returns: List of matching paths.
+        """
+        segments = glob_str.split(os.sep)
+
+        # find the longest part of the pattern without wildcards, we
+        # can start the search from there.
+        first = 0
+        while first < len(segments) and not _MAGIC_CHECK.search(segments[first]):
+            first += 1
+
+        if first == len(segments):
+            return [glob_str] if os.path.lexists(glob_str) else []
+
+        if first == 0:
+            # relative pattern
+            paths = [""]
+        else:
+            paths = [os.sep.join(segments[:first]) + os.sep]
+
+        for position in range(first, len(segments)):
+            segment = segments[position]
+            key = segment_keys.get(position)
+
+            if not _MAGIC_CHECK.search(segment):
+                if segment:
+                    paths = [os.path.join(path, segment) for path in paths]
+                    exists = self._map(os.path.lexists, paths)
+                else:
+                    exists = self._map(os.path.isdir, paths)
+                    paths = [os.path.join(path, segment) for path in paths]
+                paths = [path for (path, path_exists) in zip(paths, exists) if path_exists]
+                continue
+
+            if isinstance(segment, unicode):
+                paths = [self._to_unicode(path) for path in paths]
+            self._list_directories([path or os.curdir for path in paths])
+
+            next_paths = []
+            for path in paths:
+                for name in self._match(path, segment):
+                    if key is None or key.validate(name):
+                        next_paths.append(os.path.join(path, name))
+            paths = next_paths
+
+        return paths
+
+    def _match(self, path, pattern):
+        """
+        Lists the entries of a directory matching a pattern, like :func:`glob.glob1`.
+
+        :param path: Directory to list entries for.
+        :param pattern: Pattern entries must match.
+        :returns: List of entry names.
+        """
+        names = self._listdir_cache[path or os.curdir]
+        if pattern[0] != ".":
+            # hidden entries are only matched explicitly
+            names = [name for name in names if name[0] != "."]
+        return fnmatch.filter(names, pattern)
+
+    def _to_unicode(self, path):
+        """
+        Converts a path to unicode, like :func:`glob.glob1` does when matching
+        unicode patterns.
+
+        :param path: Path to convert.
+        :returns: Unicode path.
+        """
+        if isinstance(path, unicode):
+            return path
+        return unicode(path, sys.getfilesystemencoding() or sys.getdefaultencoding())
+
+    def _list_directories(self, paths):
+        """
+        Lists the given directories, only hitting the disk the first
+        time a given directory is listed.
+
+        :param paths: Directories to list.
+        """
+        paths = [path for path in set(paths) if path not in self._listdir_cache]
+        for path, names in zip(paths, self._map(_listdir, paths)):
+            self._listdir_cache[path] = names
+            self._stats["directories_listed"] += 1
+            self._stats["entries_seen"] += len(names)
+
+    def _map(self, func, items):
+        """
+        Calls a function for each item, concurrently if more than one worker
+        can be used.
+
+        :param func: Function to call.
+        :param items: List of items.
+        :returns: List of results, in the same order as the items.
+        """
+        if self._max_workers == 1 or len(items) < 2:
+            return [func(item) for item in items]
+
+        if self._pool is None:
+            self._pool = ThreadPool(self._max_workers)
+        return self._pool.map(func, items)
+
+
+def _listdir(path):
+    """
+    Lists a directory.
+
+    :param path: Directory to list.
+    :returns: List of entry names, empty if the path isn't a readable directory.
+    """
+    try:
+        return os.listdir(path)
+    except os.error:
+        return []
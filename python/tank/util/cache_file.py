@@ -0,0 +1,124 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache files shared by all the users of a pipeline configuration.
+
+Cache files only hold plain data stored as JSON, so that reading them can
+never execute code. They are only read if they are owned by the current user
+or by the owner of the folder they are stored in, and aren't writable by
+everyone.
+"""
+
+import os
+import sys
+import stat
+import json
+import tempfile
+
+from ..errors import TankError
+
+
+def read_cache_file(path):
+    """
+    Reads the data stored in a cache file by :func:`write_cache_file`.
+
+    :param path: Path to the cache file.
+    :returns: The data stored in the file, or None if the file doesn't exist.
+    :raises: TankError if the file can't be trusted, IOError or ValueError
+             if it can't be read.
+    """
+    if not os.path.exists(path):
+        return None
+
+    fh = open(path, "rb")
+    try:
+        # check the file which was actually opened, in case it was replaced
+        _check_trusted(path, os.fstat(fh.fileno()))
+        data = json.load(fh)
+    finally:
+        fh.close()
+
+    return _to_str(data)
+
+
+def write_cache_file(path, data):
+    """
+    Stores data in a cache file. The file is replaced at once, so that other
+    processes never read a partially written file. It gets the permissions of
+    the folder it is stored in, minus execution rights and write access for
+    other users.
+
+    :param path: Path to the cache file.
+    :param data: Data to store, made of dictionaries with string keys, lists,
+                 strings, numbers, booleans and None.
+    :raises: ValueError if the data wouldn't be read back identically,
+             IOError or OSError if the file can't be written.
+    """
+    content = json.dumps(data)
+    if _to_str(json.loads(content)) != data:
+        raise ValueError("Data can't be stored as JSON without being altered.")
+
+    folder = os.path.dirname(os.path.abspath(path))
+    (fd, temp_file) = tempfile.mkstemp(prefix=".%s_" % os.path.basename(path), dir=folder)
+    try:
+        fh = os.fdopen(fd, "wb")
+        try:
+            fh.write(content)
+        finally:
+            fh.close()
+        os.chmod(temp_file, stat.S_IMODE(os.stat(folder).st_mode) & 0664)
+        if sys.platform == "win32" and os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_file, path)
+    except:
+        os.remove(temp_file)
+        raise
+
+
+def _check_trusted(path, file_stat):
+    """
+    Makes sure a cache file can only have been written by the current
+    user or the owner of the folder it is stored in.
+
+    :param path: Path to the cache file.
+    :param file_stat: Result of ``os.stat`` for the cache file.
+    :raises: TankError if the file can't be trusted.
+    """
+    if sys.platform == "win32":
+        # ownership isn't reported by os.stat on windows, access
+        # to the pipeline configuration is controlled by ACLs.
+        return
+
+    folder = os.path.dirname(os.path.abspath(path))
+    if file_stat.st_uid not in (os.getuid(), os.stat(folder).st_uid):
+        raise TankError(
+            "%s is owned by user id %d, which owns neither the cache file's "
+            "folder nor the current process." % (path, file_stat.st_uid)
+        )
+    if file_stat.st_mode & stat.S_IWOTH:
+        raise TankError("%s is writable by all users." % path)
+
+
+def _to_str(data):
+    """
+    Converts the unicode strings read from JSON data to utf-8 strings,
+    like the ones read from yaml files.
+
+    :param data: Data read from JSON.
+    :returns: The same data, with strings instead of unicode objects.
+    """
+    if isinstance(data, unicode):
+        return data.encode("utf-8")
+    if isinstance(data, list):
+        return [_to_str(x) for x in data]
+    if isinstance(data, dict):
+        return dict((_to_str(k), _to_str(v)) for (k, v) in data.iteritems())
+    return data
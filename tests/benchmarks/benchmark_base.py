@@ -0,0 +1,91 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import timeit
+
+from tank_test.tank_test_base import TankTestBase
+
+
+class BenchmarkBase(TankTestBase):
+    """
+    Base class for benchmarks.
+
+    Benchmarks reuse the test fixtures, so they run against a mockgun
+    Shotgun instance and don't need a connection to a site. Each method
+    whose name starts with ``bench_`` is a benchmark, which times operations
+    with :meth:`measure`.
+    """
+
+    def __init__(self, parameters):
+        """
+        Construction
+
+        :param parameters: Dictionary of parameters shared by all benchmarks. The
+                           ``repeat`` entry is the number of times each operation
+                           is timed.
+        """
+        super(BenchmarkBase, self).__init__("run_benchmarks")
+        self.parameters = parameters
+        self.results = []
+
+    def run_benchmarks(self, names=None):
+        """
+        Runs benchmarks. :meth:`setUp` must have been called beforehand.
+
+        :param names: Optional list of benchmark names to run, without their
+                      ``bench_`` prefix. All benchmarks are run if not set.
+        :returns: List of results, see :meth:`measure`.
+        """
+        for name in sorted(dir(self)):
+            if name.startswith("bench_") and (not names or name[len("bench_"):] in names):
+                getattr(self, name)()
+        return self.results
+
+    def measure(self, name, func, iterations=1, setup=None, **info):
+        """
+        Times an operation several times and records the results.
+
+        :param name: Name of the operation.
+        :param func: Callable running the operation.
+        :param iterations: Number of items processed by each call, e.g. the number of
+                           paths parsed, used to compute the time per item.
+        :param setup: Optional callable run before each call, which is not timed.
+        :param info: Additional values stored with the results.
+        :returns: Dictionary with the name of the operation, the number of ``iterations``
+                  and of calls (``repeat``), and the ``min``, ``median`` and ``mean`` time
+                  of a call as well as the minimum time per item (``per_iteration``),
+                  in seconds.
+        """
+        repeat = self.parameters.get("repeat", 5)
+        timings = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            start = timeit.default_timer()
+            func()
+            timings.append(timeit.default_timer() - start)
+
+        timings.sort()
+        result = {
+            "benchmark": name,
+            "iterations": iterations,
+            "repeat": repeat,
+            "min": timings[0],
+            "median": timings[len(timings) // 2],
+            "mean": sum(timings) / len(timings),
+            "per_iteration": timings[0] / max(iterations, 1),
+        }
+        result.update(info)
+        self.results.append(result)
+
+        print "%-40s %8d items  min %10.6fs  median %10.6fs  per item %12.9fs" % (
+            name, iterations, result["min"], result["median"], result["per_iteration"]
+        )
+        return result
@@ -0,0 +1,125 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Generation of synthetic templates configurations, modelled after the
+default configuration: shot, asset and sequence templates for several
+applications, pipeline steps and kinds of files.
+"""
+
+import datetime
+
+# applications and the extension of their files
+APPLICATIONS = [
+    ("maya", "ma"),
+    ("nuke", "nk"),
+    ("houdini", "hip"),
+    ("max", "max"),
+    ("photoshop", "psd"),
+    ("mari", "mra"),
+    ("katana", "katana"),
+    ("blender", "blend"),
+    ("clarisse", "project"),
+    ("flame", "batch"),
+    ("c4d", "c4d"),
+    ("motionbuilder", "fbx"),
+]
+
+# root folder of each context
+CONTEXTS = [
+    ("shot", "sequences/{Sequence}/{Shot}"),
+    ("asset", "assets/{sg_asset_type}/{Asset}"),
+    ("sequence", "sequence_work/{Sequence}"),
+]
+
+# kinds of files, relative to the department folder
+KINDS = [
+    ("work", "{app}/work/{name}[_{variant}].v{version}.{ext}"),
+    ("snapshot", "{app}/work/snapshots/{name}.v{version}.{timestamp}.{ext}"),
+    ("publish", "publish/{app}/{name}.v{version}.{ext}"),
+    ("render", "images/{app}/{name}/v{version}/{eye}/{name}.v{version}.{SEQ}.exr"),
+    ("review", "review/{app}/{name}.v{version}.mov"),
+]
+
+# values used when generating fields, by key name
+VALUES = {
+    "Sequence": ["sq%03d" % i for i in range(1, 21)],
+    "Shot": ["sh%04d" % (i * 10) for i in range(1, 51)],
+    "Asset": ["asset%03d" % i for i in range(1, 51)],
+    "sg_asset_type": ["Character", "Prop", "Environment", "Vehicle"],
+    "Step": ["anim", "comp", "fx", "light", "model", "rig", "surface", "layout"],
+    "name": ["main", "bg", "fg", "hero", "crowd", "sky"],
+    "variant": ["alt", "wip", "test"],
+    "version": range(1, 30),
+    "SEQ": range(1001, 1101),
+    "eye": ["left", "right"],
+    "timestamp": [datetime.datetime(2016, 1, 1) + datetime.timedelta(hours=i) for i in range(48)],
+}
+
+
+def generate_templates_config(num_templates):
+    """
+    Generates a templates configuration.
+
+    :param num_templates: Number of path templates to generate. A string
+                          template is also generated for every application.
+    :returns: Dictionary with the keys, paths and strings sections of a
+              templates configuration, ready to be dumped to templates.yml.
+    """
+    keys = {
+        "Sequence": {"type": "str"},
+        "Shot": {"type": "str"},
+        "Asset": {"type": "str"},
+        "sg_asset_type": {"type": "str", "choices": VALUES["sg_asset_type"]},
+        "Step": {"type": "str", "choices": VALUES["Step"]},
+        "name": {"type": "str", "filter_by": "alphanumeric"},
+        "variant": {"type": "str", "filter_by": "alphanumeric"},
+        "version": {"type": "int", "format_spec": "03"},
+        "SEQ": {"type": "sequence", "format_spec": "04"},
+        "eye": {"type": "str", "choices": ["left", "right", "%V"], "default": "%V", "abstract": True},
+        "timestamp": {"type": "timestamp", "format_spec": "%Y-%m-%d-%H-%M-%S"},
+    }
+
+    paths = {}
+    department = 0
+    while len(paths) < num_templates:
+        for (context, context_root) in CONTEXTS:
+            for (app, ext) in APPLICATIONS:
+                for (kind, kind_definition) in KINDS:
+                    if len(paths) == num_templates:
+                        break
+                    definition = "%s/{Step}/dept%02d/%s" % (
+                        context_root,
+                        department,
+                        kind_definition.replace("{app}", app).replace("{ext}", ext)
+                    )
+                    paths["%s_%s_%s_%02d" % (context, app, kind, department)] = definition
+        department += 1
+
+    strings = {}
+    for (app, _) in APPLICATIONS:
+        strings["%s_publish_name" % app] = "{name} %s, v{version}" % app
+
+    return {"keys": keys, "paths": paths, "strings": strings}
+
+
+def generate_fields(template, rng):
+    """
+    Generates random fields for a template.
+
+    :param template: Template to generate fields for.
+    :param rng: :class:`random.Random` instance used to pick values.
+    :returns: Dictionary of key names and values.
+    """
+    fields = {}
+    for key_name in template.keys:
+        values = VALUES[key_name]
+        fields[key_name] = values[rng.randrange(len(values))]
+    return fields
@@ -0,0 +1,190 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import random
+
+from tank_vendor import yaml
+from tank.template import read_templates
+from tank.util import yaml_cache
+
+from .benchmark_base import BenchmarkBase
+from . import config_generator
+
+
+class TemplateBenchmarks(BenchmarkBase):
+    """
+    Benchmarks for reading templates, and for matching paths with them.
+
+    The following parameters are used, on top of the ones of :class:`BenchmarkBase`:
+
+    - ``num_templates``: Number of path templates in the generated configuration.
+    - ``num_paths``: Number of paths parsed or generated by each benchmark.
+    - ``num_files``: Number of files created on disk for the search benchmarks.
+    """
+
+    # seed for the generated values, so that runs can be compared
+    SEED = 1234
+
+    def setUp(self):
+        super(TemplateBenchmarks, self).setUp()
+
+        self.num_templates = self.parameters.get("num_templates", 100)
+        self.num_paths = self.parameters.get("num_paths", 1000)
+        self.num_files = self.parameters.get("num_files", 1000)
+        self.rng = random.Random(self.SEED)
+
+        self.templates_file = self.pipeline_configuration.get_templates_config_location()
+        data = config_generator.generate_templates_config(self.num_templates)
+        self.create_file(self.templates_file, yaml.safe_dump(data, default_flow_style=False))
+        self.tk.reload_templates()
+
+        # paths matching random templates, and paths which don't match any template
+        template_names = sorted(name for name in self.tk.templates if name not in self._string_names())
+        self.samples = []
+        for _ in range(self.num_paths):
+            template = self.tk.templates[template_names[self.rng.randrange(len(template_names))]]
+            fields = config_generator.generate_fields(template, self.rng)
+            self.samples.append((template, fields, template.apply_fields(fields)))
+        self.paths = [path for (_, _, path) in self.samples]
+        self.unknown_paths = [
+            os.path.join(os.path.dirname(path), "unknown", os.path.basename(path)) for path in self.paths
+        ]
+
+    def _string_names(self):
+        """
+        Returns the names of the string templates.
+        """
+        return [name for (name, template) in self.tk.templates.iteritems() if template.parent is None]
+
+    def _render_template(self):
+        """
+        Returns a template for the frames of image sequences.
+        """
+        names = sorted(name for name in self.tk.templates if "_render_" in name)
+        return self.tk.templates[names[0]]
+
+    def _info(self):
+        """
+        Returns the parameters stored with every result.
+        """
+        return {"num_templates": self.num_templates}
+
+    def _clear_fields_caches(self):
+        """
+        Clears the fields cache of every template, so that paths are parsed again.
+        """
+        for template in self.tk.templates.values():
+            template.clear_fields_cache()
+
+    def _invalidate_yaml_cache(self):
+        """
+        Makes sure the templates configuration is read from disk again.
+        """
+        yaml_cache.g_yaml_cache.invalidate(self.templates_file)
+
+    def bench_read_templates(self):
+        self.measure(
+            "read_templates",
+            lambda: read_templates(self.pipeline_configuration),
+            setup=self._invalidate_yaml_cache,
+            **self._info()
+        )
+
+    def bench_read_templates_cached(self):
+        self.pipeline_configuration._use_templates_cache = True
+        try:
+            # write the cache first
+            read_templates(self.pipeline_configuration)
+            self.measure(
+                "read_templates_cached",
+                lambda: read_templates(self.pipeline_configuration),
+                setup=self._invalidate_yaml_cache,
+                **self._info()
+            )
+        finally:
+            self.pipeline_configuration._use_templates_cache = False
+
+    def bench_template_from_path(self):
+        def run():
+            for path in self.paths:
+                self.tk.template_from_path(path)
+        self.measure("template_from_path", run, len(self.paths), setup=self._clear_fields_caches, **self._info())
+
+    def bench_template_from_path_no_match(self):
+        def run():
+            for path in self.unknown_paths:
+                self.tk.template_from_path(path)
+        self.measure(
+            "template_from_path_no_match", run, len(self.unknown_paths),
+            setup=self._clear_fields_caches, **self._info()
+        )
+
+    def bench_templates_from_paths(self):
+        self.measure(
+            "templates_from_paths",
+            lambda: self.tk.templates_from_paths(self.paths),
+            len(self.paths),
+            setup=self._clear_fields_caches,
+            **self._info()
+        )
+
+    def bench_get_fields(self):
+        def run():
+            for (template, _, path) in self.samples:
+                template.get_fields(path)
+        self.measure("get_fields", run, len(self.samples), setup=self._clear_fields_caches, **self._info())
+
+    def bench_get_fields_cached(self):
+        def run():
+            for (template, _, path) in self.samples:
+                template.get_fields(path)
+        # fill the caches
+        run()
+        self.measure("get_fields_cached", run, len(self.samples), **self._info())
+
+    def bench_apply_fields(self):
+        def run():
+            for (template, fields, _) in self.samples:
+                template.apply_fields(fields)
+        self.measure("apply_fields", run, len(self.samples), **self._info())
+
+    def bench_apply_fields_many(self):
+        # all the frames of an image sequence
+        template = self._render_template()
+        fields = config_generator.generate_fields(template, self.rng)
+        fields_list = []
+        for frame in range(self.num_paths):
+            fields = dict(fields, SEQ=frame)
+            fields_list.append(fields)
+        self.measure(
+            "apply_fields_many",
+            lambda: template.apply_fields_many(fields_list),
+            len(fields_list),
+            **self._info()
+        )
+
+    def bench_paths_from_template(self):
+        template = self._render_template()
+        for _ in range(self.num_files):
+            self.create_file(template.apply_fields(config_generator.generate_fields(template, self.rng)))
+
+        self.measure(
+            "paths_from_template",
+            lambda: self.tk.paths_from_template(template, {"Step": "comp"}),
+            self.num_files,
+            **self._info()
+        )
+        self.measure(
+            "abstract_paths_from_template",
+            lambda: self.tk.abstract_paths_from_template(template, {"Step": "comp"}),
+            self.num_files,
+            **self._info()
+        )
@@ -64,6 +64,66 @@ class TestTemplateFromPath(TankTestBase):
         self.assertIsNotNone(template)
         self.assertIsInstance(template, TemplateString)
 
+    def test_ambiguous_path(self):
+        """Resolve a path which maps to more than one template."""
+        template = self.tk.templates["maya_shot_publish"]
+        self.tk.templates["maya_shot_publish_copy"] = TemplatePath(template.definition,
+                                                                   template.keys,
+                                                                   template.root_path)
+        file_path = os.path.join(self.project_root,
+                'sequences/Sequence_1/shot_010/Anm/publish/shot_010.jfk.v001.ma')
+        self.assertRaises(TankError, self.tk.template_from_path, file_path)
+
+    def test_modified_templates(self):
+        """Resolve a path after the templates dictionary has been modified."""
+        file_path = os.path.join(self.project_root, 'foo/bar/baz.ma')
+        self.assertTrue(self.tk.template_from_path(file_path) is None)
+        self.tk.templates["custom"] = TemplatePath("foo/{name}/baz.ma",
+                                                   {"name": StringKey("name")},
+                                                   self.project_root)
+        self.assertEqual(self.tk.template_from_path(file_path), self.tk.templates["custom"])
+        self.tk.templates = {}
+        self.assertTrue(self.tk.template_from_path(file_path) is None)
+
+
+class TestTemplatesFromPaths(TankTestBase):
+    """Cases testing Tank.templates_from_paths method"""
+    def setUp(self):
+        super(TestTemplatesFromPaths, self).setUp()
+        self.setup_fixtures()
+
+    def test_aligned_results(self):
+        """Results are returned in the same order as the paths, with the same values as template_from_path."""
+        paths = [
+            os.path.join(self.project_root, 'sequences/Sequence_1/shot_010/Anm/publish/shot_010.jfk.v001.ma'),
+            os.path.join(self.project_root, 'sequences/Sequence 1/shot_010/Anm/publish/'),
+            "Nuke Script Name, v002",
+            os.path.join(self.project_root, 'sequences/Sequence_1/shot_010/Anm/publish/shot_010.jfk.v002.ma'),
+            os.path.join(self.project_root, 'sequences/Sequence_1/shot_010/Anm/publish'),
+        ]
+        results = self.tk.templates_from_paths(paths)
+        self.assertEqual(len(paths), len(results))
+        for path, (template, error) in zip(paths, results):
+            self.assertTrue(error is None)
+            self.assertEqual(self.tk.template_from_path(path), template)
+        self.assertTrue(results[1][0] is None)
+        self.assertIsInstance(results[2][0], TemplateString)
+
+    def test_ambiguous_path(self):
+        """Ambiguous paths are reported without failing other paths."""
+        template = self.tk.templates["maya_shot_publish"]
+        self.tk.templates["maya_shot_publish_copy"] = TemplatePath(template.definition,
+                                                                   template.keys,
+                                                                   template.root_path)
+        paths = [
+            os.path.join(self.project_root, 'sequences/Sequence_1/shot_010/Anm/publish/shot_010.jfk.v001.ma'),
+            "Nuke Script Name, v002",
+        ]
+        results = self.tk.templates_from_paths(paths)
+        self.assertTrue(results[0][0] is None)
+        self.assertTrue("2 templates are matching the path" in results[0][1])
+        self.assertIsInstance(results[1][0], TemplateString)
+
 
 class TestTemplatesLoaded(TankTestBase):
     """Test case for the loading of templates from project level config."""
@@ -186,6 +246,24 @@ class TestPathsFromTemplate(TankTestBase):
         self.assertIn(good_file_path, result)
         self.assertNotIn(bad_file_path, result)
 
+    def test_max_workers(self):
+        """Test that using several threads returns the same, sorted, results."""
+        fields = {"Shot": "shot_1", "Step": "step_name", "Sequence": "Seq_1"}
+        expected = sorted([self.file_1, self.file_2])
+        self.assertEquals(expected, self.tk.paths_from_template(self.template, fields))
+        self.assertEquals(expected, self.tk.paths_from_template(self.template, fields, max_workers=4))
+        self.assertEquals(expected, self.tk.paths_from_template(self.template, {}, max_workers=4))
+
+    def test_scan_stats(self):
+        """Test that statistics are reported for the last search."""
+        self.assertEquals({}, self.tk.last_scan_stats)
+        self.tk.paths_from_template(self.template, {"Shot": "shot_1", "Step": "step_name", "Sequence": "Seq_1"})
+        stats = self.tk.last_scan_stats
+        # the work folder was the only one listed
+        self.assertEquals(1, stats["directories_listed"])
+        self.assertEquals(2, stats["entries_seen"])
+        self.assertTrue(stats["wall_time"] >= 0)
+
 
 class TestAbstractPathsFromTemplate(TankTestBase):
     """Tests Tank.abstract_paths_from_template method."""
@@ -306,9 +384,61 @@ class TestAbstractPathsFromTemplate(TankTestBase):
         result = self.tk.abstract_paths_from_template(self.template, {"name": "filename"})
         self.assertEquals(set(expected), set(result))
 
+    def test_sorted(self):
+        result = self.tk.abstract_paths_from_template(self.template, {})
+        self.assertEquals(sorted(result), result)
+
+    def test_include_frames(self):
+        expected = {"frames": [1, 2, 3, 4], "ranges": [(1, 4)], "missing": []}
+        result = self.tk.abstract_paths_from_template(self.template, {"Shot": "AAA"}, include_frames=True)
+        self.assertEquals(
+            {os.path.join(self.shot_a_path, "%V", "filename.%04d.exr"): expected,
+             os.path.join(self.shot_a_path, "%V", "anothername.%04d.exr"): expected},
+            result
+        )
+
+    def test_include_frames_missing(self):
+        # remove some frames from a single eye, the other eye
+        # still has them.
+        eye_left_a = os.path.join(self.shot_a_path, "left")
+        os.remove(os.path.join(eye_left_a, "filename.0002.exr"))
+        eye_right_a = os.path.join(self.shot_a_path, "right")
+        self.create_file(os.path.join(eye_right_a, "filename.0010.exr"))
+
+        result = self.tk.abstract_paths_from_template(
+            self.template, {"Shot": "AAA", "name": "filename"}, include_frames=True
+        )
+        self.assertEquals(
+            {os.path.join(self.shot_a_path, "%V", "filename.%04d.exr"): {
+                "frames": [1, 2, 3, 4, 10],
+                "ranges": [(1, 4), (10, 10)],
+                "missing": [(5, 9)]
+            }},
+            result
+        )
+
+        result = self.tk.abstract_paths_from_template(
+            self.template, {"Shot": "AAA", "name": "filename", "eye": "left"}, include_frames=True
+        )
+        self.assertEquals(
+            {os.path.join(self.shot_a_path, "left", "filename.%04d.exr"): {
+                "frames": [1, 3, 4],
+                "ranges": [(1, 1), (3, 4)],
+                "missing": [(2, 2)]
+            }},
+            result
+        )
+
+    def test_include_frames_specific_frame(self):
+        # frames are not collapsed when a frame is given
+        result = self.tk.abstract_paths_from_template(
+            self.template, {"Shot": "AAA", "name": "filename", "SEQ": 3}, include_frames=True
+        )
+        self.assertEquals({os.path.join(self.shot_a_path, "%V", "filename.0003.exr"): None}, result)
+
 
 class TestPathsFromTemplateGlob(TankTestBase):
-    """Tests for Tank.paths_from_template method which check the string sent to glob.glob."""
+    """Tests for Tank.paths_from_template method which check the glob pattern searched for."""
     def setUp(self):
         super(TestPathsFromTemplateGlob, self).setUp()
         keys = {"Shot": StringKey("Shot"),
@@ -317,7 +447,7 @@ class TestPathsFromTemplateGlob(TankTestBase):
 
         self.template = TemplatePath("{Shot}/{version}/filename.{seq_num}", keys, root_path=self.project_root)
 
-    @patch("tank.api.glob.iglob")
+    @patch("tank.template_walker.TemplateWalker._walk")
     def assert_glob(self, fields, expected_glob, skip_keys, mock_glob):
         # want to ensure that value returned from glob is returned
         expected = [os.path.join(self.project_root, "shot_1","001","filename.00001")]
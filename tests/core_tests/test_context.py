@@ -278,6 +278,46 @@ class TestFromPath(TestContext):
 
 
 
+class TestFromPaths(TestContext):
+
+    def test_same_as_from_path(self):
+        """Check contexts are the same as the ones built for each path."""
+        paths = [
+            os.path.join(self.step_path, "work", "file.ma"),
+            self.shot_path,
+            self.other_user_path,
+            self.alt_1_step_path,
+            os.path.abspath(os.path.join(self.project_root, "..")),
+            None,
+        ]
+        result = self.tk.contexts_from_paths(paths)
+        self.assertEquals(set(paths), set(result.keys()))
+        for path in paths:
+            expected = self.tk.context_from_path(path)
+            self.assertEquals(expected, result[path])
+            self.assertEquals(expected.user, result[path].user)
+
+    def test_shared_contexts(self):
+        """Check paths resolving to the same entities share their context."""
+        paths = [
+            os.path.join(self.step_path, "work", "a.ma"),
+            os.path.join(self.step_path, "work", "b.ma"),
+            self.alt_1_step_path,
+            self.shot_path,
+        ]
+        result = self.tk.contexts_from_paths(paths)
+        self.assertIs(result[paths[0]], result[paths[1]])
+        self.assertIs(result[paths[0]], result[paths[2]])
+        self.assertIsNot(result[paths[0]], result[paths[3]])
+
+    def test_hook_called_once(self):
+        """Check the additional entities hook is only run once."""
+        paths = [self.shot_path, self.step_path, self.other_user_path]
+        with patch.object(self.tk, "execute_core_hook", wraps=self.tk.execute_core_hook) as hook:
+            self.tk.contexts_from_paths(paths)
+        self.assertEquals(1, hook.call_count)
+
+
 class TestFromPathWithPrevious(TestContext):
 
     @patch("tank.util.login.get_current_user")
@@ -562,6 +602,102 @@ class TestFromEntity(TestContext):
         self.assertEquals(first_entity["name"], second_entity["name"])
 
 
+class TestFromEntities(TestContext):
+
+    def setUp(self):
+        super(TestFromEntities, self).setUp()
+
+        self.tasks = []
+        for task_id in [1, 2]:
+            task = {"id": task_id,
+                    "type": "Task",
+                    "content": "task_content_%d" % task_id,
+                    "project": self.project,
+                    "entity": self.shot,
+                    "step": self.step}
+            self.add_to_sg_mock_db(task)
+            self.tasks.append(task)
+
+        self.published_file = {"id": 5,
+                               "type": "PublishedFile",
+                               "code": "file.ma",
+                               "project": self.project,
+                               "entity": self.shot,
+                               "task": self.tasks[1]}
+        self.add_to_sg_mock_db(self.published_file)
+
+        self.entities = [
+            ("Task", 1),
+            ("Task", 2),
+            ("Shot", self.shot["id"]),
+            ("Project", self.project["id"]),
+            ("PublishedFile", self.published_file["id"]),
+        ]
+
+    def test_same_as_from_entity(self):
+        """Check contexts are the same as the ones built for each entity."""
+        result = self.tk.contexts_from_entities(self.entities)
+        self.assertEquals(set(self.entities), set(result.keys()))
+        for (entity_type, entity_id) in self.entities:
+            self.tk.context_cache.invalidate()
+            expected = self.tk.context_from_entity(entity_type, entity_id)
+            self.assertEquals(expected, result[(entity_type, entity_id)])
+            self.assertEquals(expected.additional_entities,
+                              result[(entity_type, entity_id)].additional_entities)
+
+    def test_batched_queries(self):
+        """Check tasks are looked up in Shotgun with a single query."""
+        num_finds_before = self.tk.shotgun.finds
+        result = self.tk.contexts_from_entities([("Task", 1), ("Task", 2)])
+        self.assertEquals(1, self.tk.shotgun.finds - num_finds_before)
+        self.assertEquals("task_content_1", result[("Task", 1)].task["name"])
+        self.assertEquals("task_content_2", result[("Task", 2)].task["name"])
+
+    def test_missing_task(self):
+        """Check an error is raised for tasks which don't exist."""
+        self.assertRaises(TankError, self.tk.contexts_from_entities, [("Task", 1), ("Task", 13)])
+
+    def test_cached(self):
+        """Check contexts are only looked up once."""
+        expected = self.tk.contexts_from_entities(self.entities)
+
+        num_finds_before = self.tk.shotgun.finds
+        result = self.tk.contexts_from_entities(self.entities)
+        self.assertEquals(num_finds_before, self.tk.shotgun.finds)
+        self.assertEquals(expected, result)
+
+        # modifying a context doesn't modify the cached ones
+        result[("Task", 1)].task["name"] = "foo"
+        self.assertEquals("task_content_1", self.tk.context_from_entity("Task", 1).task["name"])
+
+        # adding folders discards the cache
+        self.add_production_path(os.path.join(self.project_root, "other_shot"), self.shot)
+        self.tk.context_from_entity("Task", 1)
+        self.assertEquals(num_finds_before + 1, self.tk.shotgun.finds)
+
+    def test_cache_expiry(self):
+        """Check cached contexts expire."""
+        with patch("time.time", return_value=1000):
+            self.tk.context_from_entity("Task", 1)
+
+        num_finds_before = self.tk.shotgun.finds
+        with patch("time.time", return_value=1010):
+            self.tk.context_from_entity("Task", 1)
+        self.assertEquals(num_finds_before, self.tk.shotgun.finds)
+
+        with patch("time.time", return_value=1100):
+            self.tk.context_from_entity("Task", 1)
+        self.assertEquals(num_finds_before + 1, self.tk.shotgun.finds)
+
+    def test_cache_disabled(self):
+        """Check contexts are not cached when the cache is disabled."""
+        with patch.object(self.tk.pipeline_configuration, "get_context_cache_ttl", return_value=0):
+            self.tk.context_from_entity("Task", 1)
+            num_finds_before = self.tk.shotgun.finds
+            self.tk.context_from_entity("Task", 1)
+        self.assertEquals(num_finds_before + 1, self.tk.shotgun.finds)
+
+
 class TestAsTemplateFields(TestContext):
     def setUp(self):
         super(TestAsTemplateFields, self).setUp()
@@ -17,6 +17,7 @@ import cPickle as pickle
 import sqlite3
 import shutil
 import logging
+from mock import patch
 
 from tank_test.tank_test_base import *
 
@@ -95,6 +96,179 @@ class TestInit(TestPathCache):
         self.assertEquals(expected, column_names)
 
 
+    def test_db_schema_version(self):
+        """Test that new databases are created with the latest schema"""
+        c = self.path_cache._connection.cursor()
+        try:
+            self.assertEquals(path_cache._SCHEMA_VERSION, list(c.execute("PRAGMA user_version"))[0][0])
+            index_names = set(x[0] for x in c.execute("SELECT name FROM sqlite_master WHERE type='index'"))
+        finally:
+            c.close()
+        self.assertEquals(
+            set(["path_cache_path_entity", "path_cache_all", "shotgun_status_id", "shotgun_status_shotgun_id"]),
+            index_names
+        )
+
+    def test_db_schema_upgrade(self):
+        """Test that databases created with the first schema are upgraded"""
+        db_path = os.path.join(self.tank_temp, "path_cache_v1.db")
+        connection = sqlite3.connect(db_path)
+        try:
+            connection.executescript("""
+                CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
+                CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
+                CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
+                CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+                CREATE TABLE event_log_sync (last_id integer);
+                CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+                CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
+                INSERT INTO path_cache VALUES('Shot', 1, 'shot_name', 'primary', '/shot_name', 1);
+                """)
+            connection.commit()
+
+            path_cache._init_db_schema(connection)
+
+            self.assertEquals(path_cache._SCHEMA_VERSION, list(connection.execute("PRAGMA user_version"))[0][0])
+            index_names = set(x[0] for x in connection.execute("SELECT name FROM sqlite_master WHERE type='index'"))
+            self.assertEquals(
+                set(["path_cache_path_entity", "path_cache_all", "shotgun_status_id", "shotgun_status_shotgun_id"]),
+                index_names
+            )
+            self.assertEquals(
+                [("Shot", 1, "shot_name", "primary", "/shot_name", 1)],
+                list(connection.execute("SELECT * FROM path_cache"))
+            )
+        finally:
+            connection.close()
+
+    def test_wal_journal(self):
+        """Test that write-ahead logging is enabled when requested"""
+        # the setting is only checked when the schema of a database is checked
+        self.path_cache.close()
+        self.tk.path_cache_pool.close()
+        os.remove(self.path_cache_location)
+
+        with patch("tank.path_cache._enable_wal_journal") as enable_wal_journal:
+            pc = path_cache.PathCache(self.tk)
+            pc.close()
+            self.assertEquals(0, enable_wal_journal.call_count)
+
+            os.remove(self.path_cache_location)
+            with patch.object(self.tk.pipeline_configuration, "get_path_cache_wal_enabled", return_value=True):
+                pc = path_cache.PathCache(self.tk)
+                pc.close()
+            self.assertEquals(1, enable_wal_journal.call_count)
+
+        db_path = os.path.join(self.tank_temp, "path_cache_wal.db")
+        connection = sqlite3.connect(db_path)
+        try:
+            path_cache._enable_wal_journal(connection, db_path)
+            self.assertEquals("wal", list(connection.execute("PRAGMA journal_mode"))[0][0])
+        finally:
+            connection.close()
+
+
+class TestConnectionPool(TestPathCache):
+
+    def test_connection_reused(self):
+        """
+        Test that a closed path cache hands its connection to the next one.
+        """
+        connection = self.path_cache._connection
+        self.path_cache.close()
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertIs(pc._connection, connection)
+        finally:
+            pc.close()
+
+    def test_concurrent_connections(self):
+        """
+        Test that path caches open at the same time use their own connection.
+        """
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertIsNot(pc._connection, self.path_cache._connection)
+        finally:
+            pc.close()
+
+    def test_writes_visible(self):
+        """
+        Test that data added through a connection is seen through the others.
+        """
+        pc = path_cache.PathCache(self.tk)
+        try:
+            entity = {"type": "Shot", "id": 1, "name": "shot_name"}
+            full_path = os.path.join(self.project_root, "shot_name")
+            add_item_to_cache(pc, entity, full_path)
+            self.assertEquals(entity, self.path_cache.get_entity(full_path))
+        finally:
+            pc.close()
+
+    def test_database_replaced(self):
+        """
+        Test that pooled connections are dropped when the database file is recreated.
+        """
+        entity = {"type": "Shot", "id": 1, "name": "shot_name"}
+        full_path = os.path.join(self.project_root, "shot_name")
+        add_item_to_cache(self.path_cache, entity, full_path)
+        connection = self.path_cache._connection
+        self.path_cache.close()
+        os.remove(self.path_cache_location)
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertIsNot(pc._connection, connection)
+            self.assertIsNone(pc.get_entity(full_path))
+        finally:
+            pc.close()
+
+
+
+class TestStats(TestPathCache):
+
+    def setUp(self):
+        super(TestStats, self).setUp()
+        self.tk.reset_path_cache_stats()
+
+    def test_queries(self):
+        """
+        Test that queries and the rows they return are counted.
+        """
+        entity = {"type": "Shot", "id": 1, "name": "shot_name"}
+        full_path = os.path.join(self.project_root, "shot_name")
+        add_item_to_cache(self.path_cache, entity, full_path)
+        self.tk.reset_path_cache_stats()
+
+        self.assertEquals(entity, self.path_cache.get_entity(full_path))
+        self.assertEquals([full_path], self.path_cache.get_paths("Shot", 1, False))
+        stats = self.tk.path_cache_stats
+        self.assertEquals(["query"], stats.keys())
+        self.assertEquals(2, stats["query"]["count"])
+        self.assertEquals(2, stats["query"]["rows"])
+
+        self.tk.reset_path_cache_stats()
+        self.assertEquals({}, self.tk.path_cache_stats)
+
+    def test_connect(self):
+        """
+        Test that connections are counted.
+        """
+        pc = path_cache.PathCache(self.tk)
+        pc.close()
+        self.assertEquals(1, self.tk.path_cache_stats["connect"]["count"])
+
+    def test_slow_query(self):
+        """
+        Test that slow queries are logged.
+        """
+        self.path_cache._connection.slow_query_threshold = 0
+        with patch("tank.path_cache.log") as log:
+            self.path_cache.get_paths("Shot", 1, False)
+        self.assertEquals(1, self.tk.path_cache_stats["slow_query"]["count"])
+        self.assertEquals(1, log.info.call_count)
+        self.assertIn("SELECT root, path FROM path_cache", log.info.call_args[0][0])
+
 
 class TestAddMapping(TestPathCache):
     def setUp(self):
@@ -227,6 +401,119 @@ class TestAddMapping(TestPathCache):
         self.assertEquals(entity_name, entry[0])
 
 
+    def test_batch_duplicates(self):
+        """
+        Test that mappings repeated in a single batch are only added once.
+        """
+        full_path = os.path.join(self.project_root, "shot")
+        other = {"type": self.entity["type"], "id": self.entity["id"] + 1, "name": "other"}
+        data = [
+            {"entity": self.entity, "path": full_path, "primary": True, "metadata": {}},
+            {"entity": self.entity, "path": full_path, "primary": True, "metadata": {}},
+            {"entity": self.entity, "path": full_path, "primary": False, "metadata": {}},
+            {"entity": other, "path": full_path, "primary": False, "metadata": {}},
+            {"entity": other, "path": full_path, "primary": False, "metadata": {}},
+        ]
+        self.path_cache.add_mappings(data, None, [])
+
+        res = self.db_cursor.execute("SELECT entity_id, primary_entity FROM path_cache WHERE path = ?", ("/shot", ))
+        self.assertEquals([(self.entity["id"], 1), (other["id"], 0)], sorted(res.fetchall()))
+
+    def test_batch_conflict(self):
+        """
+        Test that nothing is added if a batch associates a path with several entities.
+        """
+        other = {"type": self.entity["type"], "id": self.entity["id"] + 1, "name": "other"}
+        data = [
+            {"entity": self.entity, "path": os.path.join(self.project_root, "shot_a"), "primary": True, "metadata": {}},
+            {"entity": self.entity, "path": os.path.join(self.project_root, "shot_b"), "primary": True, "metadata": {}},
+            {"entity": other, "path": os.path.join(self.project_root, "shot_b"), "primary": True, "metadata": {}},
+        ]
+        self.assertRaises(tank.TankError, self.path_cache.add_mappings, data, None, [])
+
+        res = self.db_cursor.execute("SELECT path FROM path_cache WHERE entity_type = ?", (self.entity["type"], ))
+        self.assertEquals([], res.fetchall())
+
+
+class TestValidateMappings(TestPathCache):
+
+    def setUp(self):
+        super(TestValidateMappings, self).setUp()
+        self.shot = {"type": "Shot", "id": 1, "name": "shot_a"}
+        self.shot_path = os.path.join(self.project_root, "shots", "shot_a")
+        add_item_to_cache(self.path_cache, self.shot, self.shot_path)
+
+    def _mapping(self, entity, path, primary=True):
+        return {"entity": entity, "path": path, "primary": primary, "metadata": {}}
+
+    def test_valid(self):
+        """
+        Test that new and existing mappings are valid.
+        """
+        other_shot = {"type": "Shot", "id": 2, "name": "shot_b"}
+        self.path_cache.validate_mappings([
+            self._mapping(self.shot, self.shot_path),
+            self._mapping(other_shot, os.path.join(self.project_root, "shots", "shot_b")),
+            # secondary entities can share a path
+            self._mapping(other_shot, self.shot_path, primary=False),
+            # paths outside of the project can't conflict
+            self._mapping(other_shot, os.path.join(self.tank_temp, "outside", "shot_b")),
+        ])
+
+    def test_path_taken(self):
+        """
+        Test that a path can't be associated with another entity.
+        """
+        other_shot = {"type": "Shot", "id": 2, "name": "shot_a"}
+        with self.assertRaisesRegexp(tank.TankError, "already associated with Shot 'shot_a' \\(id 1\\)"):
+            self.path_cache.validate_mappings([
+                self._mapping(other_shot, os.path.join(self.project_root, "shots", "shot_b")),
+                self._mapping(other_shot, self.shot_path),
+            ])
+
+    def test_renamed(self):
+        """
+        Test that an entity can't get another folder in the same parent folder.
+        """
+        renamed_path = os.path.join(self.project_root, "shots", "shot_renamed")
+        with self.assertRaisesRegexp(tank.TankError, "another path '%s'" % self.shot_path):
+            self.path_cache.validate_mappings([self._mapping(self.shot, renamed_path)])
+
+        # but it can in other folders
+        self.path_cache.validate_mappings([
+            self._mapping(self.shot, os.path.join(self.project_root, "other_shots", "shot_renamed"))
+        ])
+
+    def test_first_error(self):
+        """
+        Test that the error of the first invalid mapping is reported.
+        """
+        other_shot = {"type": "Shot", "id": 2, "name": "shot_b"}
+        renamed_path = os.path.join(self.project_root, "shots", "shot_renamed")
+        with self.assertRaisesRegexp(tank.TankError, "another path"):
+            self.path_cache.validate_mappings([
+                self._mapping(self.shot, renamed_path),
+                self._mapping(other_shot, self.shot_path),
+            ])
+
+    def test_check_mappings(self):
+        """
+        Test that all conflicts are reported, along with the registered mappings.
+        """
+        other_shot = {"type": "Shot", "id": 2, "name": "shot_b"}
+        renamed_path = os.path.join(self.project_root, "shots", "shot_renamed")
+        (conflicts, registered) = self.path_cache.check_mappings([
+            self._mapping(self.shot, self.shot_path),
+            self._mapping(self.shot, renamed_path),
+            self._mapping(other_shot, os.path.join(self.project_root, "shots", "shot_b")),
+            self._mapping(other_shot, self.shot_path),
+        ])
+        self.assertEqual(sorted(conflicts), [1, 3])
+        self.assertTrue("another path '%s'" % self.shot_path in conflicts[1])
+        self.assertTrue("already associated with Shot 'shot_a'" in conflicts[3])
+        self.assertEqual(registered, set([0]))
+
+
 class TestGetEntity(TestPathCache):
     """
     Tests for get_entity. 
@@ -288,6 +575,164 @@ class TestGetEntity(TestPathCache):
         self.assertIsNone(result)
 
 
+class TestGetAncestorEntities(TestPathCache):
+    """
+    Tests for get_ancestor_entities.
+    """
+    def setUp(self):
+        super(TestGetAncestorEntities, self).setUp()
+        self.proj = {"type": "Project", "id": self.project["id"], "name": self.project["name"]}
+        self.seq = {"type": "Sequence", "id": 1, "name": "seq_name"}
+        self.shot = {"type": "Shot", "id": 2, "name": "shot_name"}
+        self.step = {"type": "Step", "id": 3, "name": "step_name"}
+
+        self.seq_path = os.path.join(self.project_root, "seq_name")
+        self.shot_path = os.path.join(self.seq_path, "shot_name")
+        self.step_path = os.path.join(self.shot_path, "step_name")
+
+        add_item_to_cache(self.path_cache, self.proj, self.project_root)
+        add_item_to_cache(self.path_cache, self.seq, self.seq_path)
+        add_item_to_cache(self.path_cache, self.shot, self.shot_path)
+        # the shot folder also represents its sequence
+        add_item_to_cache(self.path_cache, self.seq, self.shot_path, primary=False)
+        add_item_to_cache(self.path_cache, self.step, self.step_path)
+
+    def test_ancestors(self):
+        """Test the entities of a path and all its parents are returned."""
+        work_path = os.path.join(self.step_path, "work")
+        result = self.path_cache.get_ancestor_entities(work_path)
+        self.assertEquals(
+            [
+                (work_path, None, []),
+                (self.step_path, self.step, []),
+                (self.shot_path, self.shot, [self.seq]),
+                (self.seq_path, self.seq, []),
+                (self.project_root, self.proj, []),
+            ],
+            result
+        )
+
+    def test_same_as_single_lookups(self):
+        """Test the entities are the same as when looking up each folder."""
+        work_path = os.path.join(self.step_path, "work", "file.ma")
+        for (path, entity, secondary_entities) in self.path_cache.get_ancestor_entities(work_path):
+            self.assertEquals(self.path_cache.get_entity(path), entity)
+            self.assertEquals(self.path_cache.get_secondary_entities(path), secondary_entities)
+
+    def test_alternate_root(self):
+        """Test the walk stops at a non-primary root."""
+        proj_path = self.alt_root_1
+        shot_path = os.path.join(proj_path, "seq_name", "shot_name")
+        add_item_to_cache(self.path_cache, self.proj, proj_path)
+        add_item_to_cache(self.path_cache, self.shot, shot_path)
+
+        result = self.path_cache.get_ancestor_entities(shot_path)
+        self.assertEquals(
+            [
+                (shot_path, self.shot, []),
+                (os.path.dirname(shot_path), None, []),
+                (proj_path, self.proj, []),
+            ],
+            result
+        )
+
+    def test_non_project_path(self):
+        """Test paths outside of the project have no entities."""
+        path = os.path.join(self.tank_temp, "outside", "project")
+        result = self.path_cache.get_ancestor_entities(path)
+        self.assertEquals(path, result[0][0])
+        self.assertEquals(os.path.dirname(path), result[1][0])
+        for (_, entity, secondary_entities) in result:
+            self.assertIsNone(entity)
+            self.assertEquals([], secondary_entities)
+
+    def test_none(self):
+        """Test None paths have no ancestors."""
+        self.assertEquals([], self.path_cache.get_ancestor_entities(None))
+
+    def test_many(self):
+        """Test looking up several paths is the same as looking up each path."""
+        paths = [
+            os.path.join(self.step_path, "work", "a.ma"),
+            os.path.join(self.step_path, "work", "b.ma"),
+            os.path.join(self.shot_path, "other"),
+            self.seq_path,
+            os.path.join(self.alt_root_1, "seq_name"),
+            os.path.join(self.tank_temp, "outside", "project"),
+            None,
+        ]
+        # force the folders to be looked up in several queries
+        with patch.object(path_cache.PathCache, "_MAX_QUERY_PARAMETERS", 3):
+            result = self.path_cache.get_ancestor_entities_many(paths)
+        self.assertEquals(set(paths[:-1]), set(result.keys()))
+        for path in paths[:-1]:
+            self.assertEquals(self.path_cache.get_ancestor_entities(path), result[path])
+
+
+class TestPathCacheSnapshot(TestGetAncestorEntities):
+    """
+    Runs the ancestor lookup tests against the in-memory copy of the path cache.
+    """
+    def setUp(self):
+        super(TestPathCacheSnapshot, self).setUp()
+        self.pipeline_configuration._use_path_cache_snapshot = True
+        self.path_cache.close()
+        self.path_cache = path_cache.PathCache(self.tk)
+
+    def _no_database(self):
+        raise AssertionError("The database was queried.")
+
+    def test_no_queries(self):
+        """Test lookups are answered without querying the database once loaded."""
+        self.assertIsNotNone(self.path_cache._get_snapshot())
+        work_path = os.path.join(self.step_path, "work")
+        with patch.object(path_cache.PathCache, "_read_connection", property(self._no_database)):
+            self.assertEquals(self.shot, self.path_cache.get_entity(self.shot_path))
+            self.assertEquals([self.seq], self.path_cache.get_secondary_entities(self.shot_path))
+            self.assertEquals([self.shot_path], self.path_cache.get_paths("Shot", 2, True))
+            self.assertEquals(
+                [self.seq_path, self.shot_path],
+                self.path_cache.get_paths("Sequence", 1, False)
+            )
+            self.assertEquals([self.seq_path], self.path_cache.get_paths("Sequence", 1, True))
+            self.assertEquals(5, len(self.path_cache.get_ancestor_entities(work_path)))
+
+    def test_shared(self):
+        """Test path caches share the copy loaded by the toolkit instance."""
+        snapshot = self.path_cache._get_snapshot()
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertIs(snapshot, pc._get_snapshot())
+        finally:
+            pc.close()
+
+    def test_refresh(self):
+        """Test the copy is loaded again when another path cache writes to the database."""
+        self.assertIsNone(self.path_cache.get_entity(os.path.join(self.step_path, "work")))
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            # no invalidation, as if written by another process
+            pc._use_snapshot = False
+            work = {"type": "Task", "id": 4, "name": "work"}
+            add_item_to_cache(pc, work, os.path.join(self.step_path, "work"))
+        finally:
+            pc.close()
+
+        self.path_cache.close()
+        self.path_cache = path_cache.PathCache(self.tk)
+        self.assertEquals(work, self.path_cache.get_entity(os.path.join(self.step_path, "work")))
+
+    def test_max_rows(self):
+        """Test path caches larger than the budget are not loaded."""
+        self.pipeline_configuration._path_cache_snapshot_max_rows = 1
+        self.tk.path_cache_snapshot.invalidate()
+        self.path_cache.close()
+        self.path_cache = path_cache.PathCache(self.tk)
+        self.assertIsNone(self.path_cache._get_snapshot())
+        self.test_ancestors()
+
+
 class TestGetPaths(TestPathCache):
     def test_add_and_find_shot(self):
         # add two paths to cache for a shot
@@ -453,6 +898,102 @@ class TestShotgunSync(TankTestBase):
         
         
         
+    def test_folder_tree(self):
+        """Test that the folders below a folder are found from its shotgun id."""
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+
+        pc = tank.path_cache.PathCache(self.tk)
+        try:
+            (seq_path, ) = pc.get_paths(self.seq["type"], self.seq["id"], primary_only=True)
+            (shot_path, ) = pc.get_paths(self.shot["type"], self.shot["id"], primary_only=True)
+            (step_path, ) = pc.get_paths(self.step["type"], self.step["id"], primary_only=True)
+
+            tree = pc.get_folder_tree_from_sg_id(pc.get_shotgun_id_from_path(seq_path))
+            self.assertEquals(
+                sorted([(p, pc.get_shotgun_id_from_path(p)) for p in [seq_path, shot_path, step_path]]),
+                sorted([(x["path"], x["sg_id"]) for x in tree])
+            )
+
+            tree = pc.get_folder_tree_from_sg_id(pc.get_shotgun_id_from_path(step_path))
+            self.assertEquals([step_path], [x["path"] for x in tree])
+        finally:
+            pc.close()
+
+    def test_batched_upload(self):
+        """Test that folders are created in Shotgun in batches."""
+        with patch.object(self.tk.pipeline_configuration, "get_path_cache_upload_batch_size", return_value=2):
+            with patch.object(self.tk.shotgun, "batch", wraps=self.tk.shotgun.batch) as batch:
+                folder.process_filesystem_structure(self.tk,
+                                                    self.task["type"],
+                                                    self.task["id"],
+                                                    preview=False,
+                                                    engine=None)
+        # sequence, shot and step folders
+        self.assertEquals([2, 1], [len(x[0][0]) for x in batch.call_args_list])
+
+        sg_ids = sorted(x["id"] for x in self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, []))
+        self.assertEquals(4, len(sg_ids))
+        folder_events = self.tk.shotgun.find("EventLogEntry",
+                                             [["event_type", "is", "Toolkit_Folders_Create"]],
+                                             ["meta"],
+                                             [{"field_name": "id", "direction": "asc"}])
+        self.assertEquals(sg_ids[1:], sorted(folder_events[-1]["meta"]["sg_folder_ids"]))
+
+        pc = tank.path_cache.PathCache(self.tk)
+        try:
+            for sg_id in sg_ids:
+                self.assertEquals(1, len(list(pc._connection.execute(
+                    "SELECT * FROM shotgun_status WHERE shotgun_id = ?", (sg_id, )
+                ))))
+        finally:
+            pc.close()
+
+    def test_failed_upload(self):
+        """Test that nothing is registered if folders can't be created in Shotgun."""
+        batch_method = self.tk.shotgun.batch
+
+        def batch(requests):
+            if requests[0]["request_type"] == "create" and batch.calls:
+                raise Exception("Timeout")
+            batch.calls += 1
+            return batch_method(requests)
+        batch.calls = 0
+
+        with patch.object(self.tk.pipeline_configuration, "get_path_cache_upload_batch_size", return_value=2):
+            with patch.object(self.tk.shotgun, "batch", side_effect=batch):
+                self.assertRaises(tank.TankError,
+                                  folder.process_filesystem_structure,
+                                  self.tk,
+                                  self.task["type"],
+                                  self.task["id"],
+                                  preview=False,
+                                  engine=None)
+
+        # the records of the first batch were deleted
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 1)
+        self.assertEqual(len(self._get_path_cache()), 1)
+
+    def test_sync_stats(self):
+        """Test that synchronizations and uploads are counted."""
+        self.tk.reset_path_cache_stats()
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        stats = self.tk.path_cache_stats
+        self.assertEquals(1, stats["shotgun_upload"]["count"])
+        self.assertEquals(3, stats["shotgun_upload"]["rows"])
+
+        sync_path_cache(self.tk, force_full_sync=True)
+        stats = self.tk.path_cache_stats
+        self.assertEquals(1, stats["full_sync"]["count"])
+        self.assertEquals(4, stats["full_sync"]["rows"])
+
     def test_no_new_folders_created(self):
         """
         Test the case when folder creation is running for an already existing path 
@@ -579,6 +1120,80 @@ class TestShotgunSync(TankTestBase):
         self.assertEqual( len(self._get_path_cache()), 4)
 
 
+    def _paged_find(self, pages, fail_after=None):
+        """
+        Returns a replacement for mockgun's find which honours the limit
+        argument, and fails after a given number of pages.
+
+        :param pages: List the pages returned are appended to.
+        :param fail_after: Number of pages after which an exception is raised.
+        """
+        find = self.tk.shotgun.find
+
+        def paged_find(*args, **kwargs):
+            limit = kwargs.pop("limit", 0)
+            result = find(*args, **kwargs)
+            if not limit:
+                return result
+            if fail_after is not None and len(pages) >= fail_after:
+                raise Exception("Connection lost")
+            pages.append(result[:limit])
+            return result[:limit]
+
+        return paged_find
+
+    def test_paged_full_sync(self):
+        """
+        Tests that a full sync inserts the FilesystemLocations page by page.
+        """
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        path_cache_contents_1 = self._get_path_cache()
+        self.assertEqual(len(path_cache_contents_1), 4)
+
+        with patch("tank.constants.PATH_CACHE_SYNC_PAGE_SIZE", 1):
+            pages = []
+            with patch.object(self.tk.shotgun, "find", side_effect=self._paged_find(pages)):
+                sync_path_cache(self.tk, force_full_sync=True)
+            # 4 pages, and an empty one
+            self.assertEqual([len(page) for page in pages], [1, 1, 1, 1, 0])
+
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+    def test_resumed_full_sync(self):
+        """
+        Tests that an interrupted full sync continues where it stopped.
+        """
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        path_cache_contents_1 = self._get_path_cache()
+
+        with patch("tank.constants.PATH_CACHE_SYNC_PAGE_SIZE", 1):
+            with patch.object(self.tk.shotgun, "find", side_effect=self._paged_find([], fail_after=2)):
+                self.assertRaises(Exception, sync_path_cache, self.tk, True)
+
+            # the first two pages were committed
+            self.assertEqual(len(self._get_path_cache()), 2)
+
+            pages = []
+            with patch.object(self.tk.shotgun, "find", side_effect=self._paged_find(pages)):
+                log = sync_path_cache(self.tk)
+            # the two remaining pages, and an empty one
+            self.assertEqual([len(page) for page in pages], [1, 1, 0])
+
+        self.assertTrue("Resuming the complete Shotgun folder sync" in log)
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+        # the next sync is incremental again
+        log = sync_path_cache(self.tk)
+        self.assertTrue("Path cache syncing not necessary" in log)
+
     def test_truncated_eventlog(self):
         """Tests that a full sync happens if the event log is truncated."""
 
@@ -649,6 +1264,75 @@ class TestShotgunSync(TankTestBase):
 
 
 
+class TestPathCacheReplica(TankTestBase):
+
+    def setUp(self):
+        super(TestPathCacheReplica, self).setUp()
+        self.setup_fixtures()
+
+        self.seq = {"type": "Sequence",
+                    "id": 2,
+                    "code": "seq_code",
+                    "project": self.project}
+        self.add_to_sg_mock_db([self.seq])
+
+        self.pipeline_configuration._use_path_cache_replica = True
+        self.seq_path = os.path.join(self.project_root, "sequences", "seq_code")
+
+    def _get_seq_paths(self):
+        pc = path_cache.PathCache(self.tk)
+        try:
+            paths = pc.get_paths(self.seq["type"], self.seq["id"], False)
+            # lookups should never touch the shared database
+            self.assertIsNone(pc._shared_connection)
+        finally:
+            pc.close()
+        return paths
+
+    def _create_seq_folders(self):
+        folder.process_filesystem_structure(self.tk,
+                                            self.seq["type"],
+                                            self.seq["id"],
+                                            preview=False,
+                                            engine=None)
+
+    def test_lookup(self):
+        """
+        Test that lookups are served by a replica synchronized with Shotgun.
+        """
+        self.assertEquals(self._get_seq_paths(), [])
+        self._create_seq_folders()
+        self.assertEquals(self._get_seq_paths(), [self.seq_path])
+        self.assertTrue(os.path.exists(self.tk.path_cache_replica_pool.get_location()))
+
+    def test_max_age(self):
+        """
+        Test that the replica is only synchronized again when older than the max age.
+        """
+        self.pipeline_configuration._path_cache_replica_max_age = 3600
+        self.assertEquals(self._get_seq_paths(), [])
+
+        # folders created from another machine don't invalidate the local replica
+        self.pipeline_configuration._use_path_cache_replica = False
+        self._create_seq_folders()
+        self.pipeline_configuration._use_path_cache_replica = True
+        self.assertEquals(self._get_seq_paths(), [])
+
+        self.pipeline_configuration._path_cache_replica_max_age = 0
+        self.assertEquals(self._get_seq_paths(), [self.seq_path])
+
+    def test_sync_failure(self):
+        """
+        Test that a replica synchronized before is used when Shotgun can't be reached.
+        """
+        self.pipeline_configuration._path_cache_replica_max_age = 0
+        self._create_seq_folders()
+        self.assertEquals(self._get_seq_paths(), [self.seq_path])
+
+        with patch.object(self.tk.shotgun, "find", side_effect=Exception("Shotgun is down")):
+            self.assertEquals(self._get_seq_paths(), [self.seq_path])
+
+
 class TestConcurrentShotgunSync(TankTestBase):
     """
     Tests that the path cache can gracefully handle multiple
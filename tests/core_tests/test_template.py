@@ -388,3 +388,69 @@ class TestReadTemplates(TankTestBase):
     def test_exclusions(self):
         key = self.tk.templates["asset_work_area"].keys["Asset"]
         self.assertEquals(["Seq", "Shot"], key.exclusions)
+
+    def test_fields_cache_size(self):
+        """Check the fields cache size is read from the pipeline configuration."""
+        self.assertEquals(
+            self.pipeline_configuration.get_template_fields_cache_size(),
+            self.tk.templates["maya_shot_work"].fields_cache_size
+        )
+
+        self.pipeline_configuration._template_fields_cache_size = 10
+        self.tk.reload_templates()
+        self.assertEquals(10, self.tk.templates["maya_shot_work"].fields_cache_size)
+
+
+class TestFieldsCache(TestTemplate):
+    """Test caching of the fields extracted from paths."""
+    def setUp(self):
+        super(TestFieldsCache, self).setUp()
+        self.template_path = TemplatePath("shots/{Shot}/work/{name}.v{version}.ma", self.keys, self.project_root)
+        self.path = os.path.join(self.project_root, "shots", "s1", "work", "foo.v001.ma")
+
+    def test_hits(self):
+        expected = {"Shot": "s1", "name": "foo", "version": 1}
+        self.assertEquals(expected, self.template_path.get_fields(self.path))
+        self.assertEquals(expected, self.template_path.get_fields(self.path))
+        self.assertTrue(self.template_path.validate(self.path))
+        self.assertEquals(2, self.template_path.fields_cache_hits)
+        self.assertEquals(1, self.template_path.fields_cache_misses)
+
+        # skip keys are part of the cache key
+        self.assertEquals({"Shot": "s1", "version": 1}, self.template_path.get_fields(self.path, ["name"]))
+        self.assertEquals(2, self.template_path.fields_cache_misses)
+
+    def test_errors(self):
+        bad_path = os.path.join(self.project_root, "shots", "s3", "work", "foo.v001.ma")
+        self.assertRaises(TankError, self.template_path.get_fields, bad_path)
+        self.assertRaises(TankError, self.template_path.get_fields, bad_path)
+        self.assertFalse(self.template_path.validate(bad_path))
+        self.assertEquals(2, self.template_path.fields_cache_hits)
+
+    def test_copies(self):
+        fields = self.template_path.get_fields(self.path)
+        fields["Shot"] = "s2"
+        self.assertEquals("s1", self.template_path.get_fields(self.path)["Shot"])
+
+    def test_size(self):
+        self.template_path.fields_cache_size = 2
+        paths = [os.path.join(self.project_root, "shots", "s1", "work", "foo.v00%d.ma" % i) for i in range(3)]
+        for path in paths:
+            self.template_path.get_fields(path)
+
+        # the least recently used path was discarded
+        self.template_path.get_fields(paths[0])
+        self.assertEquals(0, self.template_path.fields_cache_hits)
+        self.template_path.get_fields(paths[2])
+        self.assertEquals(1, self.template_path.fields_cache_hits)
+
+        self.template_path.fields_cache_size = 0
+        self.template_path.get_fields(paths[2])
+        self.assertEquals(1, self.template_path.fields_cache_hits)
+
+    def test_clear(self):
+        self.template_path.get_fields(self.path)
+        self.template_path.clear_fields_cache()
+        self.assertEquals(0, self.template_path.fields_cache_misses)
+        self.template_path.get_fields(self.path)
+        self.assertEquals(0, self.template_path.fields_cache_hits)
@@ -0,0 +1,213 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import sys
+import stat
+import datetime
+
+from mock import patch
+
+from tank.template import read_templates
+
+from tank_test.tank_test_base import *
+
+
+class TestTemplatesCache(TankTestBase):
+    """
+    Tests for the persistent templates cache.
+    """
+    def setUp(self):
+        super(TestTemplatesCache, self).setUp()
+
+        self.pipeline_configuration._use_templates_cache = True
+        self.cache_file = self.pipeline_configuration.get_templates_cache_location()
+        templates_file = self.pipeline_configuration.get_templates_config_location()
+        self.include_file = os.path.join(os.path.dirname(templates_file), "shot_templates.yml")
+
+        self.create_file(
+            templates_file,
+            "include: ./shot_templates.yml\n"
+            "keys:\n"
+            "    name: {type: str}\n"
+            "paths:\n"
+            "    asset_work: assets/{name}/work/{name}.v{version}.ma\n"
+            "strings:\n"
+            "    work_name: '{name} v{version}'\n"
+        )
+        self._write_include("v{version}")
+
+    def _write_include(self, version_token):
+        """
+        Writes the included templates file.
+        """
+        self.create_file(
+            self.include_file,
+            "keys:\n"
+            "    Shot: {type: str}\n"
+            "    version: {type: int, format_spec: '03'}\n"
+            "paths:\n"
+            "    shot_work: shots/{Shot}/work/{name}.%s.ma\n" % version_token
+        )
+
+    def test_cache_used(self):
+        """
+        Ensures templates are read from the cache when nothing changed.
+        """
+        templates = read_templates(self.pipeline_configuration)
+        self.assertTrue(os.path.exists(self.cache_file))
+
+        with patch.object(self.pipeline_configuration, "get_templates_config") as get_config_mock:
+            cached_templates = read_templates(self.pipeline_configuration)
+        self.assertEqual(0, get_config_mock.call_count)
+
+        self.assertEqual(sorted(templates), sorted(cached_templates))
+        for name, template in templates.iteritems():
+            cached_template = cached_templates[name]
+            self.assertEqual(template.definition, cached_template.definition)
+            self.assertEqual(sorted(template.keys), sorted(cached_template.keys))
+            self.assertEqual(template._static_tokens, cached_template._static_tokens)
+
+        fields = {"Shot": "shot_1", "name": "foo", "version": 3}
+        path = cached_templates["shot_work"].apply_fields(fields)
+        self.assertEqual(templates["shot_work"].apply_fields(fields), path)
+        self.assertEqual(fields, cached_templates["shot_work"].get_fields(path))
+        self.assertEqual("foo v003", cached_templates["work_name"].apply_fields(fields))
+
+        # keys are still shared between templates
+        self.assertTrue(
+            cached_templates["shot_work"].keys["name"] is cached_templates["asset_work"].keys["name"]
+        )
+
+    def test_timestamp_default(self):
+        """
+        Ensures templates using keys which default to the current time are cached.
+        """
+        self.create_file(
+            self.include_file,
+            "keys:\n"
+            "    Shot: {type: str}\n"
+            "    version: {type: int, format_spec: '03'}\n"
+            "    timestamp: {type: timestamp, default: now, format_spec: '%Y%m%d'}\n"
+            "paths:\n"
+            "    shot_work: shots/{Shot}/work/{name}.v{version}.{timestamp}.ma\n"
+        )
+        read_templates(self.pipeline_configuration)
+
+        with patch.object(self.pipeline_configuration, "get_templates_config") as get_config_mock:
+            templates = read_templates(self.pipeline_configuration)
+        self.assertEqual(0, get_config_mock.call_count)
+
+        path = templates["shot_work"].apply_fields({"Shot": "shot_1", "name": "foo", "version": 3})
+        self.assertTrue(path.endswith(".v003.%s.ma" % datetime.datetime.now().strftime("%Y%m%d")))
+
+    def test_included_file_changed(self):
+        """
+        Ensures the cache is rebuilt when an included file changes.
+        """
+        read_templates(self.pipeline_configuration)
+        self._write_include("version{version}")
+
+        templates = read_templates(self.pipeline_configuration)
+        self.assertEqual(
+            os.path.join(self.project_root, "shots", "shot_1", "work", "foo.version003.ma"),
+            templates["shot_work"].apply_fields({"Shot": "shot_1", "name": "foo", "version": 3})
+        )
+
+        # the rebuilt templates were stored
+        with patch.object(self.pipeline_configuration, "get_templates_config") as get_config_mock:
+            read_templates(self.pipeline_configuration)
+        self.assertEqual(0, get_config_mock.call_count)
+
+    def test_corrupted_cache(self):
+        """
+        Ensures a cache which can't be read is ignored.
+        """
+        self.create_file(self.cache_file, "not json")
+        templates = read_templates(self.pipeline_configuration)
+        self.assertTrue("shot_work" in templates)
+
+    def test_permissions(self):
+        """
+        Ensures the cache is only readable by the users who can read the configuration.
+        """
+        # permissions are controlled by ACLs on windows
+        if sys.platform == "win32":
+            return
+
+        os.chmod(os.path.dirname(self.cache_file), 0750)
+        read_templates(self.pipeline_configuration)
+        self.assertEqual(0640, stat.S_IMODE(os.stat(self.cache_file).st_mode))
+
+    def test_untrusted_cache(self):
+        """
+        Ensures a cache which could have been written by another user is ignored.
+        """
+        # ownership and permissions are controlled by ACLs on windows
+        if sys.platform == "win32":
+            return
+
+        read_templates(self.pipeline_configuration)
+
+        # writable by everyone
+        os.chmod(self.cache_file, 0666)
+        with patch.object(self.pipeline_configuration, "get_templates_config",
+                          wraps=self.pipeline_configuration.get_templates_config) as get_config_mock:
+            read_templates(self.pipeline_configuration)
+        self.assertEqual(1, get_config_mock.call_count)
+
+        # owned by another user than the current one, who owns the configuration
+        with patch("tank.util.cache_file.os.fstat") as fstat_mock:
+            fstat_mock.return_value.st_uid = os.getuid() + 1
+            fstat_mock.return_value.st_mode = 0100644
+            with patch.object(self.pipeline_configuration, "get_templates_config",
+                              wraps=self.pipeline_configuration.get_templates_config) as get_config_mock:
+                read_templates(self.pipeline_configuration)
+        self.assertEqual(1, fstat_mock.call_count)
+        self.assertEqual(1, get_config_mock.call_count)
+
+        # the cache is used again once it can be trusted
+        with patch.object(self.pipeline_configuration, "get_templates_config") as get_config_mock:
+            read_templates(self.pipeline_configuration)
+        self.assertEqual(0, get_config_mock.call_count)
+
+    def test_disabled(self):
+        """
+        Ensures no cache is written unless enabled.
+        """
+        self.pipeline_configuration._use_templates_cache = False
+        read_templates(self.pipeline_configuration)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_environment_changed(self):
+        """
+        Ensures the cache is rebuilt when an environment variable used by the includes changes.
+        """
+        templates_file = self.pipeline_configuration.get_templates_config_location()
+        self.create_file(
+            templates_file,
+            "include: $SGTK_TEST_TEMPLATES_INCLUDE\n"
+            "keys:\n"
+            "    name: {type: str}\n"
+        )
+        other_include_file = os.path.join(os.path.dirname(self.include_file), "other_templates.yml")
+        self.create_file(
+            other_include_file,
+            "keys:\n"
+            "    Shot: {type: str}\n"
+            "paths:\n"
+            "    shot_root: shots/{Shot}\n"
+        )
+
+        with patch.dict(os.environ, {"SGTK_TEST_TEMPLATES_INCLUDE": self.include_file}):
+            self.assertTrue("shot_work" in read_templates(self.pipeline_configuration))
+
+        with patch.dict(os.environ, {"SGTK_TEST_TEMPLATES_INCLUDE": other_include_file}):
+            self.assertTrue("shot_root" in read_templates(self.pipeline_configuration))
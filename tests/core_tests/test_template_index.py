@@ -0,0 +1,132 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from tank.template import TemplatePath, TemplateString
+from tank.template_index import TemplateIndex
+from tank.templatekey import StringKey, IntegerKey, SequenceKey
+
+from tank_test.tank_test_base import *
+
+
+class TestTemplateIndex(TankTestBase):
+    """
+    Tests for the TemplateIndex class.
+    """
+    def setUp(self):
+        super(TestTemplateIndex, self).setUp()
+
+        self.keys = {"Sequence": StringKey("Sequence"),
+                     "Shot": StringKey("Shot"),
+                     "Step": StringKey("Step"),
+                     "name": StringKey("name"),
+                     "version": IntegerKey("version", format_spec="03"),
+                     "SEQ": SequenceKey("SEQ", format_spec="04")}
+
+        self.templates = {
+            "shot_root": TemplatePath("sequences/{Sequence}/{Shot}", self.keys, self.project_root),
+            "shot_work": TemplatePath("sequences/{Sequence}/{Shot}/{Step}/work/{name}.v{version}.ma",
+                                      self.keys, self.project_root),
+            "shot_render": TemplatePath("sequences/{Sequence}/{Shot}/{Step}/images/{name}[.{SEQ}].exr",
+                                        self.keys, self.project_root),
+            "asset_work": TemplatePath("assets/{name}/work/{name}.v{version}.ma", self.keys, self.project_root),
+            "publish_name": TemplateString("{name}, v{version}", self.keys),
+        }
+        self.index = TemplateIndex(self.templates)
+
+    def _brute_force(self, path):
+        """
+        Returns the names of all templates validating the path.
+        """
+        return sorted(name for (name, template) in self.templates.items() if template.validate(path))
+
+    def _candidates(self, path):
+        """
+        Returns the names of all candidate templates for the path.
+        """
+        candidates = self.index.get_candidates(path)
+        return sorted(name for (name, template) in self.templates.items() if template in candidates)
+
+    def test_prefix(self):
+        """
+        Ensures templates with a different static prefix are discarded.
+        """
+        path = os.path.join(self.project_root, "assets", "car", "work", "car.v001.ma")
+        self.assertEqual(self._candidates(path), ["asset_work"])
+
+    def test_depth(self):
+        """
+        Ensures templates which can't match the depth of a path are discarded.
+        """
+        path = os.path.join(self.project_root, "sequences", "seq_1", "shot_1")
+        self.assertEqual(self._candidates(path), ["shot_root"])
+
+        path = os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "work", "foo.v001.ma")
+        self.assertEqual(self._candidates(path), ["shot_work"])
+
+    def test_strings(self):
+        """
+        Ensures template strings are indexed with their prefix.
+        """
+        self.assertEqual(self._candidates("foo, v001"), ["publish_name"])
+
+    def test_no_false_negatives(self):
+        """
+        Ensures all templates matching a path are returned as candidates.
+        """
+        paths = [
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "work", "foo.v001.ma"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "images", "foo.exr"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "images", "foo.0001.exr"),
+            os.path.join(self.project_root, "assets", "car", "work", "car.v001.ma"),
+            os.path.join(self.project_root, "other", "car", "work", "car.v001.ma"),
+            "foo, v001",
+        ]
+        for path in paths:
+            matches = self._brute_force(path)
+            candidates = self._candidates(path)
+            for match in matches:
+                self.assertTrue(match in candidates)
+
+    def test_outside_roots(self):
+        """
+        Ensures no path templates are returned for paths outside the storage roots.
+        """
+        self.assertEqual(self._candidates("/some/other/path/foo.v001.ma"), [])
+
+    def test_is_current(self):
+        """
+        Ensures changes to the templates dictionary are detected.
+        """
+        self.assertTrue(self.index.is_current(self.templates))
+        templates = dict(self.templates)
+        self.assertTrue(self.index.is_current(templates))
+        templates["shot_root"] = TemplatePath("sequences/{Sequence}", self.keys, self.project_root)
+        self.assertFalse(self.index.is_current(templates))
+        del templates["shot_root"]
+        self.assertFalse(self.index.is_current(templates))
+
+    def test_many(self):
+        """
+        Ensures candidates for several paths are the same as for each path on its own.
+        """
+        paths = [
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "work", "foo.v001.ma"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "images", "foo.exr"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "comp", "work", "foo.v002.ma"),
+            os.path.join(self.project_root, "sequences", "seq_1", "shot_1"),
+            "foo, v001",
+            "/",
+        ]
+        expected = [self.index.get_candidates(path) for path in paths]
+        self.assertEqual(expected, self.index.get_candidates_many(paths))
+        self.assertEqual([], self.index.get_candidates_many([]))
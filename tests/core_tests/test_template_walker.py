@@ -0,0 +1,217 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import glob
+
+from mock import patch
+
+from tank.template import TemplatePath
+from tank.template_walker import TemplateWalker
+from tank.templatekey import StringKey, IntegerKey, SequenceKey
+
+from tank_test.tank_test_base import *
+
+
+class TestTemplateWalker(TankTestBase):
+    """
+    Tests for the TemplateWalker class.
+    """
+    def setUp(self):
+        super(TestTemplateWalker, self).setUp()
+
+        self.keys = {"Shot": StringKey("Shot", choices=["shot_1", "shot_2"]),
+                     "name": StringKey("name"),
+                     "variant": StringKey("variant"),
+                     "version": IntegerKey("version", format_spec="03")}
+        self.template = TemplatePath("shots/{Shot}/work/{name}[_{variant}].v{version}.ma",
+                                     self.keys, self.project_root)
+
+        self.files = [
+            os.path.join("shots", "shot_1", "work", "foo.v001.ma"),
+            os.path.join("shots", "shot_1", "work", "foo_bar.v002.ma"),
+            os.path.join("shots", "shot_1", "work", ".foo.v003.ma"),
+            os.path.join("shots", "shot_1", "work", "foo.v001.nk"),
+            os.path.join("shots", "shot_2", "work", "foo.v001.ma"),
+            os.path.join("shots", "shot_3", "work", "foo.v001.ma"),
+        ]
+        for relative_path in self.files:
+            self.create_file(os.path.join(self.project_root, relative_path))
+
+    def _find_all(self, find, fields, wildcard_keys):
+        """
+        Searches for the paths for each definition variation of the template.
+        """
+        paths = set()
+        for keys in self.template._keys:
+            current_fields = dict(fields)
+            for key_name in keys:
+                if key_name in wildcard_keys:
+                    current_fields[key_name] = "*"
+            if not self.template._missing_keys(current_fields, keys, False):
+                paths.update(find(current_fields, wildcard_keys))
+        return paths
+
+    def _glob(self, fields, wildcard_keys):
+        """
+        Searches for paths with glob.
+        """
+        glob_str = self.template._apply_fields(fields, ignore_types=wildcard_keys)
+        return [p for p in glob.glob(glob_str) if self.template.validate(p)]
+
+    def test_same_as_glob(self):
+        """
+        Ensures the same paths are found as when using glob.
+        """
+        wildcard_keys = ["Shot", "name", "variant", "version"]
+        expected = self._find_all(self._glob, {}, wildcard_keys)
+
+        walker = TemplateWalker(self.template)
+        self.assertEqual(expected, self._find_all(walker.find, {}, wildcard_keys))
+        self.assertEqual(
+            set([os.path.join(self.project_root, p) for p in self.files[0:2] + self.files[4:5]]),
+            expected
+        )
+
+    def test_directories_listed_once(self):
+        """
+        Ensures directories are only listed once across definition variations.
+        """
+        walker = TemplateWalker(self.template)
+        with patch("os.listdir", wraps=os.listdir) as listdir_mock:
+            paths = self._find_all(walker.find, {"Shot": "shot_1"}, ["name", "variant", "version"])
+
+        listed = [call[0][0] for call in listdir_mock.call_args_list]
+        self.assertEqual(len(listed), len(set(listed)))
+        self.assertEqual(2, len(paths))
+
+    def test_pruning(self):
+        """
+        Ensures directories which are not valid key values are not walked.
+        """
+        walker = TemplateWalker(self.template)
+        with patch("os.listdir", wraps=os.listdir) as listdir_mock:
+            self._find_all(walker.find, {}, ["Shot", "name", "variant", "version"])
+
+        listed = [call[0][0] for call in listdir_mock.call_args_list]
+        self.assertTrue(os.path.join(self.project_root, "shots", "shot_1", "work") in listed)
+        self.assertFalse(os.path.join(self.project_root, "shots", "shot_3", "work") in listed)
+
+    def test_searched_once(self):
+        """
+        Ensures the same pattern is only searched once.
+        """
+        walker = TemplateWalker(self.template)
+        fields = {"Shot": "shot_1", "name": "foo", "version": "*"}
+        self.assertEqual(1, len(walker.find(fields, ["version"])))
+        self.assertEqual([], walker.find(fields, ["version"]))
+
+    def test_no_wildcards(self):
+        """
+        Ensures fully specified paths are only returned if they exist.
+        """
+        walker = TemplateWalker(self.template)
+        self.assertEqual(1, len(walker.find({"Shot": "shot_1", "name": "foo", "version": 1}, [])))
+        self.assertEqual([], walker.find({"Shot": "shot_1", "name": "foo", "version": 4}, []))
+
+    def test_max_workers(self):
+        """
+        Ensures the same paths are found when listing directories concurrently.
+        """
+        wildcard_keys = ["Shot", "name", "variant", "version"]
+        walker = TemplateWalker(self.template)
+        expected = self._find_all(walker.find, {}, wildcard_keys)
+
+        walker = TemplateWalker(self.template, max_workers=4)
+        try:
+            self.assertEqual(expected, self._find_all(walker.find, {}, wildcard_keys))
+        finally:
+            walker.close()
+
+    def test_stats(self):
+        """
+        Ensures listed directories and entries are counted.
+        """
+        walker = TemplateWalker(self.template)
+        walker.find({"Shot": "shot_1", "name": "*", "version": "*"}, ["name", "version"])
+        stats = walker.stats
+        self.assertEqual(1, stats["directories_listed"])
+        self.assertEqual(4, stats["entries_seen"])
+
+
+class TestFindSequences(TankTestBase):
+    """
+    Tests for TemplateWalker.find_sequences.
+    """
+    def setUp(self):
+        super(TestFindSequences, self).setUp()
+
+        self.keys = {"name": StringKey("name"),
+                     "SEQ": SequenceKey("SEQ", format_spec="04")}
+        self.template = TemplatePath("renders/{name}.{SEQ}.exr", self.keys, self.project_root)
+        self.renders = os.path.join(self.project_root, "renders")
+        for frame in [1, 2, 3, 5]:
+            self.create_file(os.path.join(self.renders, "beauty.%04d.exr" % frame))
+        self.create_file(os.path.join(self.renders, "beauty.0001.jpg"))
+        self.create_file(os.path.join(self.renders, "beauty.exr"))
+
+    def test_collapse(self):
+        """
+        Ensures frames are collapsed and only one file per sequence is parsed.
+        """
+        walker = TemplateWalker(self.template)
+        with patch.object(self.template, "validate_and_get_fields",
+                          wraps=self.template.validate_and_get_fields) as parse_mock:
+            result = walker.find_sequences({"name": "*", "SEQ": "*"}, ["name", "SEQ"], self.keys["SEQ"])
+
+        self.assertEqual([(os.path.join(self.renders, "beauty.0001.exr"), [1, 2, 3, 5])], result)
+        self.assertEqual(1, parse_mock.call_count)
+
+    def test_no_frame_wildcard(self):
+        """
+        Ensures paths are returned as is when frames are not searched for.
+        """
+        walker = TemplateWalker(self.template)
+        result = walker.find_sequences({"name": "*", "SEQ": 2}, ["name"], self.keys["SEQ"])
+        self.assertEqual([(os.path.join(self.renders, "beauty.0002.exr"), None)], result)
+
+    def test_frame_not_trailing(self):
+        """
+        Ensures each file is parsed when the frame number is not at the end of the name.
+        """
+        template = TemplatePath("renders/{SEQ}.{name}.exr", self.keys, self.project_root)
+        for frame in [1, 2]:
+            self.create_file(os.path.join(self.renders, "%04d.beauty.exr" % frame))
+
+        walker = TemplateWalker(template)
+        result = walker.find_sequences({"name": "*", "SEQ": "*"}, ["name", "SEQ"], self.keys["SEQ"])
+        self.assertEqual(
+            set([(os.path.join(self.renders, "0001.beauty.exr"), None),
+                 (os.path.join(self.renders, "0002.beauty.exr"), None)]),
+            set(result)
+        )
+
+    def test_name_ending_with_digits(self):
+        """
+        Ensures frames are found when the name before them also ends with digits.
+        """
+        keys = {"name": StringKey("name"),
+                "SEQ": SequenceKey("SEQ", format_spec="02")}
+        template = TemplatePath("takes/{name}_{SEQ}.exr", keys, self.project_root)
+        takes = os.path.join(self.project_root, "takes")
+        self.create_file(os.path.join(takes, "take_1_12.exr"))
+        self.create_file(os.path.join(takes, "take_1_13.exr"))
+
+        walker = TemplateWalker(template)
+        result = walker.find_sequences({"name": "*", "SEQ": "*"}, ["name", "SEQ"], keys["SEQ"])
+        self.assertEqual(
+            [(os.path.join(takes, "take_1_12.exr"), [12, 13])],
+            result
+        )
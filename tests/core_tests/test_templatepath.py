@@ -11,6 +11,9 @@
 
 import sys
 import os
+import re
+
+from mock import patch
 
 import tank
 from tank import TankError
@@ -589,6 +592,62 @@ class TestApplyFields(TestTemplatePath):
         self.assertEquals(expected, template.apply_fields(fields))
 
 
+    def test_percent_in_definition(self):
+        """
+        Static text is inserted as is.
+        """
+        template = TemplatePath("{Shot}/%V/100%/{Step}.ma", self.keys, self.project_root)
+        expected = os.path.join(self.project_root, "s1", "%V", "100%", "Anm.ma")
+        self.assertEquals(expected, template.apply_fields({"Shot": "s1", "Step": "Anm"}))
+
+    def test_optional_variations(self):
+        """
+        The most inclusive variation is used, whatever the variations used before.
+        """
+        template = TemplatePath("{Shot}/{name}[_{branch}][.v{version}].ma", self.keys, self.project_root)
+        fields = {"name": "foo"}
+        self.assertEquals(os.path.join(self.project_root, "s1", "foo.ma"), template.apply_fields(fields))
+        fields["version"] = 3
+        self.assertEquals(os.path.join(self.project_root, "s1", "foo.v003.ma"), template.apply_fields(fields))
+        fields["branch"] = "bar"
+        self.assertEquals(os.path.join(self.project_root, "s1", "foo_bar.v003.ma"), template.apply_fields(fields))
+        fields["version"] = None
+        self.assertEquals(os.path.join(self.project_root, "s1", "foo_bar.ma"), template.apply_fields(fields))
+        del fields["name"]
+        self.assertRaisesRegexp(TankError, "\\['name'\\]", template.apply_fields, fields)
+
+
+class TestApplyFieldsMany(TestTemplatePath):
+    def setUp(self):
+        super(TestApplyFieldsMany, self).setUp()
+        self.fields_list = []
+        for shot in ["s1", "s2"]:
+            for version in range(1, 4):
+                self.fields_list.append({"Sequence": "seq_1",
+                                         "Shot": shot,
+                                         "Step": "Anm",
+                                         "branch": "mmm",
+                                         "version": version,
+                                         "snapshot": 2})
+
+    def test_same_as_apply_fields(self):
+        expected = [self.template_path.apply_fields(fields) for fields in self.fields_list]
+        self.assertEquals(expected, self.template_path.apply_fields_many(self.fields_list))
+
+        expected = [self.template_path.apply_fields(fields, "win32") for fields in self.fields_list]
+        self.assertEquals(expected, self.template_path.apply_fields_many(self.fields_list, "win32"))
+
+    def test_values_formatted_once(self):
+        key = self.keys["Sequence"]
+        with patch.object(key, "str_from_value", wraps=key.str_from_value) as str_from_value_mock:
+            self.template_path.apply_fields_many(self.fields_list)
+        self.assertEquals(1, str_from_value_mock.call_count)
+
+    def test_bad_fields(self):
+        self.fields_list[2]["version"] = "a"
+        self.assertRaises(TankError, self.template_path.apply_fields_many, self.fields_list)
+
+
 class Test_ApplyFields(TestTemplatePath):
     """Tests for private TemplatePath._apply_fields"""
     def test_skip_enum(self):
@@ -957,6 +1016,83 @@ class TestGetFields(TestTemplatePath):
         input_path = os.path.join(self.project_root, "some", "thing", "else")
         self.assertRaises(TankError, template.get_fields, input_path)
 
+    def test_regex_parsing(self):
+        """
+        Test that paths which can only be split one way are parsed with the
+        pre-compiled regular expression.
+        """
+        definition = "sequences/{Sequence}/{Shot}/{Step}/work/{name_alpha}.v{version}.ma"
+        template = tank.TemplatePath(definition, self.keys, self.project_root)
+        self.assertTrue(template._get_path_parsers()[0]._fast_regex is not None)
+
+        relative_path = os.path.join("sequences", "seq_1", "shot_1", "Anm", "work", "Henry.v003.ma")
+        input_path = os.path.join(self.project_root, relative_path)
+        expected = {"Sequence": "seq_1",
+                    "Shot": "shot_1",
+                    "Step": "Anm",
+                    "name_alpha": "Henry",
+                    "version": 3}
+        self.assertEqual(expected, template.get_fields(input_path))
+
+        # values which don't validate are still reported as errors
+        relative_path = os.path.join("sequences", "seq_1", "shot_3", "Anm", "work", "Henry.v003.ma")
+        input_path = os.path.join(self.project_root, relative_path)
+        self.assertRaises(TankError, template.get_fields, input_path)
+
+    def test_regex_parsing_ambiguous(self):
+        """
+        Test that keys which can't be told apart from the following token are
+        left to the recursive resolution.
+        """
+        definition = "work/{name}_{Step}.ma"
+        template = tank.TemplatePath(definition, self.keys, self.project_root)
+        self.assertTrue(template._get_path_parsers()[0]._fast_regex is None)
+
+        input_path = os.path.join(self.project_root, "work", "foo_bar_comp.ma")
+        self.assertRaisesRegexp(TankError, "Ambiguous values", template.get_fields, input_path)
+
+        input_path = os.path.join(self.project_root, "work", "foo_comp.ma")
+        self.assertEqual({"name": "foo", "Step": "comp"}, template.get_fields(input_path))
+
+    def test_reused_parser_errors(self):
+        """
+        Test that errors reported by a template don't depend on previous calls.
+        """
+        definition = "work/{name}.v{version}.ma"
+        template = tank.TemplatePath(definition, self.keys, self.project_root)
+        bad_path = os.path.join(self.project_root, "work", "foo.v001.nk")
+
+        errors = []
+        for path in [bad_path, os.path.join(self.project_root, "work", "foo.v001.ma"), bad_path]:
+            try:
+                template.get_fields(path)
+            except TankError, e:
+                errors.append(str(e))
+
+        self.assertEqual(2, len(errors))
+        self.assertEqual(errors[0], errors[1])
+
+
+class TestGetFieldsMany(TestTemplatePath):
+    def test_aligned_results(self):
+        good_path = os.path.join(self.project_root, "shots", "seq_1", "shot_1", "Anm", "work", "shot_1.mmm.v003.002.ma")
+        bad_path = os.path.join(self.project_root, "shots", "seq_1", "shot_1", "Anm", "work", "shot_1.mmm.v003.ma")
+        results = self.template_path.get_fields_many([good_path, bad_path, good_path])
+
+        self.assertEquals(3, len(results))
+        self.assertEquals((self.template_path.get_fields(good_path), None), results[0])
+        self.assertEquals(results[0], results[2])
+        self.assertTrue(results[0][0] is not results[2][0])
+
+        (fields, error) = results[1]
+        self.assertTrue(fields is None)
+        self.assertRaisesRegexp(TankError, "^%s$" % re.escape(error), self.template_path.get_fields, bad_path)
+
+    def test_skip_keys(self):
+        good_path = os.path.join(self.project_root, "shots", "seq_1", "shot_1", "Anm", "work", "shot_1.mmm.v003.002.ma")
+        [(fields, error)] = self.template_path.get_fields_many([good_path], skip_keys=["snapshot"])
+        self.assertTrue("snapshot" not in fields)
+
 
 class TestGetKeysSepInValue(TestTemplatePath):
     """Tests for cases where seperator used between keys is used in value for keys."""
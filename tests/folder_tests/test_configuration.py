@@ -9,9 +9,11 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import sys
+import stat
 import unittest
 import shutil
-from mock import Mock
+from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
@@ -74,3 +76,108 @@ class TestFolderConfiguration(TankTestBase):
                           self.schema_location)
 
 
+class TestFolderConfigurationCache(TankTestBase):
+    """
+    Tests the caching of the folder configuration.
+    """
+    def setUp(self):
+        super(TestFolderConfigurationCache, self).setUp()
+        self.setup_fixtures()
+        self.schema_location = self.tk.pipeline_configuration.get_schema_config_location()
+        self.sequence_yml = os.path.join(self.schema_location, "project", "sequences", "sequence.yml")
+
+    def _modify_sequence_yml(self):
+        """
+        Changes the name expression of the sequence folders.
+        """
+        fh = open(self.sequence_yml, "r")
+        data = yaml.load(fh)
+        fh.close()
+        data["name"] = "{code}_{id}"
+        fh = open(self.sequence_yml, "w")
+        fh.write(yaml.dump(data))
+        fh.close()
+
+    def test_memo(self):
+        """
+        Ensures the configuration is only built again when the schema changes.
+        """
+        cache = folder.FolderConfigurationCache(self.tk)
+        config = cache.get()
+        self.assertTrue(cache.get() is config)
+
+        self._modify_sequence_yml()
+        new_config = cache.get()
+        self.assertFalse(new_config is config)
+        self.assertTrue(cache.get() is new_config)
+
+        # new folders are picked up as well
+        os.makedirs(os.path.join(self.schema_location, "project", "editorial"))
+        self.assertFalse(cache.get() is new_config)
+
+    def test_schema_data(self):
+        """
+        Ensures configurations built from scanned schema data match the original.
+        """
+        config = folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+        with patch.object(folder.configuration.FolderConfiguration, "_scan_schema") as scan_mock:
+            new_config = folder.configuration.FolderConfiguration(
+                self.tk, self.schema_location, config.get_schema_data()
+            )
+        self.assertEqual(scan_mock.call_count, 0)
+
+        for entity_type in ["Project", "Sequence", "Shot", "Asset", "Step", "Task"]:
+            self.assertEqual(
+                [x.get_path() for x in config.get_folder_objs_for_entity_type(entity_type)],
+                [x.get_path() for x in new_config.get_folder_objs_for_entity_type(entity_type)]
+            )
+
+    def test_disk_cache(self):
+        """
+        Ensures the scanned schema is shared through the cache file when enabled.
+        """
+        self.pipeline_configuration._use_schema_cache = True
+        cache_file = self.pipeline_configuration.get_schema_cache_location()
+
+        folder.FolderConfigurationCache(self.tk).get()
+        self.assertTrue(os.path.exists(cache_file))
+
+        scan_schema = folder.configuration.FolderConfiguration._scan_schema
+        with patch.object(folder.configuration.FolderConfiguration, "_scan_schema",
+                          autospec=True, side_effect=scan_schema) as scan_mock:
+            folder.FolderConfigurationCache(self.tk).get()
+            self.assertEqual(scan_mock.call_count, 0)
+
+            # the cache is ignored once the schema changed
+            self._modify_sequence_yml()
+            folder.FolderConfigurationCache(self.tk).get()
+            self.assertEqual(scan_mock.call_count, 1)
+
+            # and is updated
+            folder.FolderConfigurationCache(self.tk).get()
+            self.assertEqual(scan_mock.call_count, 1)
+
+    def test_untrusted_disk_cache(self):
+        """
+        Ensures a cache file which could have been written by any user is ignored.
+        """
+        # permissions are controlled by ACLs on windows
+        if sys.platform == "win32":
+            return
+
+        self.pipeline_configuration._use_schema_cache = True
+        cache_file = self.pipeline_configuration.get_schema_cache_location()
+
+        folder.FolderConfigurationCache(self.tk).get()
+        self.assertFalse(os.stat(cache_file).st_mode & stat.S_IWOTH)
+        os.chmod(cache_file, 0666)
+
+        scan_schema = folder.configuration.FolderConfiguration._scan_schema
+        with patch.object(folder.configuration.FolderConfiguration, "_scan_schema",
+                          autospec=True, side_effect=scan_schema) as scan_mock:
+            folder.FolderConfigurationCache(self.tk).get()
+            self.assertEqual(scan_mock.call_count, 1)
+
+            # the cache file was replaced by a trusted one
+            folder.FolderConfigurationCache(self.tk).get()
+            self.assertEqual(scan_mock.call_count, 1)
@@ -11,7 +11,7 @@
 import os
 import unittest
 import shutil
-from mock import Mock
+from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
@@ -550,6 +550,99 @@ class TestCreateFilesystemStructure(TankTestBase):
                                             engine=None)
         self.assertTrue(os.path.exists(expected))
 
+    def test_create_many_shots(self):
+        """
+        Tests that the shotgun data for a batch of shots is loaded in bulk
+        rather than with queries for each shot.
+        """
+        shots = []
+        for shot_id in range(100, 110):
+            shots.append({"type": "Shot",
+                          "id": shot_id,
+                          "code": "shot_%d" % shot_id,
+                          "sg_sequence": self.seq,
+                          "project": self.project})
+        self.add_to_sg_mock_db(shots)
+        
+        queried_types = []
+        sg_find = self.tk.shotgun.find
+        def find_proxy(entity_type, *args, **kwargs):
+            queried_types.append(entity_type)
+            return sg_find(entity_type, *args, **kwargs)
+        
+        with patch.object(self.tk.shotgun, "find", side_effect=find_proxy):
+            folder.process_filesystem_structure(self.tk, 
+                                                "Shot", 
+                                                [x["id"] for x in shots], 
+                                                preview=False,
+                                                engine=None)
+        
+        for shot in shots:
+            expected = os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+            self.assertTrue(os.path.exists(expected))
+        
+        # one query per level in the configuration
+        self.assertEqual(queried_types.count("Project"), 1)
+        self.assertEqual(queried_types.count("Sequence"), 1)
+        self.assertEqual(queried_types.count("Shot"), 1)
+        
+    def test_interleaved_requests(self):
+        """
+        Tests that the data prefetched for a request is not affected by other
+        requests using the same folder configuration in the meantime.
+        """
+        shots = []
+        for shot_id in range(100, 110):
+            shots.append({"type": "Shot",
+                          "id": shot_id,
+                          "code": "shot_%d" % shot_id,
+                          "sg_sequence": self.seq,
+                          "project": self.project})
+        self.add_to_sg_mock_db(shots)
+
+        # run another request for a single shot in the middle of the first one
+        create_single_folder_item = folder.operations.create_single_folder_item
+        nested_requests = []
+        def create_single_folder_item_proxy(*args, **kwargs):
+            if not nested_requests:
+                nested_requests.append(self.shot["id"])
+                folder.process_filesystem_structure(self.tk, "Shot", self.shot["id"], preview=False, engine=None)
+            return create_single_folder_item(*args, **kwargs)
+
+        queried_types = []
+        sg_find = self.tk.shotgun.find
+        def find_proxy(entity_type, *args, **kwargs):
+            queried_types.append(entity_type)
+            return sg_find(entity_type, *args, **kwargs)
+
+        with patch.object(self.tk.shotgun, "find", side_effect=find_proxy):
+            with patch("tank.folder.operations.create_single_folder_item",
+                       side_effect=create_single_folder_item_proxy):
+                folder.process_filesystem_structure(self.tk,
+                                                    "Shot",
+                                                    [x["id"] for x in shots],
+                                                    preview=False,
+                                                    engine=None)
+
+        for shot in shots + [self.shot]:
+            expected = os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+            self.assertTrue(os.path.exists(expected))
+
+        # one query per request, the first request still uses its prefetched data
+        self.assertEqual(queried_types.count("Shot"), 2)
+
+    def test_create_missing_shot(self):
+        """
+        Tests that shots which don't exist in shotgun are reported when 
+        processed together with other shots.
+        """
+        self.assertRaises(TankError,
+                          folder.process_filesystem_structure,
+                          self.tk,
+                          "Shot",
+                          [self.shot["id"], 12345],
+                          preview=False,
+                          engine=None)
               
     def test_wrong_type_entity_ids(self):
         """Test passing in type other than list, int or tuple as value for entity_ids parameter.
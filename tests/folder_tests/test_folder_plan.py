@@ -0,0 +1,116 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+from mock import patch
+from tank import TankError
+from tank.folder import FolderCreationPlan
+from tank_test.tank_test_base import *
+
+
+class TestFolderCreationPlan(TankTestBase):
+    """
+    Tests the dry runs of the folder creation.
+    """
+
+    def setUp(self):
+        super(TestFolderCreationPlan, self).setUp()
+        self.setup_fixtures()
+
+        self.seq = {"type": "Sequence",
+                    "id": 2,
+                    "code": "seq_code",
+                    "project": self.project}
+        self.shot = {"type": "Shot",
+                     "id": 1,
+                     "code": "shot_code",
+                     "sg_sequence": self.seq,
+                     "project": self.project}
+        self.add_to_sg_mock_db([self.shot, self.seq, self.project])
+
+        self.seq_path = os.path.join(self.project_root, "sequences", self.seq["code"])
+        self.shot_path = os.path.join(self.seq_path, self.shot["code"])
+
+    def _get_paths(self, items):
+        return [i.get("path") or i.get("target_path") for i in items]
+
+    def test_plan(self):
+        """
+        Tests that a plan matches the preview, without creating anything.
+        """
+        preview = self.tk.preview_filesystem_structure("Shot", self.shot["id"])
+        plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+        self.assertTrue(isinstance(plan, FolderCreationPlan))
+
+        self.assertFalse(os.path.exists(self.shot_path))
+        self.assertEqual(plan.conflicts, [])
+        self.assertEqual(plan.remote, [])
+        self.assertEqual(sorted(self._get_paths(plan.to_create + plan.existing)), sorted(set(preview)))
+        self.assertTrue(self.shot_path in self._get_paths(plan.to_create))
+        # the project folder is part of the fixtures
+        self.assertTrue(self.project_root in self._get_paths(plan.existing))
+
+    def test_execute(self):
+        """
+        Tests that a plan can be executed.
+        """
+        plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+        plan.execute()
+        self.assertTrue(os.path.exists(self.shot_path))
+
+        plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+        self.assertEqual(plan.to_create, [])
+        self.assertTrue(self.shot_path in self._get_paths(plan.existing))
+
+    def test_directory_listings(self):
+        """
+        Tests that each folder is listed once, rather than each path looked up.
+        """
+        self.tk.create_filesystem_structure("Shot", self.shot["id"])
+
+        with patch("os.listdir", wraps=os.listdir) as listdir_mock:
+            with patch("os.path.exists", wraps=os.path.exists) as exists_mock:
+                plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+
+        listed = [x[0][0] for x in listdir_mock.call_args_list]
+        self.assertEqual(len(listed), len(set(listed)))
+        self.assertTrue(len(listed) < len(plan.existing))
+        self.assertFalse(self.shot_path in [x[0][0] for x in exists_mock.call_args_list])
+
+    def test_conflicts(self):
+        """
+        Tests that conflicts with the path cache are reported.
+        """
+        self.tk.create_filesystem_structure("Shot", self.shot["id"])
+
+        # rename the shot
+        self.shot["code"] = "renamed_shot_code"
+        self.add_to_sg_mock_db(self.shot)
+        renamed_path = os.path.join(self.seq_path, self.shot["code"])
+
+        plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+        self.assertEqual(self._get_paths([item for (item, _) in plan.conflicts]), [renamed_path])
+        self.assertTrue("another path '%s'" % self.shot_path in plan.conflicts[0][1])
+
+        self.assertRaises(TankError, plan.execute)
+        self.assertFalse(os.path.exists(renamed_path))
+
+    def test_remote(self):
+        """
+        Tests that folders only registered in the path cache are reported.
+        """
+        self.add_to_path_cache(self.shot_path, self.shot)
+
+        plan = self.tk.plan_filesystem_structure("Shot", self.shot["id"])
+        self.assertEqual(self._get_paths(plan.remote), [self.shot_path])
+        self.assertTrue(self.seq_path in self._get_paths(plan.to_create))
+
+        plan.execute()
+        self.assertTrue(os.path.exists(self.shot_path))
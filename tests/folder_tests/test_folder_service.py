@@ -0,0 +1,107 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+from mock import patch
+from tank import TankError
+from tank.folder import FolderCreationService
+from tank.folder import operations
+from tank_test.tank_test_base import *
+
+
+class TestFolderCreationService(TankTestBase):
+    """
+    Tests the long running folder creation service.
+    """
+
+    def setUp(self):
+        super(TestFolderCreationService, self).setUp()
+        self.setup_fixtures()
+
+        self.seq = {"type": "Sequence",
+                    "id": 2,
+                    "code": "seq_code",
+                    "project": self.project}
+        self.shots = []
+        for shot_id in range(100, 105):
+            self.shots.append({"type": "Shot",
+                               "id": shot_id,
+                               "code": "shot_%d" % shot_id,
+                               "sg_sequence": self.seq,
+                               "project": self.project})
+        self.add_to_sg_mock_db([self.seq, self.project] + self.shots)
+
+    def _get_shot_path(self, shot):
+        return os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+
+    def test_batch(self):
+        """
+        Tests that requests are processed in a single batch.
+        """
+        service = FolderCreationService(self.tk)
+        requests = [service.submit("Shot", shot["id"]) for shot in self.shots]
+        # requests for the same entity are only processed once
+        requests.append(service.submit("Shot", self.shots[0]["id"]))
+
+        with patch("tank.folder.service.process_filesystem_structure_by_entity",
+                   wraps=operations.process_filesystem_structure_by_entity) as process_mock:
+            self.assertEqual(service.process_pending(), requests)
+
+        self.assertEqual(process_mock.call_count, 1)
+        for request in requests:
+            self.assertTrue(request.succeeded)
+            # each request only reports the folders of its own entity
+            for shot in self.shots:
+                self.assertEqual(shot["id"] == request.entity_id,
+                                 self._get_shot_path(shot) in request.folders)
+        for shot in self.shots:
+            self.assertTrue(os.path.exists(self._get_shot_path(shot)))
+
+        # nothing left to process
+        self.assertEqual(service.process_pending(), [])
+
+    def test_failures(self):
+        """
+        Tests that failures are reported for the failing entities only.
+        """
+        reported = []
+        service = FolderCreationService(self.tk, callback=reported.append)
+        requests = [service.submit("Shot", shot["id"]) for shot in self.shots]
+        missing_request = service.submit("Shot", 12345)
+        service.process_pending()
+
+        self.assertEqual(sorted(reported), sorted(requests + [missing_request]))
+        self.assertTrue(missing_request.done)
+        self.assertFalse(missing_request.succeeded)
+        self.assertTrue(isinstance(missing_request.error, TankError))
+        for request in requests:
+            self.assertTrue(request.succeeded)
+        for shot in self.shots:
+            self.assertTrue(os.path.exists(self._get_shot_path(shot)))
+
+    def test_thread(self):
+        """
+        Tests that requests are processed by the worker thread.
+        """
+        service = FolderCreationService(self.tk, batch_interval=0.1)
+        service.start()
+        try:
+            first_request = service.submit("Shot", self.shots[0]["id"])
+            self.assertTrue(first_request.wait(30))
+            self.assertTrue(first_request.succeeded)
+            requests = [service.submit("Shot", shot["id"]) for shot in self.shots[1:]]
+        finally:
+            # pending requests are processed before stopping
+            service.stop()
+
+        for request in requests:
+            self.assertTrue(request.succeeded)
+        for shot in self.shots:
+            self.assertTrue(os.path.exists(self._get_shot_path(shot)))
@@ -0,0 +1,109 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+from mock import patch
+from tank.folder import FolderIOExecutor, FolderIOError
+from tank_test.tank_test_base import *
+
+
+class TestFolderIOExecutor(TankTestBase):
+    """
+    Tests the executor used by the default folder creation hook.
+    """
+
+    def setUp(self):
+        super(TestFolderIOExecutor, self).setUp()
+
+        self.root = os.path.join(self.project_root, "io_executor")
+        self.src_file = os.path.join(self.project_root, "io_executor_src.txt")
+        with open(self.src_file, "w") as fh:
+            fh.write("copy me")
+
+    def _get_items(self):
+        """
+        Returns a folder tree with a few shots, listed children first.
+        """
+        items = []
+        seq_path = os.path.join(self.root, "sequences", "seq")
+        for shot in ["shot_010", "shot_020", "shot_030"]:
+            shot_path = os.path.join(seq_path, shot)
+            items.append({"action": "copy",
+                          "source_path": self.src_file,
+                          "target_path": os.path.join(shot_path, "work", "readme.txt")})
+            items.append({"action": "folder", "path": os.path.join(shot_path, "work")})
+            items.append({"action": "folder", "path": os.path.join(shot_path, "publish")})
+            items.append({"action": "entity_folder", "path": shot_path})
+        items.append({"action": "entity_folder", "path": seq_path})
+        return items
+
+    def test_create(self):
+        """
+        Tests that parents are created before their children.
+        """
+        items = self._get_items()
+        # paths requested more than once are only processed once
+        created = FolderIOExecutor(4).execute(items + items)
+
+        expected = [i.get("path") or i.get("target_path") for i in items]
+        self.assertEqual(created, expected)
+        for path in expected:
+            self.assertTrue(os.path.exists(path))
+
+        # nothing to do the second time around
+        self.assertEqual(FolderIOExecutor(4).execute(items), [])
+
+    def test_skip_existence_checks(self):
+        """
+        Tests that items inside created folders are not checked on disk.
+        """
+        items = self._get_items()
+        with patch("os.path.exists", wraps=os.path.exists) as exists_mock:
+            FolderIOExecutor(4).execute(items)
+
+        # only the top level folder is looked up
+        checked = set(x[0][0] for x in exists_mock.call_args_list)
+        self.assertFalse(os.path.join(self.root, "sequences", "seq", "shot_010") in checked)
+        self.assertFalse(os.path.join(self.root, "sequences", "seq", "shot_010", "work") in checked)
+
+    def test_preview(self):
+        """
+        Tests that nothing is created in preview mode.
+        """
+        items = self._get_items()
+        created = FolderIOExecutor(4, preview_mode=True).execute(items)
+
+        self.assertEqual(len(created), len(items))
+        self.assertFalse(os.path.exists(self.root))
+
+    def test_failures(self):
+        """
+        Tests that failures are reported for each item.
+        """
+        items = self._get_items()
+        # a file where the first shot folder goes
+        bad_shot_path = items[3]["path"]
+        os.makedirs(os.path.dirname(bad_shot_path))
+        with open(bad_shot_path, "w") as fh:
+            fh.write("not a folder")
+        # and a copy which can't succeed
+        items[4]["source_path"] = os.path.join(self.project_root, "missing.txt")
+
+        with self.assertRaises(FolderIOError) as cm:
+            FolderIOExecutor(4).execute(items)
+
+        # the first shot's copy and folders are skipped, as well as the second shot's copy
+        failed_paths = [i.get("path") or i.get("target_path") for (i, _) in cm.exception.failures]
+        self.assertEqual(failed_paths, [items[x].get("path") or items[x].get("target_path")
+                                        for x in [0, 1, 2, 4]])
+
+        # other items were still processed
+        self.assertTrue(os.path.exists(items[9]["path"]))
+        self.assertTrue(os.path.exists(items[8]["target_path"]))
@@ -11,12 +11,14 @@
 import os
 import unittest
 import shutil
+import copy
 from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
 from tank import hook
 from tank import folder
+from tank.folder.folder_types import UserWorkspace
 from tank_test.tank_test_base import *
 
 
@@ -89,6 +91,34 @@ class TestHumanUser(TankTestBase):
         self.assertEquals(ctx_foo.filesystem_locations, [self.user_path])
         self.assertEquals(ctx_bar.filesystem_locations, [self.user_path2])        
         
+    @patch("tank.util.login.get_current_user")
+    def test_shared_configuration(self, get_current_user):
+        """
+        Tests that the current user isn't stored in the folder configuration,
+        which is shared by all folder creation requests.
+        """
+        config = self.tk.folder_configuration_cache.get()
+        user_nodes = []
+        nodes = list(config.get_folder_objs_for_entity_type("Project"))
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node._children)
+            if isinstance(node, UserWorkspace):
+                user_nodes.append(node)
+        self.assertTrue(len(user_nodes) > 0)
+        filters = [copy.deepcopy(x._filters) for x in user_nodes]
+
+        get_current_user.return_value = self.humanuser
+        folder.process_filesystem_structure(self.tk,
+                                            self.shot["type"],
+                                            self.shot["id"],
+                                            preview=False,
+                                            engine="tk-maya")
+
+        self.assertTrue(os.path.exists(self.user_path))
+        self.assertTrue(self.tk.folder_configuration_cache.get() is config)
+        self.assertEqual([x._filters for x in user_nodes], filters)
+
     @patch("tank.util.login.get_current_user")
     def test_login_not_in_shotgun(self, get_current_user):
         # make sure that if there is no loncal login matching, raise
@@ -346,6 +346,9 @@ class TankTestBase(unittest.TestCase):
             pc.close()
             if os.path.exists(path_cache_file):
                 os.remove(path_cache_file)
+            replica_file = self.tk.path_cache_replica_pool.get_location()
+            if os.path.exists(replica_file):
+                os.remove(replica_file)
 
             # clear global shotgun accessor
             tank.util.shotgun._g_sg_cached_connections = threading.local()
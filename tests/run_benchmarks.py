@@ -0,0 +1,117 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Runs the core benchmarks against synthetic configurations of increasing size
+and writes the timings as JSON, so that they can be compared across core versions.
+
+    $ python run_benchmarks.py --sizes=100,1000 --output=results.json
+    $ python run_benchmarks.py get_fields apply_fields
+"""
+
+import sys
+import os
+import json
+import time
+import platform
+from optparse import OptionParser
+
+# use the tank and test packages from this repository
+tests_root = os.path.abspath(os.path.dirname(__file__))
+sys.path = [
+    tests_root,
+    os.path.join(tests_root, "python"),
+    os.path.join(os.path.dirname(tests_root), "python"),
+] + sys.path
+os.environ["TK_TEST_FIXTURES"] = os.path.join(tests_root, "fixtures")
+
+from tank_test import tank_test_base
+from tank import pipelineconfig_utils
+
+from benchmarks.template_benchmarks import TemplateBenchmarks
+
+# benchmark classes, run in this order
+BENCHMARK_CLASSES = [TemplateBenchmarks]
+
+
+def run_benchmarks(sizes, parameters, names):
+    """
+    Runs the benchmarks for each configuration size.
+
+    :param sizes: List of numbers of templates in the generated configurations.
+    :param parameters: Dictionary of parameters passed to the benchmarks.
+    :param names: Names of the benchmarks to run, all benchmarks are run if empty.
+    :returns: List of results.
+    """
+    results = []
+    for size in sizes:
+        for benchmark_class in BENCHMARK_CLASSES:
+            print
+            print "%s with %d templates" % (benchmark_class.__name__, size)
+            benchmark = benchmark_class(dict(parameters, num_templates=size))
+            benchmark.setUp()
+            try:
+                results.extend(benchmark.run_benchmarks(names))
+            finally:
+                benchmark.tearDown()
+                benchmark.doCleanups()
+    return results
+
+
+if __name__ == "__main__":
+    parser = OptionParser(usage="usage: %prog [options] [benchmark names]")
+    parser.add_option("--sizes",
+                      default="100,1000",
+                      help="comma separated numbers of templates of the generated configurations")
+    parser.add_option("--repeat",
+                      type="int",
+                      default=5,
+                      help="number of times each operation is timed")
+    parser.add_option("--paths",
+                      type="int",
+                      default=1000,
+                      help="number of paths parsed or generated by each benchmark")
+    parser.add_option("--files",
+                      type="int",
+                      default=1000,
+                      help="number of files created on disk for the search benchmarks")
+    parser.add_option("--output",
+                      help="file to write the results to, printed out if not set")
+
+    (options, args) = parser.parse_args()
+
+    parameters = {
+        "repeat": options.repeat,
+        "num_paths": options.paths,
+        "num_files": options.files,
+    }
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    tank_test_base.setUpModule()
+    results = run_benchmarks(sizes, parameters, args)
+
+    report = {
+        "core_version": pipelineconfig_utils.get_currently_running_api_version(),
+        "python_version": platform.python_version(),
+        "platform": sys.platform,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": dict(parameters, sizes=sizes),
+        "results": results,
+    }
+    report_json = json.dumps(report, indent=2, sort_keys=True)
+
+    if options.output:
+        with open(options.output, "w") as fh:
+            fh.write(report_json)
+        print
+        print "Results written to %s" % options.output
+    else:
+        print
+        print report_json